@@ -1,8 +1,18 @@
 import streamlit as st
 import os
 import json
-from utils.nlp_engine import NLPEngine
-from views import dashboard, analysis, templates
+import uuid
+from utils.engine_registry import get_engine, get_job_queue, get_document_store
+from utils import startup_profile
+from utils import tracing
+
+# Views pull in plotly/pandas; lazy_import records how long the first import took
+dashboard = startup_profile.lazy_import("views.dashboard")
+analysis = startup_profile.lazy_import("views.analysis")
+templates = startup_profile.lazy_import("views.templates")
+jobs = startup_profile.lazy_import("views.jobs")
+portfolio = startup_profile.lazy_import("views.portfolio")
+search = startup_profile.lazy_import("views.search")
 
 # Page Config
 st.set_page_config(
@@ -77,12 +87,23 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize Session State
-if "analysis" not in st.session_state:
-    st.session_state["analysis"] = None
-if "text" not in st.session_state:
-    st.session_state["text"] = ""
+# Contract text and analysis live in the shared DocumentStore; the session only keeps their ids
+if "analysis_id" not in st.session_state:
+    st.session_state["analysis_id"] = None
+if "doc_id" not in st.session_state:
+    st.session_state["doc_id"] = None
 if "page" not in st.session_state:
     st.session_state["page"] = "Dashboard"
+# The session id lives in the URL, so a browser refresh finds its analysis jobs again
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = st.query_params.get("session") or uuid.uuid4().hex[:12]
+    st.query_params["session"] = st.session_state["session_id"]
+# Keeps the documents this session shows pinned for as long as it is in use
+get_document_store().touch(st.session_state["session_id"])
+
+# Analyses run as background jobs (shared worker pool, persisted in SQLite)
+job_queue = get_job_queue()
+selected_job = jobs.sync(job_queue)
 
 # Sidebar
 with st.sidebar:
@@ -104,6 +125,8 @@ with st.sidebar:
     nav_options = {
         "Dashboard": "📊 Dashboard",
         "Detailed Analysis": "🔍 Detailed Analysis",
+        "Portfolio": "🗂️ Portfolio",
+        "Clause Search": "🔎 Clause Search",
         "Standardized Templates": "📝 Templates"
     }
     
@@ -112,49 +135,69 @@ with st.sidebar:
     
     st.divider()
     
-    uploaded_file = st.file_uploader("Upload Contract", type=["pdf", "docx", "txt"])
+    uploaded_files = st.file_uploader("Upload Contract", type=["pdf", "docx", "txt"], accept_multiple_files=True)
     
-    if uploaded_file and st.button("Analyze Contract", type="primary"):
-        with st.spinner("Reading & Analyzing with Claude 3 Haiku..."):
-            
-            # Cache the engine resource to load spacy model only once
-            @st.cache_resource
-            def get_engine():
-                return NLPEngine()
-                
-            engine = get_engine()
-            
-            # 1. Extract
-            text = engine.extract_text(uploaded_file)
-            st.session_state["text"] = text
-            
-            # 2. Analyze
-            raw_analysis = engine.analyze_clause_risks(text)
-            
-            # Parse JSON safely
-            try:
-                # LLM helper sometimes returns text around JSON
-                cleaned_json = raw_analysis.strip()
-                # Try finding the first { and last }
-                if "{" in cleaned_json and "}" in cleaned_json:
-                    start_idx = cleaned_json.find("{")
-                    end_idx = cleaned_json.rfind("}") + 1
-                    cleaned_json = cleaned_json[start_idx:end_idx]
-                
-                analysis_data = json.loads(cleaned_json)
-                st.session_state["analysis"] = analysis_data
-                st.success("Analysis Complete!")
-            except Exception as e:
-                st.error(f"Analysis Parsing Error: {str(e)}")
-                # Fallback for demo but keeping the error visible for debugging if needed
-                st.session_state["analysis"] = {
-                    "summary": "The AI analyzed the file but the output format was complex. Risks were detected.",
-                    "risk_score": 60,
-                    "clauses": []
-                }
+    if uploaded_files and st.button("Analyze Contract", type="primary"):
+        # Each upload becomes a job; the page stays responsive while workers extract, analyze and score.
+        # A single re-upload of the contract on screen only re-analyzes the clauses that changed.
+        previous = get_document_store().json(st.session_state["analysis_id"]) if len(uploaded_files) == 1 else None
+        for uploaded_file in uploaded_files:
+            job_id = job_queue.submit(uploaded_file.name, uploaded_file.getvalue(),
+                                      session=st.session_state["session_id"], previous=previous)
+        # Follow the last submitted job in the main area
+        st.session_state["job_id"] = job_id
+        st.rerun()
+
+    jobs.show(job_queue, st.session_state["session_id"])
+    if selected_job is not None and selected_job["status"] == "done" and st.session_state["analysis_id"]:
+        cache_stats = get_engine().cache.stats()
+        st.caption(f"Analysis cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+
+    # Startup Report: import and model-load durations for this server process
+    with st.expander("⏱️ Startup Report"):
+        profile = startup_profile.report()
+        if profile["events"]:
+            st.dataframe(profile["events"], hide_index=True, use_container_width=True)
+        st.caption(f"Load time: {profile['total_seconds']}s · Process uptime: {profile['uptime_seconds']}s")
+
+    # Performance: per-stage spans of the last analysis and latency/cost across recent ones
+    # (hide with LEGISLENS_PERF_PANEL=0)
+    if os.getenv("LEGISLENS_PERF_PANEL", "1") != "0":
+        with st.expander("📈 Performance"):
+            tracer = tracing.get_tracer()
+            last = tracer.last_trace("analyze_contract")
+            if last:
+                root = last[0]
+                st.caption(f"Last analysis: {root['duration_s']:.2f}s · "
+                           f"{root.get('input_tokens', 0)} in / {root.get('output_tokens', 0)} out tokens · "
+                           f"~${root.get('cost_usd', 0):.4f}")
+                st.dataframe(
+                    [{"stage": "  " * s["depth"] + s["name"], "ms": round(s["duration_s"] * 1000, 1),
+                      "tokens": s.get("input_tokens", 0) + s.get("output_tokens", 0),
+                      "cache": {True: "hit", False: "miss"}.get(s.get("cache_hit"), "")} for s in last],
+                    hide_index=True, use_container_width=True,
+                )
+            summary = tracer.stage_summary()
+            if summary:
+                st.dataframe(summary, hide_index=True, use_container_width=True)
+                st.download_button("Download traces (JSONL)", tracer.jsonl(), "legislens_traces.jsonl")
+                st.download_button("Download metrics (Prometheus)", tracer.prometheus(), "legislens_metrics.prom")
+            else:
+                st.caption("No traced stages yet.")
 
 # Main Content
-if st.session_state["text"] == "":
+if selected_job is not None and selected_job["status"] == "error":
+    st.error(f"Analysis Error: {selected_job['error']}")
+
+if jobs.is_active(selected_job):
+    # Live progress of the followed job; the pages come back once it has finished
+    jobs.show_progress(job_queue, selected_job["id"])
+elif st.session_state["page"] == "Portfolio":
+    # Works across every finished analysis, so it does not need a contract on screen
+    portfolio.show(job_queue, st.session_state["session_id"])
+elif st.session_state["page"] == "Clause Search":
+    search.show(job_queue, st.session_state["session_id"])
+elif st.session_state["doc_id"] is None:
     st.markdown(f"# Welcome to LegisLens")
     st.markdown("### Your AI Legal Companion")
     
@@ -198,8 +241,8 @@ if st.session_state["text"] == "":
 
 else:
     if st.session_state["page"] == "Dashboard":
-        dashboard.show(st.session_state["text"], st.session_state["analysis"])
+        dashboard.show(st.session_state["doc_id"], st.session_state["analysis_id"])
     elif st.session_state["page"] == "Detailed Analysis":
-        analysis.show(st.session_state["analysis"])
+        analysis.show(st.session_state["analysis_id"])
     elif st.session_state["page"] == "Standardized Templates":
         templates.show()
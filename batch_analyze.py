@@ -0,0 +1,52 @@
+"""
+Headless batch analysis for whole folders of contracts.
+
+Usage:
+    python batch_analyze.py contracts/ --output results.jsonl --workers 4 --rpm 50
+    python batch_analyze.py --manifest vendor_agreements.txt --output results.jsonl
+
+Re-running with the same --output resumes: documents already analyzed successfully are skipped.
+"""
+import argparse
+import json
+import sys
+from utils.nlp_engine import NLPEngine
+from utils.batch_runner import BatchRunner, discover_documents
+from utils.llm_gateway import LLMGateway
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a folder of contracts and write one JSONL record per contract.")
+    parser.add_argument("directory", nargs="?", help="Folder to scan recursively for PDF/DOCX/TXT files")
+    parser.add_argument("--manifest", help="Text file with one contract path per line")
+    parser.add_argument("--output", default="batch_results.jsonl", help="JSONL output (also used as the resume checkpoint)")
+    parser.add_argument("--workers", type=int, default=4, help="Documents processed concurrently")
+    parser.add_argument("--rpm", type=int, default=50, help="Max Claude requests per minute (0 = unlimited)")
+    parser.add_argument("--tpm", type=int, default=50000, help="Max Claude input tokens per minute (0 = unlimited)")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk analysis cache")
+    args = parser.parse_args(argv)
+
+    if not args.directory and not args.manifest:
+        parser.error("give a directory and/or --manifest")
+
+    paths = discover_documents(args.directory, args.manifest)
+    if not paths:
+        print("No PDF/DOCX/TXT files found.")
+        return 1
+
+    gateway = LLMGateway(requests_per_minute=args.rpm, tokens_per_minute=args.tpm, max_concurrency=args.workers)
+    engine = NLPEngine(use_cache=not args.no_cache, gateway=gateway)
+    if not engine.client:
+        print("ANTHROPIC_API_KEY is not set.")
+        return 1
+
+    runner = BatchRunner(engine, args.output, workers=args.workers)
+    summary = runner.run(paths)
+
+    print("\nThroughput summary")
+    print(json.dumps(summary, indent=2))
+    return 0 if summary["failed"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
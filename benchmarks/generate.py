@@ -0,0 +1,177 @@
+"""
+Synthetic contract generator for benchmarks.
+
+Builds English or Hindi contracts of any length (1-500+ pages) by reshuffling and
+renumbering the sections of the sample contracts shipped with the repo, then writes
+them as TXT, DOCX or PDF.
+
+Usage:
+    python -m benchmarks.generate --pages 100 --language hi --formats txt docx --out bench_docs/
+"""
+import os
+import re
+import random
+import argparse
+from utils.clause_segmenter import segment_clauses
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES = {
+    "en": ["sample_contract.txt", "medium_risk_contract.txt"],
+    "hi": ["किराया समझौता.txt"],
+}
+TITLES = {"en": "SYNTHETIC SERVICE AGREEMENT", "hi": "कृत्रिम सेवा समझौता"}
+CHARS_PER_PAGE = 2200
+FORMATS = ("txt", "docx", "pdf")
+
+_NUMBER_RE = re.compile(r"^\s*(?:clause|section|article)?\s*[0-9०-९.]+[.):]?\s*", re.IGNORECASE)
+
+_PDF_LINE_CHARS = 100
+_PDF_LINES_PER_PAGE = 72
+
+
+def load_sections(language):
+    """(title, body) pairs from the numbered sections of the sample contracts."""
+    sections = []
+    for name in SAMPLES[language]:
+        with open(os.path.join(ROOT, name), encoding="utf-8") as f:
+            text = f.read()
+        by_heading = {}
+        for span in segment_clauses(text):
+            if span.heading:
+                by_heading.setdefault(span.heading, []).append(span)
+        for heading, spans in by_heading.items():
+            body = text[spans[0].start:spans[-1].end]
+            body = body.split("\n", 1)[1].strip() if "\n" in body else ""
+            if body:
+                sections.append((_NUMBER_RE.sub("", heading), body))
+    return sections
+
+
+def generate_pages(pages, language="en", seed=0):
+    """Returns a list of page texts (each roughly CHARS_PER_PAGE long) with numbered sections and page footers."""
+    sections = load_sections(language)
+    rng = random.Random(seed)
+    order = []
+    result = []
+    number = 1
+    for page in range(1, pages + 1):
+        lines = [TITLES[language], ""] if page == 1 else []
+        size = 0
+        while size < CHARS_PER_PAGE:
+            if not order:
+                order = sections[:]
+                rng.shuffle(order)
+            title, body = order.pop()
+            lines += [f"{number}. {title}", body, ""]
+            size += len(title) + len(body)
+            number += 1
+        lines.append(f"Page {page} of {pages}")
+        result.append("\n".join(lines))
+    return result
+
+
+def write_txt(page_texts, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n\n".join(page_texts))
+
+
+def write_docx(page_texts, path):
+    import docx  # python-docx, only needed to generate benchmark input
+    document = docx.Document()
+    for i, page in enumerate(page_texts):
+        for para in page.split("\n"):
+            document.add_paragraph(para)
+        if i + 1 < len(page_texts):
+            document.add_page_break()
+    document.save(path)
+
+
+def _pdf_escape(line):
+    line = line.encode("latin-1", errors="replace").decode("latin-1")
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _pdf_lines(page_text):
+    lines = []
+    for para in page_text.split("\n"):
+        while len(para) > _PDF_LINE_CHARS:
+            cut = para.rfind(" ", 0, _PDF_LINE_CHARS)
+            cut = cut if cut > 0 else _PDF_LINE_CHARS
+            lines.append(para[:cut])
+            para = para[cut:].lstrip()
+        lines.append(para)
+    return lines
+
+
+def write_pdf(page_texts, path):
+    """Hand-written minimal PDF (Helvetica, one content stream per page); no PDF library needed."""
+    lines = []
+    for page in page_texts:
+        lines_on_page = _pdf_lines(page)
+        # Overflowing pages continue on extra physical pages
+        for start in range(0, len(lines_on_page), _PDF_LINES_PER_PAGE):
+            lines.append(lines_on_page[start:start + _PDF_LINES_PER_PAGE])
+
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>", 3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids = []
+    for i, page_lines in enumerate(lines):
+        page_id, content_id = 4 + 2 * i, 5 + 2 * i
+        kids.append(f"{page_id} 0 R")
+        ops = ["BT", "/F1 9 Tf", "10 TL", "50 760 Td"] + [f"({_pdf_escape(line)}) Tj T*" for line in page_lines] + ["ET"]
+        stream = "\n".join(ops).encode("latin-1")
+        objects[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>").encode("latin-1")
+        objects[content_id] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode("latin-1")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += b"%d 0 obj\n" % obj_id + objects[obj_id] + b"\nendobj\n"
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for obj_id in sorted(objects):
+        out += b"%010d 00000 n \n" % offsets[obj_id]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_at)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+WRITERS = {"txt": write_txt, "docx": write_docx, "pdf": write_pdf}
+
+
+def supported_formats(language, formats=FORMATS):
+    # The built-in PDF fonts only cover Latin-1, so PDF output is limited to English
+    return [fmt for fmt in formats if fmt != "pdf" or language == "en"]
+
+
+def generate_documents(out_dir, pages, language="en", formats=FORMATS, seed=0):
+    """Writes one contract per format and returns {format: path}."""
+    os.makedirs(out_dir, exist_ok=True)
+    page_texts = generate_pages(pages, language, seed)
+    paths = {}
+    for fmt in supported_formats(language, formats):
+        path = os.path.join(out_dir, f"contract_{language}_{pages}p.{fmt}")
+        WRITERS[fmt](page_texts, path)
+        paths[fmt] = path
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic contracts for benchmarking.")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--language", choices=sorted(SAMPLES), default="en")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--out", default="bench_docs")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if "pdf" in args.formats and args.language != "en":
+        print("PDF output uses a Latin-1 font; skipping PDF for Hindi.")
+    for pages in args.pages:
+        for fmt, path in generate_documents(args.out, pages, args.language, args.formats, args.seed).items():
+            print(f"{fmt}: {path} ({os.path.getsize(path) // 1024} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""
+Load test: N simulated users driving app.py concurrently in one process.
+
+Each user repeats the flow open -> upload & analyze -> dashboard -> detailed analysis ->
+negotiate -> template through Streamlit's AppTest, against the offline LLM backend with a
+simulated generation speed. Sample contracts get a unique reference line per session, so
+every analysis does real work. For each concurrency level this reports throughput, latency
+percentiles per step and the process RSS (sampled while the level runs).
+
+Usage:
+    python -m benchmarks.load_test --concurrency 1 4 8 16
+    python -m benchmarks.load_test --concurrency 1 4 8 --save-baseline benchmarks/load_baseline.json
+    python -m benchmarks.load_test --concurrency 1 4 8 --compare benchmarks/load_baseline.json   # exit code 1 on regressions
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import platform
+import argparse
+import tempfile
+import threading
+import numpy as np
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+SAMPLE_CONTRACTS = ("sample_contract.txt", "medium_risk_contract.txt", "किराया समझौता.txt")
+DEFAULT_OUTPUT = os.path.join("benchmarks", "results", "load_latest.json")
+
+STEPS = ("open", "analyze", "dashboard", "detailed_analysis", "negotiate", "template")
+# Changes below these are too noisy to flag
+MIN_SECONDS = 0.05
+MIN_RSS_MB = 25.0
+
+
+def rss_mb():
+    """Current resident set size of this process (Linux /proc; peak RSS elsewhere)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+class RssSampler:
+    """Samples RSS on a background thread; `peak` is the highest value seen."""
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak = rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mb())
+
+
+def load_contracts():
+    contracts = []
+    for name in SAMPLE_CONTRACTS:
+        with open(os.path.join(ROOT, name), encoding="utf-8") as f:
+            contracts.append((name, f.read()))
+    return contracts
+
+
+def _widget(widgets, label):
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    raise LookupError(f"No widget labelled {label!r}")
+
+
+def share_test_runtime():
+    """
+    AppTest is built for one session at a time: each run installs a mock Runtime and the
+    global.appTest option, then clears both. With sessions running concurrently, one run's
+    cleanup would pull them from under the others, so keep them set for the whole load test.
+    """
+    from streamlit import config
+    from streamlit.runtime.runtime import Runtime
+
+    config.set_option("global.appTest", True)
+    last = {}
+
+    def instance(cls):
+        if cls._instance is not None:
+            last["runtime"] = cls._instance
+            return cls._instance
+        if "runtime" in last:
+            return last["runtime"]
+        raise RuntimeError("Runtime hasn't been created!")
+    Runtime.instance = classmethod(instance)
+
+
+def run_flow(job_queue, contract, timeout):
+    """One user session through every page. Returns {step: seconds}; raises on the first failure."""
+    from streamlit.testing.v1 import AppTest
+
+    session_id = uuid.uuid4().hex[:12]
+    name, text = contract
+    timings = {}
+
+    def step(name, action):
+        started = time.perf_counter()
+        at = action()
+        timings[name] = time.perf_counter() - started
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].message}")
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.query_params["session"] = session_id
+    step("open", at.run)
+
+    def analyze():
+        # What the "Analyze Contract" button does for one upload, then the rerun that loads the result
+        data = f"Reference: LT-{session_id}\n\n{text}".encode("utf-8")
+        job_id = job_queue.submit(name, data, session=session_id)
+        deadline = time.monotonic() + timeout
+        while job_queue.get(job_id)["status"] in ("queued", "running"):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"analysis of {name} did not finish in {timeout}s")
+            time.sleep(0.05)
+        job = job_queue.get(job_id)
+        if job["status"] != "done":
+            raise RuntimeError(f"analyze: {job['error']}")
+        at.session_state["job_id"] = job_id
+        return at.run()
+    step("analyze", analyze)
+
+    step("dashboard", lambda: at.sidebar.radio[0].set_value("Dashboard").run())
+    step("detailed_analysis", lambda: at.sidebar.radio[0].set_value("Detailed Analysis").run())
+
+    negotiate = [button for button in at.button if (button.key or "").startswith("btn_")]
+
+    def negotiate_draft():
+        # The draft streams in the background; AppTest does not run the polling fragment,
+        # so rerun the page until the finished draft is shown
+        negotiate[0].click().run()
+        deadline = time.monotonic() + timeout
+        while not any(area.label == "Draft Email" for area in at.text_area) and not at.exception:
+            failed = [e.value for e in at.error if e.value.startswith("Could not draft email")]
+            if failed:
+                raise RuntimeError(f"negotiate: {failed[0]}")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"negotiation draft did not finish in {timeout}s")
+            time.sleep(0.05)
+            at.run()
+        return at
+    if negotiate:
+        step("negotiate", negotiate_draft)
+
+    def template():
+        at.sidebar.radio[0].set_value("Standardized Templates").run()
+        _widget(at.text_input, "Party A Name (Employer/Landlord)").set_value("Acme Traders Pvt Ltd")
+        _widget(at.text_input, "Party B Name (Employee/Tenant)").set_value(f"User {session_id}")
+        return _widget(at.button, "Generate Contract Draft").click().run()
+    step("template", template)
+    return timings
+
+
+def run_level(job_queue, contracts, users, flows, timeout):
+    """`users` threads each run `flows` sessions back to back. Returns this level's metrics."""
+    timings = {step: [] for step in STEPS}
+    flow_seconds = []
+    errors = []
+    lock = threading.Lock()
+
+    def user(index):
+        for n in range(flows):
+            contract = contracts[(index + n) % len(contracts)]
+            started = time.perf_counter()
+            try:
+                result = run_flow(job_queue, contract, timeout)
+            except Exception as e:
+                with lock:
+                    errors.append(f"{type(e).__name__}: {e}")
+                continue
+            with lock:
+                flow_seconds.append(time.perf_counter() - started)
+                for step, seconds in result.items():
+                    timings[step].append(seconds)
+
+    rss_before = rss_mb()
+    with RssSampler() as sampler:
+        started = time.perf_counter()
+        threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(users)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+    return {
+        "users": users,
+        "flows": len(flow_seconds),
+        "errors": len(errors),
+        "error_samples": errors[:3],
+        "wall_s": round(wall, 3),
+        "throughput_flows_per_s": round(len(flow_seconds) / wall, 3) if wall else 0.0,
+        "flow": _percentiles(flow_seconds),
+        "steps": {step: _percentiles(values) for step, values in timings.items() if values},
+        "rss_start_mb": round(rss_before, 1),
+        "rss_peak_mb": round(sampler.peak, 1),
+        "rss_end_mb": round(rss_mb(), 1),
+    }
+
+
+def _percentiles(values):
+    if not values:
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"count": len(values), "p50": round(float(p50), 4), "p95": round(float(p95), 4),
+            "p99": round(float(p99), 4), "max": round(float(max(values)), 4)}
+
+
+def _configure(workdir, args):
+    """Points every store at a scratch directory and selects the offline LLM backend."""
+    os.environ.update({
+        "LEGISLENS_LLM_BACKEND": "fake",
+        "LEGISLENS_FAKE_FIRST_TOKEN_S": str(args.first_token_s),
+        "LEGISLENS_FAKE_TOKENS_PER_SEC": str(args.tokens_per_sec),
+        "LEGISLENS_JOBS_PATH": os.path.join(workdir, "jobs.sqlite3"),
+        "LEGISLENS_DOCSTORE_DIR": os.path.join(workdir, "documents"),
+        "LEGISLENS_SEARCH_PATH": os.path.join(workdir, "clause_search.sqlite3"),
+        "LEGISLENS_CACHE_PATH": os.path.join(workdir, "cache.sqlite3"),
+        "LEGISLENS_CLAUSE_INDEX_PATH": os.path.join(workdir, "clause_index.sqlite3"),
+    })
+    if args.job_workers:
+        os.environ["LEGISLENS_JOB_WORKERS"] = str(args.job_workers)
+    if not args.with_caches:
+        # Measure the work itself, not cross-session reuse of verdicts and drafts
+        os.environ["LEGISLENS_DISABLE_CACHE"] = "1"
+        os.environ["LEGISLENS_CLAUSE_INDEX"] = "0"
+    else:
+        os.environ["LEGISLENS_CLAUSE_INDEX"] = "1"
+
+
+def run(concurrency, flows, args):
+    with tempfile.TemporaryDirectory() as workdir:
+        _configure(workdir, args)
+        # Imported after _configure: the registry reads the environment when it builds things
+        from utils.engine_registry import get_job_queue
+        from streamlit import config, logger
+        # Deprecation notices would be logged on every rerun of every session
+        config.set_option("logger.level", "error")
+        logger.set_log_level("error")
+        share_test_runtime()
+
+        contracts = load_contracts()
+        started = time.perf_counter()
+        job_queue = get_job_queue()
+        # One untimed session loads the app modules and the engine
+        run_flow(job_queue, contracts[0], args.timeout)
+        warmup = time.perf_counter() - started
+
+        levels = {}
+        for users in concurrency:
+            level = run_level(job_queue, contracts, users, flows, args.timeout)
+            levels[str(users)] = level
+            print(_format_level(level), flush=True)
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "flows_per_user": flows,
+            "job_workers": job_queue.workers,
+            "first_token_s": args.first_token_s,
+            "tokens_per_sec": args.tokens_per_sec,
+            "with_caches": args.with_caches,
+            "warmup_s": round(warmup, 3),
+        },
+        "levels": levels,
+    }
+
+
+def _format_level(level):
+    steps = "  ".join(f"{step} {m['p50']:.2f}/{m['p95']:.2f}s" for step, m in level["steps"].items())
+    return (f"users={level['users']:<3} flows={level['flows']:<4} errors={level['errors']:<3} "
+            f"{level['throughput_flows_per_s']:>6.2f} flows/s  RSS peak {level['rss_peak_mb']:>7.1f} MB  "
+            f"p50/p95: {steps}")
+
+
+def compare(current, baseline, threshold=0.25):
+    """
+    Lists regressions of `current` against `baseline` (both as produced by run()), per
+    concurrency level: lower throughput, slower p95 of any step, higher peak RSS (each beyond
+    `threshold`, fractional, and the noise floor) or new errors.
+    """
+    regressions = []
+    for users, base in baseline["levels"].items():
+        now = current["levels"].get(users)
+        if now is None:
+            continue
+        name = f"{users} users"
+        if now["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {base['errors']} -> {now['errors']}")
+        if now["throughput_flows_per_s"] < base["throughput_flows_per_s"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {base['throughput_flows_per_s']:.2f} -> "
+                               f"{now['throughput_flows_per_s']:.2f} flows/s")
+        for step, base_step in base["steps"].items():
+            now_step = now["steps"].get(step)
+            if not now_step or not now_step["count"] or not base_step["count"]:
+                continue
+            if now_step["p95"] > base_step["p95"] * (1 + threshold) and now_step["p95"] - base_step["p95"] > MIN_SECONDS:
+                regressions.append(f"{name}: {step} p95 {base_step['p95']:.3f}s -> {now_step['p95']:.3f}s")
+        if now["rss_peak_mb"] > base["rss_peak_mb"] * (1 + threshold) and now["rss_peak_mb"] - base["rss_peak_mb"] > MIN_RSS_MB:
+            regressions.append(f"{name}: peak RSS {base['rss_peak_mb']:.0f} MB -> {now['rss_peak_mb']:.0f} MB")
+    return regressions
+
+
+def _save(report, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test app.py with concurrent simulated sessions.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8], help="Simultaneous users per level")
+    parser.add_argument("--flows", type=int, default=2, help="Sessions each user runs back to back")
+    parser.add_argument("--first-token-s", type=float, default=0.2, help="Simulated LLM time to first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=400, help="Simulated LLM generation speed (0 = instant)")
+    parser.add_argument("--job-workers", type=int, help="Analysis worker threads (default: LEGISLENS_JOB_WORKERS)")
+    parser.add_argument("--with-caches", action="store_true", help="Keep the result cache and clause library on")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds before a step counts as failed")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write this run's results")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Also save this run as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed change before flagging (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    report = run(args.concurrency, args.flows, args)
+    _save(report, args.output)
+    if args.save_baseline:
+        _save(report, args.save_baseline)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for line in regressions:
+                print("  " + line)
+            return 1
+        print(f"\nNo regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Benchmark suite: time and peak memory per stage on synthetic contracts.
+
+Stages: extract_txt / extract_docx / extract_pdf (NLPEngine.extract_text), extract_entities,
+risk_scores (RiskCalculator.calculate_risk_scores), radar_data and analysis (the full
+analyze_clause_risks path against the offline LLM backend, cache disabled).
+
+Usage:
+    python -m benchmarks.run --pages 1 10 100 --languages en hi
+    python -m benchmarks.run --pages 1 10 100 --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --pages 1 10 100 --compare benchmarks/baseline.json   # exit code 1 on regressions
+"""
+import io
+import gc
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+from datetime import datetime, timezone
+from benchmarks.generate import FORMATS, generate_documents
+from utils.llm_gateway import LLMGateway
+from utils.nlp_engine import NLPEngine
+from utils.risk_calculator import RiskCalculator
+
+DEFAULT_OUTPUT = os.path.join("benchmarks", "results", "latest.json")
+# Timings below this are too noisy to flag
+MIN_SECONDS = 0.005
+MIN_PEAK_MB = 1.0
+
+
+class NamedBytesIO(io.BytesIO):
+    """Stands in for a Streamlit upload: bytes plus a file name."""
+
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+def measure(fn, repeat=3):
+    """Best wall time over `repeat` runs, then one extra run under tracemalloc for peak memory."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, {"seconds": round(best, 6), "peak_mb": round(peak / 2 ** 20, 3)}
+
+
+def run_case(engine, calculator, paths, repeat):
+    """Runs every stage for one generated document (all formats). Returns {stage: metrics}."""
+    results = {}
+    text = None
+    for fmt, path in paths.items():
+        with open(path, "rb") as f:
+            data = f.read()
+        extracted, metrics = measure(lambda: engine.extract_text(NamedBytesIO(data, os.path.basename(path))), repeat)
+        metrics.update(bytes=len(data), chars=len(extracted))
+        results[f"extract_{fmt}"] = metrics
+        # Later stages run on the TXT extraction, or on the first format run without TXT
+        if text is None or fmt == "txt":
+            text = extracted
+
+    stages = [
+        ("extract_entities", lambda: engine.extract_entities(text)),
+        ("risk_scores", lambda: calculator.calculate_risk_scores(text)),
+    ]
+    for stage, fn in stages:
+        results[stage] = _guarded(fn, repeat)
+    scores = calculator.calculate_risk_scores(text)
+    results["radar_data"] = _guarded(lambda: calculator.get_radar_data(scores), repeat)
+    # One repeat: the analysis path already runs every stage above internally
+    results["analysis"] = _guarded(lambda: engine.analyze_clause_risks(text), 1)
+    return results
+
+
+def _guarded(fn, repeat):
+    try:
+        return measure(fn, repeat)[1]
+    except Exception as e:
+        # A stage failing at some size is itself a benchmark result (e.g. spaCy's max_length)
+        return {"error": f"{type(e).__name__}: {e}"}
+
+
+def run(pages_list, languages, formats, repeat=3, workdir=None):
+    gateway = LLMGateway(requests_per_minute=0, tokens_per_minute=0, backend="fake")
+    engine = NLPEngine(use_cache=False, gateway=gateway)
+    calculator = RiskCalculator()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for language in languages:
+            for pages in pages_list:
+                paths = generate_documents(workdir or tmp, pages, language, formats)
+                for stage, metrics in run_case(engine, calculator, paths, repeat).items():
+                    name = f"{language}/{pages}p/{stage}"
+                    results[name] = metrics
+                    print(_format_row(name, metrics), flush=True)
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def _format_row(name, metrics):
+    if "error" in metrics:
+        return f"{name:<32} ERROR {metrics['error'][:80]}"
+    return f"{name:<32} {metrics['seconds'] * 1000:>10.1f} ms {metrics['peak_mb']:>9.1f} MB"
+
+
+def compare(current, baseline, threshold=0.25):
+    """
+    Lists regressions of `current` against `baseline` (both as produced by run()).
+    A stage regresses when its time or peak memory grows by more than `threshold`
+    (fractional), ignoring changes below the noise floor, or when it starts failing.
+    """
+    regressions = []
+    for name, base in baseline["results"].items():
+        now = current["results"].get(name)
+        if now is None:
+            continue
+        if "error" in now and "error" not in base:
+            regressions.append(f"{name}: now fails ({now['error']})")
+            continue
+        if "error" in now or "error" in base:
+            continue
+        for field, floor, unit in (("seconds", MIN_SECONDS, "s"), ("peak_mb", MIN_PEAK_MB, "MB")):
+            if now[field] > base[field] * (1 + threshold) and now[field] - base[field] > floor:
+                change = (now[field] / base[field] - 1) * 100 if base[field] else float("inf")
+                regressions.append(f"{name}: {field} {base[field]:.3f}{unit} -> {now[field]:.3f}{unit} (+{change:.0f}%)")
+    return regressions
+
+
+def _save(report, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark LegisLens stages on synthetic contracts.")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--languages", nargs="+", choices=["en", "hi"], default=["en", "hi"])
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (best is kept)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write this run's results")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Also save this run as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed growth before flagging (0.25 = 25%%)")
+    parser.add_argument("--keep-docs", metavar="DIR", help="Keep the generated contracts in DIR")
+    args = parser.parse_args(argv)
+
+    report = run(args.pages, args.languages, args.formats, args.repeat, args.keep_docs)
+    _save(report, args.output)
+    if args.save_baseline:
+        _save(report, args.save_baseline)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for line in regressions:
+                print("  " + line)
+            return 1
+        print(f"\nNo regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,18 @@
+from utils.keyword_scanner import KeywordScanner
+
+INDICATORS = {
+    "Termination": ["immediate effect", "terminate"],
+    "Liability": ["costs", "loss"],
+}
+
+
+def test_matches_whose_lowercase_differs_from_the_keyword():
+    # "İ".lower() is "i̇" and "ſ".lower() is "ſ": neither equals the stored keyword text
+    result = KeywordScanner(INDICATORS).scan("İmmediate effect. The Vendor bears all coſts and loſs.")
+    assert result.counts == {"Termination": 1, "Liability": 2}
+    assert [m.keyword for m in result.matches] == ["immediate effect", "costs", "loss"]
+
+
+def test_whole_words_and_suffixes():
+    counts = KeywordScanner(INDICATORS).count("Either party may terminate; the costume costs nothing. Terminated.")
+    assert counts == {"Termination": 2, "Liability": 1}
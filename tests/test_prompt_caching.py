@@ -0,0 +1,33 @@
+import json
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("numpy")
+
+from utils.fake_anthropic import FakeAnthropic
+from utils.llm_gateway import LLMGateway
+from utils.nlp_engine import NLPEngine
+
+CONTRACT = """1. Termination
+The Client may terminate this Agreement at any time with immediate effect without assigning any reason.
+
+2. Payment
+Invoices are payable within thirty days of receipt by bank transfer to the account of the Vendor."""
+
+
+def test_analysis_system_prompt_is_sent_cacheable():
+    requests = []
+
+    def responder(request):
+        requests.append(request)
+        return json.dumps({"summary": "ok", "risk_score": 80, "missing_clauses": [], "clauses": [
+            {"clause_id": "C2", "explanation": "One-sided termination.", "risk_level": "High", "type": "Termination"}]})
+
+    gateway = LLMGateway(api_key="test", requests_per_minute=0, tokens_per_minute=0,
+                         client=FakeAnthropic(responder=responder))
+    engine = NLPEngine(use_cache=False, gateway=gateway, hindi_screening=False)
+    assert "error" not in json.loads(engine.analyze_clause_risks(CONTRACT))
+
+    system = requests[0]["system"]
+    assert isinstance(system, list)
+    assert system[-1]["cache_control"] == {"type": "ephemeral"}
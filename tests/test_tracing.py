@@ -0,0 +1,33 @@
+import contextvars
+from utils.fake_anthropic import FakeAnthropic
+from utils.llm_gateway import LLMGateway
+from utils.tracing import current_span, span, stream_span
+
+
+def _gateway():
+    return LLMGateway(api_key="test", requests_per_minute=0, tokens_per_minute=0,
+                      client=FakeAnthropic(responder=lambda request: "Dear Sir/Madam, please reconsider."))
+
+
+def test_consumer_spans_are_not_nested_under_a_suspended_stream():
+    with span("job") as job:
+        stream = _gateway().stream(model="claude-3-haiku-20240307", max_tokens=50,
+                                   messages=[{"role": "user", "content": "Draft"}])
+        parents = []
+        for _ in stream:
+            assert current_span() is job
+            with span("ui_update") as update:
+                parents.append(update.parent)
+    assert parents and all(parent is job for parent in parents)
+    names = [s.name for s in job.finished]
+    assert "llm.stream" in names and job.attrs["llm_calls"] == 1
+
+
+def test_stream_closed_from_another_context():
+    def numbers(stage):
+        yield from range(3)
+
+    stream = stream_span("numbers", numbers)
+    assert next(stream) == 0
+    contextvars.copy_context().run(stream.close)
+    assert current_span() is None
@@ -0,0 +1,118 @@
+import os
+import sys
+import hashlib
+import threading
+from collections import OrderedDict
+from utils.tracing import span
+from utils.clause_segmenter import segment_clauses
+from utils.keyword_scanner import group_matches_by_clause
+
+# Memory for derived artifacts per process (all sessions share them; keys are content hashes)
+DEFAULT_MAX_MB = 32
+
+
+def estimate_size(value, _seen=None):
+    """Approximate memory footprint of a value in bytes (containers and namedtuples are walked)."""
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _seen) for item in value)
+    return size
+
+
+class ArtifactGraph:
+    """
+    Memoized DAG of derived artifacts:
+    - sources are loaded by a content-addressed id (e.g. a DocumentStore id) on every use and
+      not memoized here; the store keeps its own byte-bounded cache of decoded documents
+    - every other node is computed from its dependencies and cached under a key hashed from
+      its name, version and the keys of its inputs, so a node is recomputed only when
+      something upstream really changed
+    - values are shared by all sessions and evicted least recently used first once they
+      take more than `max_bytes`
+    """
+
+    def __init__(self, max_bytes=None):
+        if max_bytes is None:
+            max_bytes = int(os.getenv("LEGISLENS_ARTIFACT_CACHE_MB", str(DEFAULT_MAX_MB))) * 1024 * 1024
+        self.max_bytes = max_bytes
+        # name -> (compute or load, dependencies, version); sources have dependencies None
+        self._nodes = {}
+        # key -> (value, size in bytes)
+        self._values = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def source(self, name, load):
+        """A root artifact: load(id) returns it, and its id is its key."""
+        self._nodes[name] = (load, None, 0)
+
+    def node(self, name, deps, compute, version=1):
+        """A derived artifact: compute(*dependency values). Bump `version` when `compute` changes."""
+        self._nodes[name] = (compute, tuple(deps), version)
+
+    def key(self, name, sources):
+        """Content key of an artifact for the given source ids; computing it loads nothing."""
+        _, deps, version = self._nodes[name]
+        if deps is None:
+            return f"{name}:{sources.get(name)}"
+        parts = [name, str(version)] + [self.key(dep, sources) for dep in deps]
+        return hashlib.blake2b("\x00".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, name, **sources):
+        """
+        The artifact `name` for the given source ids (e.g. text=doc_id, analysis=analysis_id).
+        Only stale nodes on the way are computed; a missing source id gives None.
+        """
+        fn, deps, _ = self._nodes[name]
+        if deps is None:
+            return fn(sources[name]) if sources.get(name) is not None else None
+        key = self.key(name, sources)
+        with self._lock:
+            if key in self._values:
+                self._values.move_to_end(key)
+                self.hits += 1
+                return self._values[key][0]
+            self.misses += 1
+        inputs = [self.get(dep, **sources) for dep in deps]
+        with span("artifact", node=name):
+            value = fn(*inputs)
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._values or size > self.max_bytes:
+                return value
+            self._values[key] = (value, size)
+            self._cached_bytes += size
+            while self._cached_bytes > self.max_bytes:
+                _, (_, dropped) = self._values.popitem(last=False)
+                self._cached_bytes -= dropped
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._values), "bytes": self._cached_bytes, "hits": self.hits, "misses": self.misses}
+
+
+def contract_artifacts(store, calculator):
+    """
+    Artifacts of one analyzed contract, from the DocumentStore ids of its text and analysis:
+    text -> segments, keyword_scan -> keyword_hits; text + analysis -> scores.
+    Views add their own nodes (e.g. figures) on top.
+    """
+    graph = ArtifactGraph()
+    graph.source("text", store.text)
+    graph.source("analysis", store.json)
+    graph.node("segments", ["text"], segment_clauses)
+    graph.node("keyword_scan", ["text"], calculator.scan)
+    graph.node("keyword_hits", ["keyword_scan", "segments"], lambda scan, segments: group_matches_by_clause(scan.matches, segments))
+    graph.node("scores", ["text", "analysis", "keyword_scan"],
+               lambda text, analysis, scan: calculator.calculate_risk_scores(text, analysis, counts=scan.counts))
+    return graph
@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from utils.long_document import parse_analysis_json
+from utils.risk_calculator import RiskCalculator
+from utils.tracing import percentile, span
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+
+def discover_documents(directory=None, manifest=None):
+    """Lists contract files from a directory (recursive) and/or a manifest (one path per line)."""
+    paths = []
+    if manifest:
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    paths.append(line if os.path.isabs(line) else os.path.join(base, line))
+    if directory:
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    paths.append(os.path.join(root, name))
+    return sorted(set(paths))
+
+
+def load_checkpoint(output_path):
+    """Paths already processed successfully in a previous run (the output JSONL is the checkpoint)."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A run killed mid-write can leave a partial last line
+                continue
+            if record.get("status") == "ok":
+                done.add(record["path"])
+    return done
+
+
+class BatchRunner:
+    """
+    Headless pipeline: extract -> analyze -> entities -> keyword scores for many files.
+    Documents are processed on a bounded thread pool (LLM calls are rate limited by the
+    engine's gateway) and every result is appended to a JSONL file so an interrupted
+    run can resume.
+    """
+
+    def __init__(self, engine, output_path, workers=4, log=print):
+        self.engine = engine
+        self.calculator = RiskCalculator()
+        self.output_path = output_path
+        self.workers = workers
+        self.log = log
+        self._write_lock = threading.Lock()
+
+    def process(self, path):
+        """Runs one document through the pipeline and returns its JSONL record."""
+        started = time.perf_counter()
+        record = {"path": path, "status": "ok"}
+        # Each document is its own trace; its tokens and cost are copied into the record
+        with span("batch_document", file_name=os.path.basename(path)) as trace:
+            self._run_pipeline(path, record)
+        record["llm_calls"] = trace.attrs.get("llm_calls", 0)
+        # Actual API usage, from the same span the cost is computed from
+        record["tokens_in"] = trace.attrs.get("input_tokens", 0)
+        record["tokens_out"] = trace.attrs.get("output_tokens", 0)
+        record["cost_usd_est"] = round(trace.attrs.get("cost_usd", 0.0), 6)
+        record["latency_s"] = round(time.perf_counter() - started, 3)
+        return record
+
+    def _run_pipeline(self, path, record):
+        try:
+            with open(path, "rb") as f:
+                record["sha256"] = hashlib.sha256(f.read()).hexdigest()
+                f.seek(0)
+                text = self.engine.extract_text(f)
+            if text.startswith("Error reading file:"):
+                raise ValueError(text)
+
+            raw = self.engine.analyze_clause_risks(text)
+            if isinstance(raw, dict) and "error" in raw:
+                raise RuntimeError(raw["error"])
+            analysis = parse_analysis_json(raw)
+
+            record.update({
+                "chars": len(text),
+                "summary": analysis.get("summary", ""),
+                "risk_score": analysis.get("risk_score"),
+                "clauses": analysis.get("clauses", []),
+                "missing_clauses": analysis.get("missing_clauses", []),
+                "entities": self.engine.extract_entities(text),
+                "category_scores": self.calculator.calculate_risk_scores(text, analysis),
+            })
+        except Exception as e:
+            record["status"] = "error"
+            record["error"] = str(e)
+
+    def _write(self, out, record):
+        with self._write_lock:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+
+    def run(self, paths):
+        """Processes every path not already in the checkpoint and returns a throughput summary."""
+        done = load_checkpoint(self.output_path)
+        todo = [p for p in paths if p not in done]
+        self.log(f"{len(paths)} documents found, {len(done & set(paths))} already done, {len(todo)} to process")
+
+        records = []
+        started = time.perf_counter()
+        with open(self.output_path, "a", encoding="utf-8") as out, \
+                ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # Bounded queue: never more than 2x workers documents in flight
+            pending = set()
+            for path in todo:
+                pending.add(pool.submit(self.process, path))
+                if len(pending) >= self.workers * 2:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        records.append(self._finish(out, future.result(), len(records) + 1, len(todo)))
+            for future in as_completed(pending):
+                records.append(self._finish(out, future.result(), len(records) + 1, len(todo)))
+
+        return self.summarize(records, time.perf_counter() - started)
+
+    def _finish(self, out, record, n, total):
+        self._write(out, record)
+        status = "ok" if record["status"] == "ok" else f"error: {record['error']}"
+        self.log(f"[{n}/{total}] {record['path']} ({record['latency_s']}s) {status}")
+        return record
+
+    def summarize(self, records, elapsed):
+        ok = [r for r in records if r["status"] == "ok"]
+        latencies = [r["latency_s"] for r in records]
+        tokens = [r["tokens_in"] + r["tokens_out"] for r in ok]
+        return {
+            "documents": len(records),
+            "succeeded": len(ok),
+            "failed": len(records) - len(ok),
+            "elapsed_s": round(elapsed, 2),
+            "docs_per_min": round(len(records) / elapsed * 60, 2) if elapsed else 0.0,
+            "tokens_per_doc": round(sum(tokens) / len(tokens)) if tokens else 0,
+            "latency_p50_s": percentile(latencies, 50),
+            "latency_p95_s": percentile(latencies, 95),
+        }
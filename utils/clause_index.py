@@ -0,0 +1,229 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from utils.result_cache import normalize_text
+
+DEFAULT_INDEX_PATH = os.path.join(".cache", "clause_index.sqlite3")
+
+# MinHash signature of 64 values, split into 16 LSH bands of 4 rows. Clauses with a word
+# bigram Jaccard similarity of 0.9 share at least one band with probability ~1.0;
+# candidates are then checked against the similarity threshold on the full signature.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+DEFAULT_THRESHOLD = 0.9
+# Shorter clauses (headings, "Signed:") have too few shingles for a meaningful signature
+MIN_WORDS = 8
+# A near-identical clause with a different number, negation, party or place can mean the
+# opposite ("Tenant shall indemnify Landlord", exclusive courts of Mumbai vs. Singapore);
+# these words must match exactly, in order, for a verdict to be reused
+_GUARD_WORDS = {"not", "no", "nor", "never", "neither", "none", "without", "unlimited", "non",
+                "नहीं", "न", "बिना", "असीमित"}
+_PARTY_WORDS = {"landlord", "tenant", "lessor", "lessee", "licensor", "licensee", "owner", "occupant",
+                "employer", "employee", "company", "vendor", "supplier", "client", "customer", "buyer",
+                "seller", "contractor", "consultant", "freelancer", "service", "provider", "recipient",
+                "discloser", "disclosing", "receiving", "party", "parties", "first", "second",
+                "मकान", "मालिक", "किरायेदार", "किराएदार", "नियोक्ता", "कर्मचारी", "विक्रेता", "ग्राहक", "पक्ष"}
+_PLACE_WORDS = {"india", "indian", "court", "courts", "jurisdiction", "arbitration", "seat", "venue",
+                "न्यायालय", "अदालत", "क्षेत्राधिकार", "मध्यस्थता",
+                "मुंबई", "दिल्ली", "बेंगलुरु", "चेन्नई", "कोलकाता", "हैदराबाद", "पुणे", "अहमदाबाद", "जयपुर", "लखनऊ"}
+
+_WORD_RE = re.compile(r"\w+")
+# Capitalized words after the first word of a sentence: names of parties, cities, countries
+_PROPER_RE = re.compile(r"(?<=[\w,)] )[A-Z]\w+")
+_rng = np.random.RandomState(20240307)
+# Multiply-shift hash family: h(x) = (a * x + b mod 2^64) >> 32, with odd a
+_PERM_A = _rng.randint(1, 2 ** 62, size=NUM_PERM, dtype=np.int64).astype(np.uint64) * np.uint64(2) + np.uint64(1)
+_PERM_B = _rng.randint(0, 2 ** 62, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+
+
+def _hash64(data):
+    return int.from_bytes(hashlib.blake2b(data.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _signed(value):
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def fingerprint(text, shingle=2):
+    """
+    (MinHash signature over word bigrams as a uint32 array, guard key) for a clause, or None
+    for very short text. Bigrams keep word order ("Tenant shall indemnify Landlord").
+    The guard key covers the clause's numbers, negations, party roles and places, in order.
+    """
+    words = _WORD_RE.findall(normalize_text(text))
+    if len(words) < MIN_WORDS:
+        return None
+    shingles = {" ".join(words[i:i + shingle]) for i in range(len(words) - shingle + 1)}
+    hashes = np.fromiter((_hash64(s) for s in shingles), dtype=np.uint64, count=len(shingles))
+    with np.errstate(over="ignore"):
+        permuted = (hashes[:, None] * _PERM_A + _PERM_B) >> np.uint64(32)
+    signature = permuted.min(axis=0).astype(np.uint32)
+    names = {name.lower() for name in _PROPER_RE.findall(text)}
+    guard = [w for w in words if w in _GUARD_WORDS or w in _PARTY_WORDS or w in _PLACE_WORDS or w in names
+             or any(ch.isdigit() for ch in w)]
+    return signature, _signed(_hash64(" ".join(guard)))
+
+
+def band_keys(namespace, signature):
+    """One LSH bucket key per band (the namespace is part of the key)."""
+    return [_signed(_hash64(f"{namespace}:{band}:" + signature[band * ROWS:(band + 1) * ROWS].tobytes().hex()))
+            for band in range(BANDS)]
+
+
+def similarity(signature, other):
+    """Jaccard similarity estimated from two MinHash signatures."""
+    return float(np.mean(signature == other))
+
+
+class ClauseIndex:
+    """
+    Persistent near-duplicate index of clause verdicts (SQLite, MinHash + LSH buckets).
+    Clauses at least `threshold` similar to a stored clause (and with the same numbers and
+    negations, parties and places) reuse its risk_level/type/explanation instead of being
+    sent to Claude again. Off unless LEGISLENS_CLAUSE_INDEX=1: verdicts are shared across
+    every contract and user of this server.
+    Only explicit verdicts are stored.
+    Entries are scoped by `namespace` (model + prompt version), like the analysis cache.
+    """
+
+    def __init__(self, path=None, namespace="default", threshold=None, enabled=True):
+        self.path = path or os.getenv("LEGISLENS_CLAUSE_INDEX_PATH", DEFAULT_INDEX_PATH)
+        self.namespace = namespace
+        if threshold is None:
+            threshold = float(os.getenv("LEGISLENS_CLAUSE_MATCH_THRESHOLD", str(DEFAULT_THRESHOLD)))
+        self.threshold = threshold
+        self.enabled = enabled and os.getenv("LEGISLENS_CLAUSE_INDEX", "0") == "1"
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS clause_entries (
+                    id INTEGER PRIMARY KEY,
+                    namespace TEXT NOT NULL,
+                    guard INTEGER NOT NULL,
+                    signature BLOB NOT NULL,
+                    verdict TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )"""
+            )
+            # One row per (bucket, entry); WITHOUT ROWID keeps the bucket index compact
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS clause_buckets (
+                    key INTEGER NOT NULL,
+                    entry INTEGER NOT NULL,
+                    PRIMARY KEY (key, entry)
+                ) WITHOUT ROWID"""
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _nearest(self, conn, signature, guard, keys):
+        """(similarity, verdict) of the most similar stored clause above the threshold, or None."""
+        rows = conn.execute(
+            f"""SELECT DISTINCT e.signature, e.guard, e.verdict FROM clause_buckets b
+                JOIN clause_entries e ON e.id = b.entry
+                WHERE b.key IN ({",".join("?" * len(keys))})""",
+            keys,
+        ).fetchall()
+        best = None
+        for stored, stored_guard, verdict in rows:
+            if stored_guard != guard:
+                continue
+            score = similarity(signature, np.frombuffer(stored, dtype=np.uint32))
+            if score >= self.threshold and (best is None or score > best[0]):
+                best = (score, verdict)
+        return best
+
+    def lookup(self, clause_texts):
+        """
+        {clause_id: verdict dict} for the clauses that match a stored clause.
+        Clauses without a match are left out.
+        """
+        if not self.enabled:
+            return {}
+        prints = {clause_id: fingerprint(text) for clause_id, text in clause_texts.items()}
+        known = {}
+        with self._lock:
+            conn = self._connect()
+            for clause_id, printed in prints.items():
+                match = None
+                if printed is not None:
+                    signature, guard = printed
+                    match = self._nearest(conn, signature, guard, band_keys(self.namespace, signature))
+                if match is None:
+                    self.misses += 1
+                    continue
+                self.hits += 1
+                known[clause_id] = json.loads(match[1])
+        return known
+
+    def add(self, verdicts):
+        """
+        Stores {clause text: verdict dict}. Clauses with a near-duplicate already stored
+        are skipped, so a bucket holds one representative per cluster of variants.
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            for text, verdict in verdicts.items():
+                printed = fingerprint(text)
+                if printed is None or not verdict:
+                    continue
+                signature, guard = printed
+                keys = band_keys(self.namespace, signature)
+                if self._nearest(conn, signature, guard, keys) is not None:
+                    continue
+                entry = conn.execute(
+                    "INSERT INTO clause_entries (namespace, guard, signature, verdict, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (self.namespace, guard, signature.tobytes(),
+                     json.dumps(verdict, ensure_ascii=False), now),
+                ).lastrowid
+                conn.executemany("INSERT OR IGNORE INTO clause_buckets (key, entry) VALUES (?, ?)",
+                                 [(key, entry) for key in keys])
+            conn.commit()
+
+    def clear(self):
+        """Removes every entry in this namespace."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "DELETE FROM clause_buckets WHERE entry IN (SELECT id FROM clause_entries WHERE namespace = ?)",
+                (self.namespace,),
+            )
+            conn.execute("DELETE FROM clause_entries WHERE namespace = ?", (self.namespace,))
+            conn.commit()
+
+    def stats(self):
+        """Returns hit/miss counters and the number of stored clauses."""
+        entries = 0
+        if self.enabled:
+            with self._lock:
+                entries = self._connect().execute(
+                    "SELECT COUNT(*) FROM clause_entries WHERE namespace = ?", (self.namespace,)
+                ).fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": entries,
+        }
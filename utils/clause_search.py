@@ -0,0 +1,232 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+
+DEFAULT_SEARCH_PATH = os.path.join(".cache", "clause_search.sqlite3")
+
+RISK_LEVELS = ("High", "Medium", "Low")
+# Stored per clause so "riskiest first" can walk an index
+_SEVERITY = {"High": 2, "Medium": 1, "Low": 0}
+# Clause text counts more than Claude's explanation of it when ranking
+_BM25_WEIGHTS = (1.0, 0.3)
+
+_TERM_RE = re.compile(r'"([^"]+)"|(\w+\*?)')
+
+
+def fts_query(query):
+    """
+    Turns a free-text query into an FTS5 expression: words are ANDed, "quoted phrases" match
+    as phrases, OR between terms is kept and a trailing * matches a prefix ("indemnif*").
+    Everything is quoted, so user input can never be an FTS5 syntax error.
+    """
+    terms = []
+    for phrase, word in _TERM_RE.findall(query):
+        if word == "OR":
+            if terms and terms[-1] != "OR":
+                terms.append("OR")
+        elif phrase:
+            words = re.findall(r"\w+", phrase)
+            if words:
+                terms.append('"' + " ".join(words) + '"')
+        elif word.endswith("*"):
+            terms.append(f'"{word[:-1]}"*')
+        else:
+            terms.append(f'"{word}"')
+    if terms and terms[-1] == "OR":
+        terms.pop()
+    return " ".join(terms)
+
+
+def _like_pattern(text):
+    """A LIKE ... ESCAPE '\\' pattern matching `text` literally anywhere in a value."""
+    return "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def _risk_level(value):
+    level = str(value or "").strip().capitalize()
+    return level if level in RISK_LEVELS else "Low"
+
+
+class ClauseSearch:
+    """
+    Persistent full-text index of every analyzed clause (SQLite FTS5, BM25 ranking):
+    - add() (re)indexes one contract's clauses, with their type, risk level and entities
+    - search() combines a text query with filters on type, risk level, entity and session
+    Updating one contract never touches the others, so the index grows as jobs finish.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("LEGISLENS_SEARCH_PATH", DEFAULT_SEARCH_PATH)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                """CREATE TABLE IF NOT EXISTS contracts (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    session TEXT,
+                    risk_score REAL,
+                    indexed_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS clauses (
+                    id INTEGER PRIMARY KEY,
+                    contract_id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    type TEXT NOT NULL,
+                    risk_level TEXT NOT NULL,
+                    severity INTEGER NOT NULL,
+                    text TEXT NOT NULL,
+                    explanation TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_clauses_contract ON clauses(contract_id);
+                CREATE INDEX IF NOT EXISTS idx_clauses_severity ON clauses(severity, id);
+                CREATE INDEX IF NOT EXISTS idx_clauses_type ON clauses(type, severity, id);
+                CREATE TABLE IF NOT EXISTS clause_entities (
+                    clause_id INTEGER NOT NULL,
+                    label TEXT NOT NULL,
+                    value TEXT NOT NULL COLLATE NOCASE
+                );
+                CREATE INDEX IF NOT EXISTS idx_entities_value ON clause_entities(value, label);
+                CREATE INDEX IF NOT EXISTS idx_entities_clause ON clause_entities(clause_id);
+                CREATE VIRTUAL TABLE IF NOT EXISTS clause_fts USING fts5(
+                    text, explanation, content='clauses', content_rowid='id', tokenize='porter unicode61'
+                );
+                -- Keep the external-content FTS table in step with clauses
+                CREATE TRIGGER IF NOT EXISTS clauses_ai AFTER INSERT ON clauses BEGIN
+                    INSERT INTO clause_fts(rowid, text, explanation) VALUES (new.id, new.text, new.explanation);
+                END;
+                CREATE TRIGGER IF NOT EXISTS clauses_ad AFTER DELETE ON clauses BEGIN
+                    INSERT INTO clause_fts(clause_fts, rowid, text, explanation)
+                    VALUES ('delete', old.id, old.text, old.explanation);
+                    DELETE FROM clause_entities WHERE clause_id = old.id;
+                END;"""
+            )
+            self._conn.commit()
+        return self._conn
+
+    def add(self, contract_id, name, analysis, entities=None, session=None):
+        """
+        Indexes the clauses of one analysis, replacing any earlier version of the contract.
+        `entities` is extract_entities() output; each clause is tagged with those it mentions.
+        """
+        entities = entities or {}
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM clauses WHERE contract_id = ?", (contract_id,))
+            conn.execute(
+                "INSERT OR REPLACE INTO contracts (id, name, session, risk_score, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                (contract_id, name, session, analysis.get("risk_score"), time.time()),
+            )
+            for position, clause in enumerate(analysis.get("clauses", [])):
+                text = clause.get("text") or ""
+                risk = _risk_level(clause.get("risk_level"))
+                cursor = conn.execute(
+                    "INSERT INTO clauses (contract_id, position, type, risk_level, severity, text, explanation) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (contract_id, position, str(clause.get("type") or "Standard"), risk, _SEVERITY[risk],
+                     text, clause.get("explanation") or ""),
+                )
+                lowered = text.lower()
+                mentioned = [(cursor.lastrowid, label, value) for label, values in entities.items()
+                             for value in values if value.lower() in lowered]
+                conn.executemany("INSERT INTO clause_entities (clause_id, label, value) VALUES (?, ?, ?)", mentioned)
+            conn.commit()
+
+    def remove(self, contract_id):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM clauses WHERE contract_id = ?", (contract_id,))
+            conn.execute("DELETE FROM contracts WHERE id = ?", (contract_id,))
+            conn.commit()
+
+    def contract_ids(self):
+        with self._lock:
+            return {row[0] for row in self._connect().execute("SELECT id FROM contracts")}
+
+    def search(self, query="", types=None, risk_levels=None, entity=None, session=None, limit=50):
+        """
+        Best-matching clauses, BM25-ranked (without a query: riskiest and most recent first).
+        `entity` keeps clauses mentioning a party, place or date containing that text.
+        Returns dicts with contract, type, risk_level, snippet, explanation and score.
+        """
+        match = fts_query(query) if query else ""
+        where, args = [], []
+        if match:
+            where.append("clause_fts MATCH ?")
+            args.append(match)
+        if types:
+            where.append(f"c.type IN ({', '.join('?' * len(types))})")
+            args.extend(types)
+        if risk_levels:
+            where.append(f"c.severity IN ({', '.join('?' * len(risk_levels))})")
+            args.extend(_SEVERITY[level] for level in risk_levels)
+        if entity:
+            where.append("c.id IN (SELECT clause_id FROM clause_entities WHERE value LIKE ? ESCAPE '\\')")
+            args.append(_like_pattern(entity))
+        if session is not None:
+            where.append("k.session = ?")
+            args.append(session)
+
+        if not match:
+            # Newest clauses have the highest ids, so this walks idx_clauses_severity / idx_clauses_type backwards
+            sql = ("SELECT c.*, k.name AS contract FROM clauses c JOIN contracts k ON k.id = c.contract_id "
+                   + (f"WHERE {' AND '.join(where)} " if where else "")
+                   + "ORDER BY c.severity DESC, c.id DESC LIMIT ?")
+            with self._lock:
+                rows = self._connect().execute(sql, args + [limit]).fetchall()
+            scores, snippets = {}, {}
+        else:
+            # Rank on ids and scores only; snippets are then built for the top `limit` rows alone
+            weights = ", ".join(str(w) for w in _BM25_WEIGHTS)
+            join = " JOIN contracts k ON k.id = c.contract_id" if session is not None else ""
+            ranked_sql = (f"SELECT c.id, bm25(clause_fts, {weights}) AS score "
+                          f"FROM clause_fts JOIN clauses c ON c.id = clause_fts.rowid{join} "
+                          f"WHERE {' AND '.join(where)} ORDER BY score LIMIT ?")
+            with self._lock:
+                conn = self._connect()
+                ranked = conn.execute(ranked_sql, args + [limit]).fetchall()
+                ids = [row["id"] for row in ranked]
+                marks = ", ".join("?" * len(ids))
+                rows = conn.execute(
+                    "SELECT c.*, k.name AS contract, snippet(clause_fts, 0, '**', '**', '…', 32) AS snippet "
+                    "FROM clause_fts JOIN clauses c ON c.id = clause_fts.rowid JOIN contracts k ON k.id = c.contract_id "
+                    f"WHERE clause_fts MATCH ? AND clause_fts.rowid IN ({marks})", [match] + ids).fetchall()
+            scores = {row["id"]: row["score"] for row in ranked}
+            snippets = {row["id"]: row["snippet"] for row in rows}
+            rows.sort(key=lambda row: scores[row["id"]])
+        return [{
+            "contract_id": row["contract_id"],
+            "contract": row["contract"],
+            "clause": row["position"] + 1,
+            "type": row["type"],
+            "risk_level": row["risk_level"],
+            "snippet": snippets.get(row["id"]) or row["text"],
+            "explanation": row["explanation"],
+            # bm25() is lower for better matches; flip it so higher reads as more relevant
+            "score": round(-scores[row["id"]], 3) if row["id"] in scores else None,
+        } for row in rows]
+
+    def facets(self, limit=50):
+        """Most common clause types and the risk levels, for the search filters."""
+        with self._lock:
+            conn = self._connect()
+            types = [row[0] for row in conn.execute(
+                "SELECT type FROM clauses GROUP BY type ORDER BY COUNT(*) DESC LIMIT ?", (limit,))]
+        return {"types": types, "risk_levels": list(RISK_LEVELS)}
+
+    def stats(self):
+        with self._lock:
+            conn = self._connect()
+            contracts = conn.execute("SELECT COUNT(*) FROM contracts").fetchone()[0]
+            clauses = conn.execute("SELECT COUNT(*) FROM clauses").fetchone()[0]
+        return {"contracts": contracts, "clauses": clauses}
@@ -0,0 +1,102 @@
+import re
+from collections import namedtuple
+
+# One clause of a contract. `start`/`end` are character offsets into the original
+# text; `heading` is the numbered heading of the section it belongs to (if any)
+# and `level` is 0 for a section/paragraph and 1 for a sub-clause such as "(a)".
+ClauseSpan = namedtuple("ClauseSpan", ["id", "start", "end", "heading", "level", "text"])
+
+_DIGITS = "0-9०-९"  # ASCII and Devanagari digits
+
+# "1. TERM", "2.3 Rent", "Clause 4:", "Section 5 -", "१. अवधि" at the start of a line
+_HEADING_RE = re.compile(
+    r"^[ \t]*(?:(?:clause|section|article)[ \t]+)?[" + _DIGITS + r"]+(?:\.[" + _DIGITS + r"]+)*[.):]?(?=[ \t]|$)[^\n]*",
+    re.IGNORECASE | re.MULTILINE,
+)
+# "(a)", "(iv)", "b)" at the start of a line, or "(a)" inline after whitespace
+_SUBCLAUSE_RE = re.compile(r"(?:^[ \t]*|(?<=[ \t]))\((?:[a-z]|[ivx]+)\)[ \t]|^[ \t]*[a-z]\)[ \t]", re.MULTILINE)
+_PARAGRAPH_RE = re.compile(r"\n[ \t]*\n")
+# Sentence ends: . ? ! or the Devanagari danda/double danda, followed by whitespace
+_SENTENCE_END_RE = re.compile(r"(?<=[.?!।॥])\s+")
+
+
+def segment_clauses(text, max_clause_chars=1200):
+    """
+    Splits a contract into clause spans with character offsets.
+    Numbered headings start sections, "(a)"-style markers start sub-clauses, and
+    unstructured text falls back to paragraphs. Anything still longer than
+    `max_clause_chars` is split on sentence boundaries (including "।").
+    Pure regex work: hundreds of pages take a few milliseconds.
+    """
+    sections = []  # (start, end, heading)
+    headings = list(_HEADING_RE.finditer(text))
+    preamble_end = headings[0].start() if headings else len(text)
+
+    for start, end in _paragraphs(text, 0, preamble_end):
+        sections.append((start, end, ""))
+    for i, m in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+        sections.append((m.start(), end, m.group(0).strip()))
+
+    spans = []
+    for start, end, heading in sections:
+        parts = _subclauses(text, start, end)
+        for level, (part_start, part_end) in parts:
+            for s, e in _limit_length(text, part_start, part_end, max_clause_chars):
+                s, e = _strip(text, s, e)
+                if e > s:
+                    spans.append((s, e, heading, level))
+
+    return [
+        ClauseSpan(f"C{i + 1}", s, e, heading, level, text[s:e])
+        for i, (s, e, heading, level) in enumerate(spans)
+    ]
+
+
+def _paragraphs(text, start, end):
+    cursor = start
+    for m in _PARAGRAPH_RE.finditer(text, start, end):
+        yield cursor, m.start()
+        cursor = m.end()
+    yield cursor, end
+
+
+def _subclauses(text, start, end):
+    markers = [m.start() for m in _SUBCLAUSE_RE.finditer(text, start, end) if m.start() > start]
+    if not markers:
+        return [(0, (start, end))]
+    # The section lead-in (heading plus any text before "(a)") stays a level-0 clause
+    bounds = [start] + markers + [end]
+    return [(0 if i == 0 else 1, (bounds[i], bounds[i + 1])) for i in range(len(bounds) - 1)]
+
+
+def _limit_length(text, start, end, max_chars):
+    if end - start <= max_chars:
+        return [(start, end)]
+    pieces = []
+    piece_start = start
+    for m in _SENTENCE_END_RE.finditer(text, start, end):
+        # Close the current piece at the first sentence end past the limit
+        if m.start() - piece_start >= max_chars:
+            pieces.append((piece_start, m.start()))
+            piece_start = m.end()
+    pieces.append((piece_start, end))
+    return pieces
+
+
+def _strip(text, start, end):
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def is_heading(line):
+    """True if the line looks like a numbered clause heading ("3. INDEMNITY", "Clause 4:")."""
+    return _HEADING_RE.match(line) is not None
+
+
+def label_clauses(spans):
+    """Renders spans as "[C1] ..." lines so the model can answer with clause IDs."""
+    return "\n\n".join(f"[{span.id}] {span.text}" for span in spans)
@@ -0,0 +1,82 @@
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+from utils.prompt_compactor import normalize_whitespace
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "templates")
+
+# Pre-vetted low-risk skeletons (mutual termination, capped indemnity, neutral jurisdiction)
+TEMPLATE_FILES = {
+    "Employment Agreement": "employment.md",
+    "Non-Disclosure Agreement (NDA)": "nda.md",
+    "Rental Agreement": "rental.md",
+    "Vendor Service Agreement": "vendor_service.md",
+    "Freelance Contract": "freelance.md",
+}
+# Bump whenever a skeleton or the section prompt changes so cached sections are not reused
+TEMPLATE_VERSION = "1"
+
+# Fields shown as Indian-grouped amounts ("125000" -> "1,25,000")
+AMOUNT_FIELDS = ("salary", "monthly_rent", "security_deposit")
+
+# {{field}} is filled from the form; <<name: instruction>> is a bespoke section written by Claude
+_FIELD_RE = re.compile(r"\{\{(\w+)\}\}")
+_SECTION_RE = re.compile(r"<<(\w+):\s*(.+?)>>")
+# Both in one pass, so a form value or section text is never scanned for placeholders itself
+_PLACEHOLDER_RE = re.compile(f"{_FIELD_RE.pattern}|{_SECTION_RE.pattern}")
+
+Section = namedtuple("Section", ["name", "instruction"])
+
+
+@lru_cache(maxsize=None)
+def load_skeleton(template_type):
+    """Markdown skeleton for a contract type, or None if the library has none."""
+    name = TEMPLATE_FILES.get(template_type)
+    if name is None:
+        return None
+    with open(os.path.join(TEMPLATE_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def clean_params(params):
+    """Form values as single-line strings; empty fields are dropped."""
+    return {k: normalize_whitespace(str(v)) for k, v in params.items() if str(v).strip()}
+
+
+def format_amount(value):
+    """Indian digit grouping for plain whole numbers; anything else is returned as typed."""
+    digits = value.replace(",", "").strip()
+    if not digits.isdigit():
+        return value
+    head, tail = digits[:-3], digits[-3:]
+    groups = []
+    while len(head) > 2:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    if head:
+        groups.insert(0, head)
+    return ",".join(groups + [tail])
+
+
+def bespoke_sections(skeleton):
+    return [Section(m.group(1), m.group(2)) for m in _SECTION_RE.finditer(skeleton)]
+
+
+def render(skeleton, params, sections=None):
+    """
+    Fills the skeleton: form fields from `params` and bespoke sections from `sections`
+    ({name: text}). Anything missing is left as a [Bracketed] placeholder.
+    """
+    sections = sections or {}
+
+    def fill(m):
+        name = m.group(1)
+        if name is None:
+            return sections.get(m.group(2)) or f"[{m.group(3)}]"
+        value = params.get(name)
+        if not value:
+            return f"[{name.replace('_', ' ').title()}]"
+        return format_amount(value) if name in AMOUNT_FIELDS else value
+
+    return _PLACEHOLDER_RE.sub(fill, skeleton)
@@ -0,0 +1,123 @@
+import re
+import bisect
+
+_DEVANAGARI_RE = re.compile("[\u0900-\u097f]")
+_LETTER_RE = re.compile(r"[^\W\d_]")
+
+# Length-preserving folds: precomposed nukta letters -> base letter, chandrabindu -> anusvara,
+# long i/u (vowel signs and letters) -> short, so common spelling variants compare equal
+_FOLD_TABLE = str.maketrans({
+    "\u0958": "\u0915", "\u0959": "\u0916", "\u095a": "\u0917", "\u095b": "\u091c",  # क़ ख़ ग़ ज़
+    "\u095c": "\u0921", "\u095d": "\u0922", "\u095e": "\u092b", "\u095f": "\u092f",  # ड़ ढ़ फ़ य़
+    "\u0929": "\u0928", "\u0931": "\u0930", "\u0934": "\u0933",                      # ऩ ऱ ऴ
+    "\u0901": "\u0902",                                                              # ँ -> ं
+    "\u0940": "\u093f", "\u0942": "\u0941",                                          # ी -> ि, ू -> ु
+    "\u0908": "\u0907", "\u090a": "\u0909",                                          # ई -> इ, ऊ -> उ
+})
+# Length-changing folds: combining nukta and ZWJ/ZWNJ are dropped; a nasal consonant + virama
+# before a consonant of its own class is written as anusvara ("सम्बन्ध" == "संबंध")
+_FOLD_RE = re.compile("[\u093c\u200c\u200d]|ङ्(?=[क-घ])|ञ्(?=[च-झ])|ण्(?=[ट-ढ])|न्(?=[त-ध])|म्(?=[प-भ])")
+_ANUSVARA = "ं"
+
+
+class OffsetMap:
+    """Maps offsets in normalized text back to the original text."""
+
+    def __init__(self):
+        self._starts = [0]
+        self._deltas = [0]
+
+    def shift(self, normalized_pos, delta):
+        """From `normalized_pos` on, original offset = normalized offset + `delta`."""
+        self._starts.append(normalized_pos)
+        self._deltas.append(delta)
+
+    def original(self, pos):
+        return pos + self._deltas[bisect.bisect_right(self._starts, pos) - 1]
+
+
+def normalize_devanagari(text):
+    """
+    Folds nukta, chandrabindu, long/short i-u matra and nasal-cluster variants.
+    Returns (normalized text, OffsetMap or None). The map is None when offsets are unchanged.
+    Text without Devanagari is returned as is.
+    """
+    if not _DEVANAGARI_RE.search(text):
+        return text, None
+    text = text.translate(_FOLD_TABLE)
+    pieces = []
+    offsets = None
+    last = 0
+    normalized_pos = 0
+    delta = 0
+    for m in _FOLD_RE.finditer(text):
+        replacement = _ANUSVARA if m.group().endswith("्") else ""
+        pieces.append(text[last:m.start()])
+        pieces.append(replacement)
+        normalized_pos += m.start() - last + len(replacement)
+        delta += len(m.group()) - len(replacement)
+        offsets = offsets or OffsetMap()
+        offsets.shift(normalized_pos, delta)
+        last = m.end()
+    if offsets is None:
+        return text, None
+    pieces.append(text[last:])
+    return "".join(pieces), offsets
+
+
+def devanagari_ratio(text, sample_chars=20000):
+    """Share of letters that are Devanagari (looks at the first `sample_chars` characters)."""
+    sample = text[:sample_chars]
+    letters = len(_LETTER_RE.findall(sample))
+    if not letters:
+        return 0.0
+    # Matras are combining marks rather than letters; count base characters only
+    devanagari = len(re.findall("[\u0904-\u0939\u0958-\u0961]", sample))
+    return min(1.0, devanagari / letters)
+
+
+_CONSONANTS = {
+    "क": "k", "ख": "kh", "ग": "g", "घ": "gh", "ङ": "n", "च": "ch", "छ": "chh", "ज": "j", "झ": "jh", "ञ": "n",
+    "ट": "t", "ठ": "th", "ड": "d", "ढ": "dh", "ण": "n", "त": "t", "थ": "th", "द": "d", "ध": "dh", "न": "n",
+    "प": "p", "फ": "ph", "ब": "b", "भ": "bh", "म": "m", "य": "y", "र": "r", "ल": "l", "ळ": "l", "व": "v",
+    "श": "sh", "ष": "sh", "स": "s", "ह": "h",
+}
+_VOWELS = {"अ": "a", "आ": "a", "इ": "i", "उ": "u", "ऋ": "ri", "ए": "e", "ऐ": "ai", "ओ": "o", "औ": "au"}
+_MATRAS = {"ा": "a", "ि": "i", "ु": "u", "ृ": "ri", "े": "e", "ै": "ai", "ो": "o", "ौ": "au"}
+_VIRAMA = "्"
+
+
+def romanize(word):
+    """
+    Rough Hunterian-style romanization of a (normalized) Devanagari word, the way Hindi
+    is commonly typed in Latin script: "जुर्माना" -> "jurmana", "नोटिस" -> "notis".
+    Only the word-final inherent "a" is dropped.
+    """
+    word, _ = normalize_devanagari(word)
+    out = []
+    for i, ch in enumerate(word):
+        if ch in _CONSONANTS:
+            out.append(_CONSONANTS[ch])
+            following = word[i + 1] if i + 1 < len(word) else ""
+            if following and following not in _MATRAS and following != _VIRAMA and not following.isspace():
+                out.append("a")
+        elif ch in _MATRAS:
+            out.append(_MATRAS[ch])
+        elif ch in _VOWELS:
+            out.append(_VOWELS[ch])
+        elif ch == _ANUSVARA:
+            out.append("n")
+        elif ch == "ः":
+            out.append("h")
+        elif ch != _VIRAMA:
+            out.append(ch)
+    return "".join(out)
+
+
+def romanized_variants(term):
+    """Spellings a Hinglish document might use for a Devanagari term (with and without the final "a")."""
+    base = romanize(term)
+    variants = {base}
+    if base and base[-1] not in "aeiou":
+        variants.add(base + "a")
+    return variants
@@ -0,0 +1,199 @@
+import os
+import json
+import mmap
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+DEFAULT_STORE_DIR = os.path.join(".cache", "documents")
+# A session's hold on a document lapses after this long without being renewed
+HOLD_TTL = 24 * 3600
+# touch() renews a holder's holds at most this often
+HOLD_RENEW = 3600
+
+
+class DocumentStore:
+    """
+    Content-addressed store for contract texts and analyses shared by every session:
+    - each distinct text/analysis is written once under its SHA-256 and read back through mmap
+    - sessions hold only document ids; hold() pins them so they are not evicted while
+      the session keeps calling touch()
+    - unpinned documents are evicted least recently used first when the store exceeds `max_bytes`
+    - decoded documents are kept in one process-wide LRU (`cache_bytes`), not per session
+    """
+
+    def __init__(self, root=None, max_bytes=None, cache_bytes=None):
+        self.root = root or os.getenv("LEGISLENS_DOCSTORE_DIR", DEFAULT_STORE_DIR)
+        if max_bytes is None:
+            max_bytes = int(os.getenv("LEGISLENS_DOCSTORE_MAX_MB", "1024")) * 1024 * 1024
+        if cache_bytes is None:
+            cache_bytes = int(os.getenv("LEGISLENS_DOCSTORE_CACHE_MB", "64")) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self.cache_bytes = cache_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+        # doc_id -> (decoded object, size in bytes)
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+        # holder -> when its holds were last renewed by this process
+        self._touched = {}
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(self.root, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.root, "index.sqlite3"), check_same_thread=False, timeout=10)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS documents (
+                    id TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS holds (
+                    doc_id TEXT NOT NULL,
+                    holder TEXT NOT NULL,
+                    touched_at REAL NOT NULL,
+                    PRIMARY KEY (doc_id, holder)
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_holds_holder ON holds(holder)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_accessed ON documents(accessed_at)")
+            self._conn.commit()
+        return self._conn
+
+    def _path(self, doc_id):
+        return os.path.join(self.root, doc_id[:2], doc_id)
+
+    def _put(self, data, suffix):
+        doc_id = hashlib.sha256(data).hexdigest()[:32] + suffix
+        path = self._path(doc_id)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Write-then-rename so readers never see a partial file
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            conn.execute(
+                "INSERT INTO documents (id, size, created_at, accessed_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET accessed_at = excluded.accessed_at",
+                (doc_id, len(data), now, now),
+            )
+            self._evict(conn, keep=doc_id)
+            conn.commit()
+        return doc_id
+
+    def put_text(self, text):
+        """Stores a contract text and returns its id (the same text always gets the same id)."""
+        return self._put(text.encode("utf-8"), ".txt")
+
+    def put_json(self, obj):
+        """Stores a JSON-serializable object (e.g. an analysis) and returns its id."""
+        return self._put(json.dumps(obj, ensure_ascii=False, sort_keys=True).encode("utf-8"), ".json")
+
+    def _read(self, doc_id):
+        cached = self._cache_get(doc_id)
+        if cached is not None:
+            return cached
+        try:
+            with open(self._path(doc_id), "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size == 0:
+                    raw = ""
+                else:
+                    # Decoded straight from the page cache, which all processes share
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                        raw = str(view, "utf-8")
+        except FileNotFoundError:
+            return None
+        value = json.loads(raw) if doc_id.endswith(".json") else raw
+        with self._lock:
+            self._connect().execute("UPDATE documents SET accessed_at = ? WHERE id = ?", (time.time(), doc_id))
+            self._conn.commit()
+        self._cache_put(doc_id, value, size)
+        return value
+
+    def text(self, doc_id):
+        """The stored text, or None if it was evicted."""
+        return self._read(doc_id) if doc_id else None
+
+    def json(self, doc_id):
+        """The stored object, or None if it was evicted. Treat it as read-only: it is shared."""
+        return self._read(doc_id) if doc_id else None
+
+    def _cache_get(self, doc_id):
+        with self._lock:
+            entry = self._cache.get(doc_id)
+            if entry is None:
+                return None
+            self._cache.move_to_end(doc_id)
+            return entry[0]
+
+    def _cache_put(self, doc_id, value, size):
+        with self._lock:
+            if doc_id in self._cache or size > self.cache_bytes:
+                return
+            self._cache[doc_id] = (value, size)
+            self._cached_bytes += size
+            while self._cached_bytes > self.cache_bytes:
+                _, (_, dropped) = self._cache.popitem(last=False)
+                self._cached_bytes -= dropped
+
+    def hold(self, holder, doc_ids):
+        """Pins exactly `doc_ids` for `holder` (e.g. a session), releasing what it held before."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM holds WHERE holder = ?", (holder,))
+            conn.executemany("INSERT OR REPLACE INTO holds (doc_id, holder, touched_at) VALUES (?, ?, ?)",
+                             [(doc_id, holder, now) for doc_id in doc_ids if doc_id])
+            conn.commit()
+            self._touched[holder] = now
+
+    def touch(self, holder):
+        """Renews `holder`'s holds (cheap to call on every rerun: writes at most once per HOLD_RENEW)."""
+        now = time.time()
+        with self._lock:
+            if now - self._touched.get(holder, 0) < HOLD_RENEW:
+                return
+            self._touched[holder] = now
+            conn = self._connect()
+            conn.execute("UPDATE holds SET touched_at = ? WHERE holder = ?", (now, holder))
+            conn.commit()
+
+    def _evict(self, conn, keep=None):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM documents").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute(
+            "SELECT id, size FROM documents WHERE id NOT IN (SELECT doc_id FROM holds WHERE touched_at > ?) "
+            "ORDER BY accessed_at ASC",
+            (time.time() - HOLD_TTL,),
+        ).fetchall()
+        for doc_id, size in rows:
+            if total <= self.max_bytes:
+                break
+            if doc_id == keep:
+                continue
+            try:
+                os.remove(self._path(doc_id))
+            except FileNotFoundError:
+                pass
+            conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+            self._cache.pop(doc_id, None)
+            total -= size
+        self._cached_bytes = sum(size for _, size in self._cache.values())
+
+    def stats(self):
+        with self._lock:
+            count, size = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM documents").fetchone()
+            return {"documents": count, "bytes": size, "cached": len(self._cache), "cached_bytes": self._cached_bytes}
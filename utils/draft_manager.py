@@ -0,0 +1,105 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.result_cache import ResultCache, make_key
+from utils.tracing import span
+
+# Finished jobs are dropped this long after they finish; later requests for the same
+# draft are served from the persistent result cache
+FINISHED_JOB_TTL = 30 * 60
+
+
+class DraftJob:
+    """A negotiation email being generated in the background. `text` grows as tokens stream in."""
+
+    def __init__(self, key):
+        self.key = key
+        self.text = ""
+        self.done = False
+        self.error = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def append(self, chunk):
+        with self._lock:
+            self.text += chunk
+
+    def snapshot(self):
+        with self._lock:
+            return self.text
+
+    def finish(self):
+        self.finished_at = time.monotonic()
+        self.done = True
+
+
+class DraftManager:
+    """
+    Generates negotiation emails on a background thread pool so several clauses
+    can be drafted at once, and memoizes finished drafts per (clause, issue, model).
+    A draft is only regenerated when regenerate() is called explicitly, so
+    Streamlit reruns never re-bill the same generation. Finished jobs are evicted
+    after `job_ttl` seconds.
+    """
+
+    def __init__(self, engine, max_workers=4, cache=None, job_ttl=FINISHED_JOB_TTL):
+        self.engine = engine
+        self.cache = cache or ResultCache(namespace="negotiation", enabled=engine.use_cache)
+        self.job_ttl = job_ttl
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def key(self, clause_text, issue_description):
+        return make_key(clause_text, issue_description, self.engine.model)
+
+    def get_or_start(self, clause_text, issue_description):
+        """Returns the existing draft job for this clause, starting one if needed."""
+        key = self.key(clause_text, issue_description)
+        with self._lock:
+            self._evict()
+            job = self._jobs.get(key)
+            if job is not None:
+                return job
+            job = DraftJob(key)
+            self._jobs[key] = job
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            job.append(cached)
+            job.finish()
+        else:
+            self._pool.submit(self._run, job, clause_text, issue_description)
+        return job
+
+    def regenerate(self, clause_text, issue_description):
+        """Discards the current draft (if finished) and starts a fresh generation."""
+        key = self.key(clause_text, issue_description)
+        with self._lock:
+            self._evict()
+            job = self._jobs.get(key)
+            if job is not None and not job.done:
+                # Already generating; nothing to regenerate yet
+                return job
+            job = DraftJob(key)
+            self._jobs[key] = job
+        self._pool.submit(self._run, job, clause_text, issue_description)
+        return job
+
+    def _evict(self):
+        """Drops jobs that finished more than `job_ttl` seconds ago (caller holds the lock)."""
+        cutoff = time.monotonic() - self.job_ttl
+        for key in [key for key, job in self._jobs.items() if job.done and job.finished_at < cutoff]:
+            del self._jobs[key]
+
+    def _run(self, job, clause_text, issue_description):
+        with span("negotiation_email") as stage:
+            try:
+                for chunk in self.engine.stream_negotiation_email(clause_text, issue_description):
+                    job.append(chunk)
+                if not job.text.startswith("Error:"):
+                    self.cache.put(job.key, job.text)
+            except Exception as e:
+                job.error = stage.error = str(e)
+            finally:
+                job.finish()
@@ -0,0 +1,72 @@
+import threading
+from utils.nlp_engine import NLPEngine
+from utils.draft_manager import DraftManager
+from utils.job_queue import JobQueue
+from utils.document_store import DocumentStore
+from utils.clause_search import ClauseSearch
+from utils.startup_profile import timed
+
+# One NLPEngine per server process, shared by every session and every view.
+# Streamlit re-executes app.py on each interaction but keeps imported modules,
+# so this survives reruns without reloading spaCy or rebuilding the client.
+_ENGINE = None
+_DRAFTS = None
+_JOBS = None
+_DOCUMENTS = None
+_SEARCH = None
+_LOCK = threading.Lock()
+
+
+def get_engine():
+    """Returns the process-wide NLPEngine, creating it on first call."""
+    global _ENGINE
+    if _ENGINE is None:
+        with _LOCK:
+            if _ENGINE is None:
+                with timed("NLPEngine()"):
+                    _ENGINE = NLPEngine()
+    return _ENGINE
+
+
+def get_draft_manager():
+    """Returns the process-wide DraftManager (background negotiation email drafting)."""
+    global _DRAFTS
+    if _DRAFTS is None:
+        engine = get_engine()
+        with _LOCK:
+            if _DRAFTS is None:
+                _DRAFTS = DraftManager(engine)
+    return _DRAFTS
+
+
+def get_job_queue():
+    """Returns the process-wide JobQueue (background analysis jobs), starting its workers on first call."""
+    global _JOBS
+    if _JOBS is None:
+        engine = get_engine()
+        store = get_document_store()
+        search = get_clause_search()
+        with _LOCK:
+            if _JOBS is None:
+                _JOBS = JobQueue(engine, store=store, search=search).start()
+    return _JOBS
+
+
+def get_document_store():
+    """Returns the process-wide DocumentStore (contract texts and analyses shared by all sessions)."""
+    global _DOCUMENTS
+    if _DOCUMENTS is None:
+        with _LOCK:
+            if _DOCUMENTS is None:
+                _DOCUMENTS = DocumentStore()
+    return _DOCUMENTS
+
+
+def get_clause_search():
+    """Returns the process-wide ClauseSearch (full-text index of every analyzed clause)."""
+    global _SEARCH
+    if _SEARCH is None:
+        with _LOCK:
+            if _SEARCH is None:
+                _SEARCH = ClauseSearch()
+    return _SEARCH
@@ -0,0 +1,101 @@
+import os
+import re
+from collections import namedtuple
+from utils.startup_profile import lazy_import, timed
+
+# One named entity; `start`/`end` are character offsets into the original text
+Entity = namedtuple("Entity", ["label", "text", "start", "end"])
+
+LABELS = ("ORG", "PERSON", "DATE", "GPE")
+# Only ner is needed for entities: in en_core_web_sm v3 it has its own internal tok2vec and
+# does not listen to the shared "tok2vec" component, so that and everything else is dead weight
+_UNUSED_PIPES = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "morphologizer", "senter"]
+_PARAGRAPH_RE = re.compile(r"\n[ \t]*\n")
+
+
+def chunk_text(text, max_chars=5000):
+    """
+    Splits text into (offset, chunk) pieces on paragraph boundaries, packing paragraphs
+    up to `max_chars`. Oversized paragraphs are cut at the last whitespace before the limit.
+    Keeps every chunk far below spaCy's max_length, whatever the document size.
+    """
+    bounds = [0] + [m.end() for m in _PARAGRAPH_RE.finditer(text)] + [len(text)]
+    pieces = []
+    start = 0
+    for para_start, para_end in zip(bounds, bounds[1:]):
+        if para_end - start > max_chars and para_start > start:
+            pieces.append((start, para_start))
+            start = para_start
+        while para_end - start > max_chars:
+            cut = text.rfind(" ", start, start + max_chars)
+            cut = cut if cut > start else start + max_chars
+            pieces.append((start, cut))
+            start = cut
+    pieces.append((start, len(text)))
+    return [(s, text[s:e]) for s, e in pieces if text[s:e].strip()]
+
+
+class EntityExtractor:
+    """
+    spaCy NER over paragraph chunks:
+    - loads en_core_web_sm with only ner
+    - streams chunks through nlp.pipe (batch_size / n_process configurable)
+    - dedupes per label with a set, keeping first-seen order
+    - works on batches of documents in a single pipe
+    """
+
+    def __init__(self, model="en_core_web_sm", batch_size=None, n_process=None, chunk_chars=5000):
+        self.model = model
+        self.batch_size = batch_size or int(os.getenv("LEGISLENS_NER_BATCH_SIZE", "32"))
+        self.n_process = n_process or int(os.getenv("LEGISLENS_NER_PROCESSES", "1"))
+        self.chunk_chars = chunk_chars
+        self._nlp = None
+
+    @property
+    def nlp(self):
+        if self._nlp is None:
+            spacy = lazy_import("spacy")
+            try:
+                with timed(f"spacy.load({self.model}, ner only)"):
+                    self._nlp = spacy.load(self.model, exclude=_UNUSED_PIPES)
+            except OSError:
+                # On cloud, if requirements failed, we can't download at runtime due to permissions.
+                # Use a blank model as fallback to prevent crash, but entity extraction will be limited.
+                self._nlp = spacy.blank("en")
+        return self._nlp
+
+    def entity_spans(self, text):
+        """All entities of the tracked labels, with offsets, in document order."""
+        return self.entity_spans_batch([text])[0]
+
+    def entity_spans_batch(self, texts):
+        """entity_spans for many documents, sharing one nlp.pipe run."""
+        results = [[] for _ in texts]
+        if "ner" not in self.nlp.pipe_names:
+            # Blank fallback model: tokenizing would cost time and find nothing
+            return results
+        tasks = ((chunk, (i, offset)) for i, text in enumerate(texts) for offset, chunk in chunk_text(text, self.chunk_chars))
+        docs = self.nlp.pipe(tasks, as_tuples=True, batch_size=self.batch_size, n_process=self.n_process)
+        for doc, (i, offset) in docs:
+            for ent in doc.ents:
+                if ent.label_ in LABELS:
+                    results[i].append(Entity(ent.label_, ent.text, offset + ent.start_char, offset + ent.end_char))
+        return results
+
+    def extract(self, text):
+        """{label: [unique entity texts in first-seen order]} for ORG, PERSON, DATE and GPE."""
+        return self.extract_batch([text])[0]
+
+    def extract_batch(self, texts):
+        return [group_entities(spans) for spans in self.entity_spans_batch(texts)]
+
+
+def group_entities(spans):
+    grouped = {label: [] for label in LABELS}
+    seen = set()
+    for ent in spans:
+        key = (ent.label, ent.text)
+        if key not in seen:
+            seen.add(key)
+            grouped[ent.label].append(ent.text)
+    return grouped
@@ -0,0 +1,155 @@
+import io
+import os
+import codecs
+import shutil
+import zipfile
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree import ElementTree
+from utils.startup_profile import lazy_import
+
+# One unit of extracted text: a PDF page, a DOCX paragraph or a block of a TXT file.
+# `offset` is the character offset of `text` in the fully joined document.
+# PDF pages end with PAGE_BREAK so page boundaries survive joining; NLPEngine.extract_text
+# removes page headers/footers with them and returns text without the markers.
+TextSegment = namedtuple("TextSegment", ["index", "offset", "text"])
+
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_TXT_BLOCK_SIZE = 64 * 1024
+PAGE_BREAK = "\f"
+
+
+def iter_segments(uploaded_file, max_pages=None, max_bytes=None, workers=0, pages_per_task=8):
+    """
+    Streams text out of a PDF, DOCX or TXT upload without building the whole string.
+    - max_pages: stop after this many pages/paragraphs/blocks
+    - max_bytes: stop once this many bytes of text (UTF-8) have been produced
+    - workers: >1 extracts PDF page ranges in a process pool
+    """
+    name = uploaded_file.name.lower()
+    if name.endswith(".pdf"):
+        if workers and workers > 1:
+            pieces = _iter_pdf_parallel(uploaded_file, workers, pages_per_task, max_pages)
+        else:
+            pieces = _iter_pdf(uploaded_file)
+    elif name.endswith(".docx"):
+        pieces = _iter_docx(uploaded_file)
+    else:
+        # Assume text file
+        pieces = _iter_txt(uploaded_file)
+
+    offset = 0
+    produced = 0
+    for index, piece in enumerate(pieces):
+        if max_pages is not None and index >= max_pages:
+            break
+        if max_bytes is not None:
+            remaining = max_bytes - produced
+            if remaining <= 0:
+                break
+            encoded = piece.encode("utf-8")
+            if len(encoded) > remaining:
+                piece = encoded[:remaining].decode("utf-8", errors="ignore")
+            produced += min(len(encoded), remaining)
+        yield TextSegment(index, offset, piece)
+        offset += len(piece)
+    # Closing the generator also shuts down any process pool behind `pieces`
+    if hasattr(pieces, "close"):
+        pieces.close()
+
+
+def _iter_pdf(uploaded_file):
+    PyPDF2 = lazy_import("PyPDF2")
+    reader = PyPDF2.PdfReader(uploaded_file)
+    for page in reader.pages:
+        yield (page.extract_text() or "") + "\n" + PAGE_BREAK
+
+
+def _extract_pdf_range(path, start, end):
+    """Process-pool worker: extracts pages [start, end) of the PDF at `path` with its own reader."""
+    PyPDF2 = lazy_import("PyPDF2")
+    reader = PyPDF2.PdfReader(path)
+    return [(reader.pages[i].extract_text() or "") + "\n" + PAGE_BREAK
+            for i in range(start, min(end, len(reader.pages)))]
+
+
+def _pdf_path(uploaded_file):
+    """(path, is_temporary): the upload's own file if it has one, else a spooled temp copy."""
+    try:
+        uploaded_file.fileno()
+        if os.path.isfile(uploaded_file.name):
+            return os.path.abspath(uploaded_file.name), False
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        pass
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        shutil.copyfileobj(uploaded_file, tmp)
+    return tmp.name, True
+
+
+def _iter_pdf_parallel(uploaded_file, workers, pages_per_task, max_pages):
+    PyPDF2 = lazy_import("PyPDF2")
+    # Workers get a path and open their own reader, instead of a pickled copy of the whole file each
+    path, temporary = _pdf_path(uploaded_file)
+    pool = None
+    try:
+        page_count = len(PyPDF2.PdfReader(path).pages)
+        if max_pages is not None:
+            page_count = min(page_count, max_pages)
+        ranges = [(start, start + pages_per_task) for start in range(0, page_count, pages_per_task)]
+
+        # Keep a bounded window of ranges in flight so results are yielded in order
+        # without holding the whole document in memory.
+        pool = ProcessPoolExecutor(max_workers=workers)
+        pending = []
+        next_range = 0
+        while next_range < len(ranges) or pending:
+            while next_range < len(ranges) and len(pending) < workers * 2:
+                pending.append(pool.submit(_extract_pdf_range, path, *ranges[next_range]))
+                next_range += 1
+            for page_text in pending.pop(0).result():
+                yield page_text
+    finally:
+        if pool is not None:
+            # Waits for running workers so the temp file is not removed under them
+            pool.shutdown(wait=temporary, cancel_futures=True)
+        if temporary:
+            os.remove(path)
+
+
+def _iter_docx(uploaded_file):
+    """Streams paragraphs straight out of word/document.xml instead of loading the whole DOCX."""
+    with zipfile.ZipFile(uploaded_file) as archive:
+        with archive.open("word/document.xml") as xml_file:
+            parts = []
+            for event, elem in ElementTree.iterparse(xml_file, events=("end",)):
+                if elem.tag == _W_NS + "t":
+                    parts.append(elem.text or "")
+                elif elem.tag == _W_NS + "tab":
+                    parts.append("\t")
+                elif elem.tag in (_W_NS + "br", _W_NS + "cr"):
+                    parts.append("\n")
+                elif elem.tag == _W_NS + "p":
+                    yield "".join(parts) + "\n"
+                    parts = []
+                    elem.clear()
+
+
+def _iter_txt(uploaded_file):
+    """Decodes UTF-8 incrementally and yields blocks that end on a line break."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    carry = ""
+    while True:
+        raw = uploaded_file.read(_TXT_BLOCK_SIZE)
+        if not raw:
+            break
+        block = carry + decoder.decode(raw)
+        cut = block.rfind("\n") + 1
+        if cut:
+            yield block[:cut]
+            carry = block[cut:]
+        else:
+            carry = block
+    tail = carry + decoder.decode(b"", final=True)
+    if tail:
+        yield tail
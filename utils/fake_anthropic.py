@@ -0,0 +1,404 @@
+"""
+Local stand-in for the Anthropic Messages API, for offline tests, benchmarks and load tests.
+
+In-process:
+    LEGISLENS_LLM_BACKEND=fake    synthetic, deterministic responses (no fixtures needed)
+    LEGISLENS_LLM_BACKEND=replay  responses replayed from LEGISLENS_FIXTURES_DIR by request hash
+    LEGISLENS_LLM_BACKEND=record  real API calls, each response saved to LEGISLENS_FIXTURES_DIR
+
+As an HTTP server (point the SDK at it with ANTHROPIC_BASE_URL=http://127.0.0.1:8765):
+    python -m utils.fake_anthropic serve --port 8765 --mode replay --fixtures fixtures/ --tokens-per-sec 80 --error-rate 0.05
+"""
+import os
+import re
+import json
+import time
+import uuid
+import random
+import itertools
+import hashlib
+import argparse
+import threading
+from contextlib import contextmanager
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.tokens import estimate_tokens
+
+DEFAULT_FIXTURES_DIR = os.path.join("fixtures", "llm")
+
+STANDARD_TYPES = ["Termination", "Indemnity", "Payment/Rent", "Penalty", "Jurisdiction",
+                  "Confidentiality", "Non-Compete", "Notice Period", "Liability", "Force Majeure"]
+# Keyword category -> clause type used by the synthetic analysis
+_CATEGORY_TYPES = {"Financial": "Penalty", "Legal": "Jurisdiction", "Operational": "Non-Compete",
+                   "Compliance": "Liability", "Termination": "Termination"}
+_CLAUSE_LABEL_RE = re.compile(r"^\[(C\d+)\] ", re.MULTILINE)
+_ERROR_TYPES = {429: "rate_limit_error", 529: "overloaded_error", 500: "api_error"}
+
+
+class FakeAPIError(Exception):
+    """Mimics the SDK's APIStatusError closely enough for LLMGateway's retry logic."""
+
+    def __init__(self, status_code, message, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = SimpleNamespace(status_code=status_code, headers=headers)
+
+
+def _system_text(system):
+    if isinstance(system, list):
+        return "".join(block.get("text", "") for block in system)
+    return system or ""
+
+
+def _message_text(messages):
+    parts = []
+    for message in messages:
+        content = message.get("content", "")
+        if isinstance(content, list):
+            content = "".join(block.get("text", "") for block in content)
+        parts.append(f"{message.get('role')}:{content}")
+    return "\n".join(parts)
+
+
+def request_hash(request):
+    """Stable key for a Messages request (ignores transport-only options like timeout/stream)."""
+    canonical = {
+        "model": request.get("model"),
+        "system": _system_text(request.get("system")),
+        "messages": _message_text(request.get("messages", [])),
+        "max_tokens": request.get("max_tokens"),
+        "temperature": request.get("temperature"),
+    }
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class LatencyModel:
+    """Simulated server behaviour: time to first token, generation speed and injected errors."""
+
+    def __init__(self, first_token_s=0.0, tokens_per_sec=0.0, error_rate=0.0, error_status=429, seed=None):
+        self.first_token_s = first_token_s
+        self.tokens_per_sec = tokens_per_sec
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def maybe_fail(self):
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+        if failed:
+            raise FakeAPIError(self.error_status, f"Injected {self.error_status} error", retry_after=0.05)
+
+    def token_delay(self, tokens):
+        return tokens / self.tokens_per_sec if self.tokens_per_sec else 0.0
+
+
+class SyntheticResponder:
+    """Deterministic responses shaped like what each NLPEngine prompt expects."""
+
+    def __init__(self):
+        self._scanner = None
+
+    def __call__(self, request):
+        system = _system_text(request.get("system"))
+        prompt = _message_text(request.get("messages", []))
+        if "is invalid" in prompt:
+            clause_id = re.search(r'"clause_id": "\[?(C\d+)', prompt)
+            return json.dumps({"clause_id": clause_id.group(1) if clause_id else "C1", "explanation": "Standard clause.",
+                               "risk_level": "Low", "type": "Liability"})
+        if "risk" in system.lower() and _CLAUSE_LABEL_RE.search(prompt):
+            return self._analysis(prompt)
+        if "drafter" in system.lower() and "section only" in prompt:
+            return "- The parties shall cooperate in good faith.\n- Each party shall bear its own costs.\n"
+        if "drafter" in system.lower():
+            return "# Agreement\n\n## 1. Parties\n[Party A] and [Party B].\n\n## 2. Termination\nEither party may terminate with 30 days written notice.\n"
+        return "Dear Sir/Madam,\n\nWe would like to request a modification to this clause so that it is fair to both parties.\n\nRegards"
+
+    def _analysis(self, prompt):
+        if self._scanner is None:
+            # Late import: risk_calculator pulls in pandas
+            from utils.risk_calculator import RiskCalculator
+            from utils.keyword_scanner import get_scanner
+            self._scanner = get_scanner(RiskCalculator().risk_indicators)
+        labels = list(_CLAUSE_LABEL_RE.finditer(prompt))
+        clauses = []
+        for i, m in enumerate(labels):
+            end = labels[i + 1].start() if i + 1 < len(labels) else len(prompt)
+            counts = self._scanner.count(prompt[m.end():end])
+            hits = sum(counts.values())
+            top = max(counts, key=counts.get)
+            level = "High" if hits >= 3 else "Medium" if hits >= 1 else "Low"
+            clauses.append({
+                "clause_id": m.group(1),
+                "explanation": f"Synthetic review: {hits} risk keyword(s) found.",
+                "risk_level": level,
+                "type": _CATEGORY_TYPES[top] if hits else "Payment/Rent",
+            })
+        high = sum(1 for c in clauses if c["risk_level"] == "High")
+        present = {c["type"] for c in clauses}
+        return json.dumps({
+            "summary": f"Synthetic analysis of {len(clauses)} clauses.",
+            "risk_score": min(95, 20 + 15 * high),
+            "clauses": clauses,
+            "missing_clauses": [t for t in STANDARD_TYPES if t not in present],
+        })
+
+
+class FixtureStore:
+    """One JSON file per request hash."""
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.getenv("LEGISLENS_FIXTURES_DIR", DEFAULT_FIXTURES_DIR)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(self, request):
+        try:
+            with open(self._path(request_hash(request)), encoding="utf-8") as f:
+                return json.load(f)["response"]
+        except FileNotFoundError:
+            return None
+
+    def save(self, request, text, usage):
+        os.makedirs(self.directory, exist_ok=True)
+        key = request_hash(request)
+        record = {
+            "request": {k: request.get(k) for k in ("model", "max_tokens", "temperature")},
+            "response": {"text": text, "usage": usage},
+        }
+        with open(self._path(key), "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False, indent=2)
+
+
+def _make_message(request, text, usage=None):
+    usage = usage or {
+        "input_tokens": estimate_tokens(_system_text(request.get("system")) + _message_text(request.get("messages", []))),
+        "output_tokens": estimate_tokens(text),
+    }
+    return SimpleNamespace(
+        id=f"msg_fake_{uuid.uuid4().hex[:12]}",
+        type="message",
+        role="assistant",
+        model=request.get("model"),
+        content=[SimpleNamespace(type="text", text=text)],
+        stop_reason="end_turn",
+        usage=SimpleNamespace(cache_creation_input_tokens=0, cache_read_input_tokens=0, **usage),
+    )
+
+
+class _FakeStream:
+    def __init__(self, messages, request):
+        self._messages = messages
+        self._request = request
+        self._final = None
+
+    @property
+    def text_stream(self):
+        text, usage = self._messages._respond(self._request)
+        latency = self._messages.latency
+        time.sleep(latency.first_token_s)
+        # Roughly one token per delta
+        for i in range(0, len(text), 4):
+            time.sleep(latency.token_delay(1))
+            yield text[i:i + 4]
+        self._final = _make_message(self._request, text, usage)
+
+    def get_final_message(self):
+        return self._final
+
+
+class FakeMessages:
+    def __init__(self, client):
+        self._client = client
+        self.latency = client.latency
+
+    def _respond(self, request):
+        """Returns (text, usage or None) for a request, according to the client's mode."""
+        self.latency.maybe_fail()
+        if self._client.mode == "replay":
+            fixture = self._client.fixtures.load(request)
+            if fixture is None:
+                if not self._client.synthetic_fallback:
+                    raise FakeAPIError(404, f"No fixture for request {request_hash(request)[:12]}")
+            else:
+                return fixture["text"], fixture.get("usage")
+        return self._client.responder(request), None
+
+    def create(self, timeout=None, **request):
+        text, usage = self._respond(request)
+        time.sleep(self.latency.first_token_s + self.latency.token_delay(estimate_tokens(text)))
+        return _make_message(request, text, usage)
+
+    @contextmanager
+    def stream(self, timeout=None, **request):
+        yield _FakeStream(self, request)
+
+
+class FakeAnthropic:
+    """
+    In-process fake with the same `messages.create` / `messages.stream` surface as anthropic.Anthropic.
+    mode="synthetic" answers every request with SyntheticResponder; mode="replay" serves recorded
+    fixtures (optionally falling back to synthetic answers for unknown requests).
+    """
+
+    def __init__(self, mode="synthetic", fixtures_dir=None, latency=None, responder=None, synthetic_fallback=False):
+        self.mode = mode
+        self.fixtures = FixtureStore(fixtures_dir)
+        self.latency = latency or LatencyModel()
+        self.responder = responder or SyntheticResponder()
+        self.synthetic_fallback = synthetic_fallback
+        self.messages = FakeMessages(self)
+
+
+class _RecordingMessages:
+    def __init__(self, real_messages, fixtures):
+        self._real = real_messages
+        self._fixtures = fixtures
+
+    def create(self, **kwargs):
+        message = self._real.create(**kwargs)
+        text = "".join(getattr(block, "text", "") for block in message.content)
+        self._fixtures.save(kwargs, text, _usage_dict(message.usage))
+        return message
+
+    @contextmanager
+    def stream(self, **kwargs):
+        with self._real.stream(**kwargs) as stream:
+            yield stream
+            final = stream.get_final_message()
+        text = "".join(getattr(block, "text", "") for block in final.content)
+        self._fixtures.save(kwargs, text, _usage_dict(final.usage))
+
+
+def _usage_dict(usage):
+    return {"input_tokens": getattr(usage, "input_tokens", 0), "output_tokens": getattr(usage, "output_tokens", 0)}
+
+
+class RecordingAnthropic:
+    """Wraps a real client and saves every response as a replay fixture."""
+
+    def __init__(self, real_client, fixtures_dir=None):
+        self.messages = _RecordingMessages(real_client.messages, FixtureStore(fixtures_dir))
+
+
+def latency_from_env():
+    return LatencyModel(
+        first_token_s=float(os.getenv("LEGISLENS_FAKE_FIRST_TOKEN_S", "0")),
+        tokens_per_sec=float(os.getenv("LEGISLENS_FAKE_TOKENS_PER_SEC", "0")),
+        error_rate=float(os.getenv("LEGISLENS_FAKE_ERROR_RATE", "0")),
+        seed=os.getenv("LEGISLENS_FAKE_SEED"),
+    )
+
+
+# --- HTTP server -------------------------------------------------------------------------
+
+class _Handler(BaseHTTPRequestHandler):
+    client = None  # set by serve()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/messages":
+            self._send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("content-length", 0))) or b"{}")
+        wants_stream = body.pop("stream", False)
+        try:
+            if wants_stream:
+                self._stream(body)
+            else:
+                message = self.client.messages.create(**body)
+                self._send_json(200, _message_json(message))
+        except FakeAPIError as e:
+            headers = e.response.headers
+            error = {"type": "error", "error": {"type": _ERROR_TYPES.get(e.status_code, "api_error"), "message": str(e)}}
+            self._send_json(e.status_code, error, headers)
+
+    def _stream(self, body):
+        with self.client.messages.stream(**body) as stream:
+            chunks = stream.text_stream
+            first = next(chunks, "")  # errors surface here, before any bytes are sent
+            self.send_response(200)
+            self.send_header("content-type", "text/event-stream")
+            self.send_header("cache-control", "no-cache")
+            self.end_headers()
+            start = _message_json(_make_message(body, ""))
+            start["content"] = []
+            start["stop_reason"] = None
+            self._event("message_start", {"type": "message_start", "message": start})
+            self._event("content_block_start", {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}})
+            for text in itertools.chain([first] if first else [], chunks):
+                self._event("content_block_delta", {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text}})
+            final = stream.get_final_message()
+            self._event("content_block_stop", {"type": "content_block_stop", "index": 0})
+            self._event("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                          "usage": {"output_tokens": final.usage.output_tokens}})
+            self._event("message_stop", {"type": "message_stop"})
+
+    def _event(self, name, data):
+        self.wfile.write(f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _message_json(message):
+    return {
+        "id": message.id,
+        "type": "message",
+        "role": "assistant",
+        "model": message.model,
+        "content": [{"type": "text", "text": block.text} for block in message.content],
+        "stop_reason": message.stop_reason,
+        "stop_sequence": None,
+        "usage": {"input_tokens": message.usage.input_tokens, "output_tokens": message.usage.output_tokens},
+    }
+
+
+def serve(client, host="127.0.0.1", port=8765):
+    """Runs an HTTP server speaking the Messages API (JSON and SSE streaming) until interrupted."""
+    handler = type("FakeAnthropicHandler", (_Handler,), {"client": client})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Fake Anthropic API on http://{host}:{port} (mode={client.mode})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the Anthropic Messages API.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    srv = sub.add_parser("serve", help="Run the HTTP server")
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--port", type=int, default=8765)
+    srv.add_argument("--mode", choices=["synthetic", "replay"], default="synthetic")
+    srv.add_argument("--fixtures", default=None, help="Fixture directory for replay mode")
+    srv.add_argument("--synthetic-fallback", action="store_true", help="Answer unknown requests synthetically in replay mode")
+    srv.add_argument("--first-token-s", type=float, default=0.0)
+    srv.add_argument("--tokens-per-sec", type=float, default=0.0, help="0 = instant")
+    srv.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with --error-status")
+    srv.add_argument("--error-status", type=int, default=429)
+    srv.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    latency = LatencyModel(args.first_token_s, args.tokens_per_sec, args.error_rate, args.error_status, args.seed)
+    client = FakeAnthropic(args.mode, args.fixtures, latency, synthetic_fallback=args.synthetic_fallback)
+    serve(client, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
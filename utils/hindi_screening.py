@@ -0,0 +1,35 @@
+from collections import namedtuple
+from utils.devanagari import devanagari_ratio
+from utils.keyword_scanner import get_scanner, group_matches_by_clause
+
+FULL, SHRINK, SKIP = "full", "shrink", "skip"
+
+# decision: FULL / SHRINK / SKIP; hit_clauses: ids of clauses with risk keywords;
+# density: keyword hits per 1,000 characters
+ScreeningResult = namedtuple("ScreeningResult", ["decision", "hit_clauses", "hits", "density"])
+
+
+def screen_document(text, spans, risk_indicators=None, min_ratio=0.5, shrink_density=2.0):
+    """
+    Local keyword screen for Hindi (Devanagari) contracts, deciding how much goes to the LLM:
+    - SKIP: no risk keywords at all; no Claude call is made
+    - SHRINK: fewer than `shrink_density` hits per 1,000 characters; only clauses with a hit are sent
+    - FULL: everything is sent
+    Returns None for documents that are not mostly Devanagari (they are always sent in full).
+    """
+    if devanagari_ratio(text) < min_ratio:
+        return None
+    if risk_indicators is None:
+        # Late import: risk_calculator pulls in pandas
+        from utils.risk_calculator import RiskCalculator
+        risk_indicators = RiskCalculator().risk_indicators
+    matches = get_scanner(risk_indicators).scan(text).matches
+    hit_clauses = set(group_matches_by_clause(matches, spans))
+    density = 1000.0 * len(matches) / max(1, len(text))
+    if not matches:
+        decision = SKIP
+    elif density < shrink_density:
+        decision = SHRINK
+    else:
+        decision = FULL
+    return ScreeningResult(decision, hit_clauses, len(matches), round(density, 2))
@@ -0,0 +1,329 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from utils.tracing import span
+from utils.document_store import DocumentStore
+
+DEFAULT_JOBS_PATH = os.path.join(".cache", "jobs.sqlite3")
+
+QUEUED, RUNNING, DONE, ERROR = "queued", "running", "done", "error"
+# Stages a job moves through, in order; the UI shows them as progress
+STAGES = ("queued", "extracting", "analyzing", "scoring", "done")
+# A job that killed its worker process this many times is not picked up again
+MAX_ATTEMPTS = 3
+
+# Columns returned by list(); the heavy result/previous columns are left out
+_SUMMARY_COLUMNS = ("id", "session", "file_name", "doc_bytes", "status", "stage", "clauses_done",
+                    "error", "attempts", "created_at", "updated_at")
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """
+    Persistent analysis jobs (SQLite) run by a pool of worker threads, so the UI never blocks:
+    - submit() stores the upload on disk and returns a job id right away
+    - workers extract -> analyze (streamed) -> score, recording the stage and clauses found so far
+    - get()/list() are polled by the views; finished results survive reruns and restarts
+    - the text and analysis of a finished job go to the DocumentStore; the job keeps only their ids
+    - finished clauses are added to the ClauseSearch index, if one is given
+    Jobs left running by a process that died are queued again when a queue starts.
+    """
+
+    def __init__(self, engine, path=None, workers=None, upload_dir=None, store=None, search=None):
+        self.engine = engine
+        self.store = store or DocumentStore()
+        self.search = search
+        self.path = path or os.getenv("LEGISLENS_JOBS_PATH", DEFAULT_JOBS_PATH)
+        self.upload_dir = upload_dir or os.path.join(os.path.dirname(self.path) or ".", "uploads")
+        self.workers = workers or int(os.getenv("LEGISLENS_JOB_WORKERS", "2"))
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._conn = None
+        self._threads = []
+        self._calculator = None
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            os.makedirs(self.upload_dir, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    session TEXT,
+                    file_name TEXT NOT NULL,
+                    upload_path TEXT NOT NULL,
+                    doc_bytes INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    clauses_done INTEGER NOT NULL DEFAULT 0,
+                    previous TEXT,
+                    result TEXT,
+                    error TEXT,
+                    owner INTEGER,
+                    claim TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    -- Per-contract summary kept outside the result JSON for the portfolio view
+                    risk_score REAL,
+                    scores TEXT,
+                    high_clauses INTEGER,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_session ON jobs(session, created_at)")
+            # Clauses streamed by a running job, one row each, so every event is an append
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS job_clauses (
+                    job_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    clause TEXT NOT NULL,
+                    PRIMARY KEY (job_id, seq)
+                ) WITHOUT ROWID"""
+            )
+            self._conn.commit()
+        return self._conn
+
+    def start(self):
+        """Re-queues orphaned jobs and starts the worker threads (once)."""
+        with self._lock:
+            if self._threads:
+                return self
+            self._requeue_orphans(self._connect())
+            if self.search is not None:
+                thread = threading.Thread(target=self._backfill_search, name="legislens-search-backfill", daemon=True)
+                thread.start()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"legislens-job-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def _requeue_orphans(self, conn):
+        rows = conn.execute("SELECT id, owner, attempts FROM jobs WHERE status = ?", (RUNNING,)).fetchall()
+        for row in rows:
+            if row["owner"] == os.getpid() or (row["owner"] and _pid_alive(row["owner"])):
+                continue
+            if row["attempts"] >= MAX_ATTEMPTS:
+                conn.execute("UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                             (ERROR, "Worker stopped while processing this document", time.time(), row["id"]))
+                conn.execute("DELETE FROM job_clauses WHERE job_id = ?", (row["id"],))
+            else:
+                conn.execute("UPDATE jobs SET status = ?, stage = ?, clauses_done = 0, "
+                             "updated_at = ? WHERE id = ?", (QUEUED, STAGES[0], time.time(), row["id"]))
+                conn.execute("DELETE FROM job_clauses WHERE job_id = ?", (row["id"],))
+        conn.commit()
+
+    def submit(self, file_name, data, session=None, previous=None):
+        """Queues an uploaded document (bytes). `previous` is an earlier analysis of the same contract."""
+        job_id = uuid.uuid4().hex[:12]
+        extension = os.path.splitext(file_name)[1].lower()
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            upload_path = os.path.join(self.upload_dir, f"{job_id}{extension}")
+            with open(upload_path, "wb") as f:
+                f.write(data)
+            conn.execute(
+                "INSERT INTO jobs (id, session, file_name, upload_path, doc_bytes, status, stage, previous, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, session, file_name, upload_path, len(data), QUEUED, STAGES[0],
+                 json.dumps(previous, ensure_ascii=False) if previous else None, now, now),
+            )
+            conn.commit()
+        self._wake.set()
+        return job_id
+
+    def get(self, job_id):
+        """Full job record: status, stage, clauses found so far and, once done, the result."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            clauses = conn.execute("SELECT clause FROM job_clauses WHERE job_id = ? ORDER BY seq",
+                                   (job_id,)).fetchall()
+        if row is None:
+            return None
+        job = {column: row[column] for column in _SUMMARY_COLUMNS}
+        job["clauses"] = [json.loads(clause["clause"]) for clause in clauses]
+        job["result"] = json.loads(row["result"]) if row["result"] else None
+        return job
+
+    def list(self, session=None, limit=20):
+        """Most recent jobs (of one session, if given), newest first, without their results."""
+        query = f"SELECT {', '.join(_SUMMARY_COLUMNS)} FROM jobs"
+        args = []
+        if session is not None:
+            query += " WHERE session = ?"
+            args.append(session)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            rows = self._connect().execute(query, args).fetchall()
+        return [dict(row) for row in rows]
+
+    def finished(self, session=None):
+        """Per-contract summaries of finished jobs (of one session, if given), oldest first."""
+        query = "SELECT id, file_name, risk_score, scores, high_clauses, updated_at FROM jobs WHERE status = ?"
+        args = [DONE]
+        if session is not None:
+            query += " AND session = ?"
+            args.append(session)
+        with self._lock:
+            rows = self._connect().execute(query + " ORDER BY created_at", args).fetchall()
+        return [{
+            "id": row["id"],
+            "name": row["file_name"],
+            "risk_score": row["risk_score"],
+            "category_scores": json.loads(row["scores"]) if row["scores"] else {},
+            "high_clauses": row["high_clauses"] or 0,
+        } for row in rows]
+
+    def finished_version(self, session=None):
+        """(count, last update) of finished jobs; changes whenever finished() would."""
+        query = "SELECT COUNT(*), MAX(updated_at) FROM jobs WHERE status = ?"
+        args = [DONE]
+        if session is not None:
+            query += " AND session = ?"
+            args.append(session)
+        with self._lock:
+            return tuple(self._connect().execute(query, args).fetchone())
+
+    def _update(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            conn.commit()
+
+    def _add_clause(self, job_id, seq, clause):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("INSERT OR REPLACE INTO job_clauses (job_id, seq, clause) VALUES (?, ?, ?)",
+                         (job_id, seq, json.dumps(clause, ensure_ascii=False)))
+            conn.execute("UPDATE jobs SET clauses_done = ?, updated_at = ? WHERE id = ?", (seq, time.time(), job_id))
+            conn.commit()
+
+    def _clear_clauses(self, job_id):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM job_clauses WHERE job_id = ?", (job_id,))
+            conn.commit()
+
+    def _claim(self):
+        """Atomically takes the oldest queued job (safe across processes sharing the database)."""
+        claim = uuid.uuid4().hex
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, owner = ?, claim = ?, attempts = attempts + 1, updated_at = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1)",
+                (RUNNING, STAGES[1], os.getpid(), claim, time.time(), QUEUED),
+            )
+            conn.commit()
+            row = conn.execute("SELECT * FROM jobs WHERE claim = ?", (claim,)).fetchone()
+        return dict(row) if row else None
+
+    def _work(self):
+        while True:
+            job = self._claim()
+            if job is None:
+                # Also wakes up periodically for jobs submitted by other processes
+                self._wake.wait(1.0)
+                self._wake.clear()
+                continue
+            self._run(job)
+
+    def _run(self, job):
+        job_id = job["id"]
+        previous = json.loads(job["previous"]) if job["previous"] else None
+        with span("analyze_contract", file_name=job["file_name"], doc_bytes=job["doc_bytes"], job_id=job_id) as trace:
+            try:
+                with open(job["upload_path"], "rb") as f:
+                    text = self.engine.extract_text(f)
+                if text.startswith("Error reading file:"):
+                    raise ValueError(text)
+
+                self._update(job_id, stage="analyzing")
+                found = 0
+                analysis = None
+                for event, payload in self.engine.stream_clause_risks(text, previous=previous):
+                    if event == "clause":
+                        found += 1
+                        self._add_clause(job_id, found, payload)
+                    elif event == "result":
+                        analysis = payload
+                    else:
+                        raise RuntimeError(payload)
+
+                self._update(job_id, stage="scoring")
+                scores = self.calculator.calculate_risk_scores(text, analysis)
+                result = {"doc_id": self.store.put_text(text), "analysis_id": self.store.put_json(analysis),
+                          "scores": scores}
+                high = sum(1 for c in analysis["clauses"] if str(c.get("risk_level", "")).lower() == "high")
+                self._index(job, text, analysis, trace)
+                self._update(job_id, status=DONE, stage="done", clauses_done=len(analysis["clauses"]),
+                             result=json.dumps(result, ensure_ascii=False), previous=None,
+                             risk_score=analysis.get("risk_score"), scores=json.dumps(scores), high_clauses=high)
+            except Exception as e:
+                trace.error = str(e)
+                self._update(job_id, status=ERROR, error=str(e), previous=None)
+        # Only running jobs show their streamed clauses; a finished one has its full analysis
+        self._clear_clauses(job_id)
+        try:
+            os.remove(job["upload_path"])
+        except OSError:
+            pass
+
+    def _index(self, job, text, analysis, trace):
+        """Adds a finished analysis to the clause search index; a failure here never fails the job."""
+        if self.search is None:
+            return
+        try:
+            entities = self.engine.extract_entities(text)
+            self.search.add(job["id"], job["file_name"], analysis, entities, session=job["session"])
+        except Exception as e:
+            trace.set(search_index_error=str(e))
+
+    def _backfill_search(self):
+        """Indexes jobs that finished before the search index existed (runs once, in the background)."""
+        indexed = self.search.contract_ids()
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT id, session, file_name, result FROM jobs WHERE status = ? ORDER BY created_at", (DONE,)).fetchall()
+        for row in rows:
+            if row["id"] in indexed:
+                continue
+            job = self.get(row["id"])
+            text = self.store.text(job["result"]["doc_id"])
+            analysis = self.store.json(job["result"]["analysis_id"])
+            if text is None or analysis is None:
+                # Evicted from the document store; nothing left to index
+                continue
+            with span("search_backfill", job_id=row["id"]) as trace:
+                self._index(dict(row), text, analysis, trace)
+
+    @property
+    def calculator(self):
+        if self._calculator is None:
+            # Late import: risk_calculator pulls in pandas
+            from utils.risk_calculator import RiskCalculator
+            self._calculator = RiskCalculator()
+        return self._calculator
@@ -0,0 +1,228 @@
+import json
+
+RISK_LEVELS = {"high": "High", "medium": "Medium", "low": "Low"}
+
+
+class AnalysisValidationError(ValueError):
+    """Raised when an LLM response cannot be turned into a usable analysis."""
+
+
+class ClauseStreamParser:
+    """
+    Incremental parser for a streamed analysis response.
+    Feed it text chunks as they arrive; it returns each object of the top-level
+    "clauses" array as soon as its closing brace has been received, long before
+    the rest of the JSON is complete. Any prose before the first "{" is ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string = None
+        self._pending_key = None
+        # Stack of (bracket, key that opened it)
+        self._stack = []
+        self._clause_start = None
+
+    def feed(self, chunk):
+        """Adds text and returns a list of newly completed clause dicts."""
+        self.buffer += chunk
+        completed = []
+        buf = self.buffer
+        for pos in range(self._pos, len(buf)):
+            ch = buf[pos]
+            if not self._started:
+                if ch != "{":
+                    continue
+                self._started = True
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = buf[self._string_start + 1:pos]
+                continue
+            if ch == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif ch == ":":
+                self._pending_key = self._last_string
+            elif ch in "{[":
+                key = self._pending_key if self._stack and self._stack[-1][0] == "{" else None
+                self._stack.append((ch, key))
+                self._pending_key = None
+                if ch == "{" and self._in_clauses_array(depth=len(self._stack) - 1):
+                    self._clause_start = pos
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if ch == "}" and self._clause_start is not None and self._in_clauses_array(depth=len(self._stack)):
+                    clause = _loads_or_none(buf[self._clause_start:pos + 1])
+                    if isinstance(clause, dict):
+                        completed.append(clause)
+                    self._clause_start = None
+            elif ch == ",":
+                self._pending_key = None
+        self._pos = len(buf)
+        return completed
+
+    def _in_clauses_array(self, depth):
+        # True when the container at `depth` is the root's "clauses" array
+        return depth == 2 and self._stack[1] == ("[", "clauses")
+
+
+def _loads_or_none(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def repair_json(raw):
+    """
+    Best-effort recovery of a JSON object from LLM output: drops code fences and
+    surrounding prose, and closes strings/arrays/objects cut off by max_tokens
+    (discarding the last incomplete element). Returns a JSON string.
+    """
+    return _repair(raw)[0]
+
+
+def _repair(raw):
+    """repair_json, plus whether the response was cut off and had to be closed."""
+    start = raw.find("{")
+    if start == -1:
+        raise AnalysisValidationError("No JSON object found in the model response")
+    text = raw[start:]
+
+    stack = []
+    in_string = False
+    escape = False
+    # (cut position, closers needed) after each complete element
+    cut_points = []
+    for pos, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                # Complete root object: ignore anything after it (e.g. a closing ``` fence)
+                return text[:pos + 1], False
+            cut_points.append((pos + 1, "".join(reversed(stack))))
+        elif ch == ",":
+            cut_points.append((pos, "".join(reversed(stack))))
+
+    # Truncated: try the latest cut points first so we keep as much as possible
+    for cut, closers in reversed(cut_points[-50:]):
+        candidate = text[:cut].rstrip().rstrip(",") + closers
+        if _loads_or_none(candidate) is not None:
+            return candidate, True
+    raise AnalysisValidationError("Model response was truncated beyond repair")
+
+
+def hydrate_clause(clause, clause_texts):
+    """
+    Fills in a clause's text from its "clause_id" (the model answers with IDs such as
+    "C3" instead of echoing the text). The local segment text is authoritative.
+    """
+    if isinstance(clause, dict) and clause_texts:
+        text = clause_texts.get(str(clause.get("clause_id", "")).strip("[] "))
+        if text is not None:
+            clause = dict(clause, text=text)
+    return clause
+
+
+def validate_clause(clause):
+    """Returns (normalized clause, None) or (None, reason)."""
+    if not isinstance(clause, dict):
+        return None, "clause is not an object"
+    text = clause.get("text")
+    if not isinstance(text, str) or not text.strip():
+        return None, "missing clause text"
+    level = RISK_LEVELS.get(str(clause.get("risk_level", "")).strip().lower())
+    if level is None:
+        return None, f"invalid risk_level {clause.get('risk_level')!r}"
+    explanation = clause.get("explanation")
+    if not isinstance(explanation, str) or not explanation.strip():
+        return None, "missing explanation"
+    normalized = dict(clause)
+    normalized["text"] = text.strip()
+    normalized["risk_level"] = level
+    normalized["explanation"] = explanation.strip()
+    normalized["type"] = str(clause.get("type") or "Standard").strip()
+    return normalized, None
+
+
+def validate_analysis(data, clause_texts=None):
+    """
+    Checks an analysis dict against the expected schema.
+    Returns (analysis, invalid) where `invalid` is a list of (clause, reason)
+    for clauses that failed validation and should be retried individually.
+    """
+    if not isinstance(data, dict):
+        raise AnalysisValidationError("Analysis is not a JSON object")
+    if "error" in data and "clauses" not in data:
+        raise AnalysisValidationError(str(data["error"]))
+
+    score = data.get("risk_score")
+    try:
+        score = int(round(float(score)))
+    except (TypeError, ValueError):
+        raise AnalysisValidationError(f"Invalid risk_score {score!r}")
+    score = max(0, min(100, score))
+
+    clauses = data.get("clauses")
+    if not isinstance(clauses, list):
+        raise AnalysisValidationError("Analysis has no clauses list")
+
+    valid, invalid = [], []
+    for clause in clauses:
+        clause = hydrate_clause(clause, clause_texts)
+        normalized, reason = validate_clause(clause)
+        if normalized is None:
+            invalid.append((clause, reason))
+        else:
+            valid.append(normalized)
+
+    missing = data.get("missing_clauses") or []
+    if not isinstance(missing, list):
+        missing = [missing]
+
+    analysis = {
+        "summary": str(data.get("summary") or "").strip(),
+        "risk_score": score,
+        "clauses": valid,
+        "missing_clauses": [str(m) for m in missing],
+    }
+    return analysis, invalid
+
+
+def parse_analysis(raw, clause_texts=None):
+    """
+    Repairs, parses and validates a raw LLM response. Returns (analysis, invalid clauses).
+    `clause_texts` maps clause IDs to their text for responses that reference clauses by ID.
+    A response that was cut off (e.g. by max_tokens) is marked with analysis["truncated"].
+    """
+    if isinstance(raw, dict):
+        return validate_analysis(raw, clause_texts)
+    text, truncated = _repair(raw)
+    analysis, invalid = validate_analysis(json.loads(text), clause_texts)
+    if truncated:
+        analysis["truncated"] = True
+    return analysis, invalid
@@ -0,0 +1,112 @@
+import re
+import bisect
+import threading
+from collections import namedtuple
+from utils.devanagari import normalize_devanagari, romanized_variants
+
+KeywordMatch = namedtuple("KeywordMatch", ["start", "end", "keyword", "category"])
+ScanResult = namedtuple("ScanResult", ["counts", "matches"])
+
+# Shared scanners, one per distinct risk_indicators set
+_SCANNERS = {}
+_SCANNERS_LOCK = threading.Lock()
+
+
+# Letters and signs of either script; matras and the virama are not \w in Python's re
+_WORD_CHAR = r"[\w\u0900-\u0963\u0966-\u097f]"
+# English plural/past endings and common Hindi inflections (in normalized spelling)
+_SUFFIXES = ["s", "es", "d", "ed", "ों", "ें", "ो", "े", "ि", "ा", "ियों", "ाओं", "ाएं"]
+
+
+def _normalize_keyword(keyword):
+    return " ".join(normalize_devanagari(keyword)[0].lower().split())
+
+
+def _is_devanagari(keyword):
+    return any("\u0900" <= ch <= "\u097f" for ch in keyword)
+
+
+class KeywordScanner:
+    """
+    Precompiled whole-word matcher for a {category: [keywords]} mapping.
+    All keywords are folded into one alternation regex so a document is scanned
+    once, instead of once per keyword. Matches must start and end on a word
+    boundary, so "cost" no longer matches inside "costume"; simple plural and
+    past-tense endings ("courts", "terminated") and Hindi inflections ("न्यायालयों")
+    are still accepted.
+
+    Devanagari keywords and text are normalized the same way (nukta, chandrabindu,
+    long/short i-u matras, nasal clusters), so spelling variants match; offsets are
+    mapped back to the original text. With `transliterate=True`, each Devanagari
+    keyword also matches its romanized (Hinglish) spellings, e.g. "जुर्माना" -> "jurmana".
+    """
+
+    def __init__(self, risk_indicators, transliterate=False):
+        self.categories = list(risk_indicators.keys())
+        self.keyword_categories = {}
+        for category, keywords in risk_indicators.items():
+            for kw in keywords:
+                variants = {kw}
+                if transliterate and _is_devanagari(kw):
+                    variants |= romanized_variants(kw)
+                for variant in variants:
+                    categories = self.keyword_categories.setdefault(_normalize_keyword(variant), [])
+                    if category not in categories:
+                        categories.append(category)
+
+        # Longest first so "notice period" wins over a shorter overlapping keyword. One named
+        # group per keyword: the match says which keyword it is, so case-insensitive matches
+        # whose lowercase differs from the keyword ("İmmediate", "ſ") need no lookup by text
+        self.keywords = sorted(self.keyword_categories, key=len, reverse=True)
+        body = "|".join(f"(?P<k{i}>" + r"\s+".join(re.escape(part) for part in kw.split()) + ")"
+                        for i, kw in enumerate(self.keywords))
+        suffixes = "|".join(sorted(_SUFFIXES, key=len, reverse=True))
+        self.pattern = re.compile(
+            f"(?<!{_WORD_CHAR})(?:{body})(?:{suffixes})?(?!{_WORD_CHAR})", re.IGNORECASE
+        )
+
+    def scan(self, text, with_matches=True):
+        """Returns per-category counts plus (start, end, keyword, category) offsets for highlighting."""
+        counts = dict.fromkeys(self.categories, 0)
+        matches = []
+        normalized, offsets = normalize_devanagari(text)
+        for m in self.pattern.finditer(normalized):
+            keyword = self.keywords[int(m.lastgroup[1:])]
+            start, end = m.start(), m.end()
+            if offsets is not None:
+                start, end = offsets.original(start), offsets.original(end)
+            for category in self.keyword_categories[keyword]:
+                counts[category] += 1
+                if with_matches:
+                    matches.append(KeywordMatch(start, end, keyword, category))
+        return ScanResult(counts, matches)
+
+    def count(self, text):
+        """Per-category counts only."""
+        return self.scan(text, with_matches=False).counts
+
+
+def get_scanner(risk_indicators, transliterate=False):
+    """Returns the shared scanner for this keyword set, compiling it on first use."""
+    key = (tuple((category, tuple(keywords)) for category, keywords in risk_indicators.items()), transliterate)
+    scanner = _SCANNERS.get(key)
+    if scanner is None:
+        with _SCANNERS_LOCK:
+            scanner = _SCANNERS.get(key)
+            if scanner is None:
+                scanner = KeywordScanner(risk_indicators, transliterate)
+                _SCANNERS[key] = scanner
+    return scanner
+
+
+def group_matches_by_clause(matches, spans):
+    """Assigns keyword matches to the clause span containing them: {clause_id: {category: count}}."""
+    starts = [span.start for span in spans]
+    grouped = {}
+    for match in matches:
+        i = bisect.bisect_right(starts, match.start) - 1
+        if i < 0 or match.start >= spans[i].end:
+            continue
+        counts = grouped.setdefault(spans[i].id, {})
+        counts[match.category] = counts.get(match.category, 0) + 1
+    return grouped
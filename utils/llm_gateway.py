@@ -0,0 +1,241 @@
+import os
+import time
+import random
+import threading
+from utils.startup_profile import lazy_import, timed
+from utils.tokens import estimate_tokens
+from utils.tracing import record_usage, span, stream_span
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits, server errors, Anthropic "overloaded"
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+# Network-level failures raised by the SDK (matched by name so the SDK stays a lazy import)
+RETRYABLE_ERRORS = {"APIConnectionError", "APITimeoutError", "ConnectError", "ReadTimeout"}
+# Shortest prefix the API will cache, in tokens; shorter prompts marked cacheable are
+# silently processed uncached. Haiku models need 2048, the others 1024.
+MIN_CACHEABLE_TOKENS = {"haiku": 2048}
+DEFAULT_MIN_CACHEABLE_TOKENS = 1024
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `per_minute` units per minute (0 = unlimited)."""
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1, deadline=None):
+        """Blocks until `amount` units are available. Returns False if the deadline passes first."""
+        if not self.rate:
+            return True
+        # A single request larger than the bucket would wait forever; let it drain the bucket instead
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return True
+                wait_for = (amount - self.tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait_for > deadline:
+                return False
+            time.sleep(min(wait_for, 1.0))
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """Raised when a call (including its retries and rate-limit waits) runs past its deadline."""
+
+
+class LLMGateway:
+    """
+    Single path for every Claude call made by LegisLens.
+    - one shared client (and HTTP connection pool) per process
+    - token-bucket limits on requests and input tokens per minute, plus a concurrency cap
+    - jittered exponential backoff on 429/529/5xx and network errors
+    - a per-call deadline covering waits and retries
+    - prompt caching on static system prompts long enough for the model's minimum cacheable prefix
+    - usage accounting from each response
+    """
+
+    def __init__(self, api_key=None, requests_per_minute=None, tokens_per_minute=None,
+                 max_concurrency=None, max_retries=None, timeout=None, client=None, backend=None):
+        self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
+        # "anthropic" (default), or "fake" / "replay" / "record" (see utils/fake_anthropic.py)
+        self.backend = backend or os.getenv("LEGISLENS_LLM_BACKEND", "anthropic")
+        self.requests = TokenBucket(requests_per_minute if requests_per_minute is not None
+                                    else int(os.getenv("LEGISLENS_RPM", "50")))
+        self.input_tokens = TokenBucket(tokens_per_minute if tokens_per_minute is not None
+                                        else int(os.getenv("LEGISLENS_TPM", "50000")))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("LEGISLENS_LLM_RETRIES", "4"))
+        self.timeout = timeout or float(os.getenv("LEGISLENS_LLM_TIMEOUT", "90"))
+        self._slots = threading.BoundedSemaphore(max_concurrency or int(os.getenv("LEGISLENS_MAX_CONCURRENCY", "8")))
+        self._client = client
+        self._client_lock = threading.Lock()
+        self._usage_lock = threading.Lock()
+        self.usage = {"requests": 0, "retries": 0, "input_tokens": 0, "output_tokens": 0,
+                      "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+        # Usage is always charged to the current tracing span
+        self._listeners = [record_usage]
+
+    @property
+    def client(self):
+        offline = self.backend in ("fake", "replay")
+        if self._client is None and (self.api_key or offline):
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._make_client()
+        return self._client
+
+    def _make_client(self):
+        if self.backend in ("fake", "replay"):
+            from utils.fake_anthropic import FakeAnthropic, latency_from_env
+            return FakeAnthropic("synthetic" if self.backend == "fake" else "replay", latency=latency_from_env())
+        anthropic = lazy_import("anthropic")
+        with timed("anthropic.Anthropic()"):
+            # Retries are handled here so they share the deadline and rate limits
+            client = anthropic.Anthropic(api_key=self.api_key, max_retries=0, timeout=self.timeout)
+        if self.backend == "record":
+            from utils.fake_anthropic import RecordingAnthropic
+            client = RecordingAnthropic(client)
+        return client
+
+    def add_usage_listener(self, callback):
+        """callback(usage_dict) is called after every successful response."""
+        self._listeners.append(callback)
+
+    def create(self, deadline=None, cache_system=True, **kwargs):
+        """messages.create with rate limiting, retries and a deadline (seconds from now)."""
+        deadline_at = time.monotonic() + (deadline or self.timeout)
+        kwargs = self._prepare(kwargs, cache_system)
+        attempt = 0
+        with span("llm.create", model=kwargs["model"]) as call:
+            while True:
+                self._wait_for_capacity(kwargs, deadline_at)
+                try:
+                    with self._slots:
+                        message = self.client.messages.create(timeout=self._remaining(deadline_at), **kwargs)
+                    self._record(getattr(message, "usage", None), kwargs["model"])
+                    call.set(retries=attempt)
+                    return message
+                except Exception as e:
+                    attempt = self._backoff_or_raise(e, attempt, deadline_at)
+
+    def stream(self, deadline=None, cache_system=True, **kwargs):
+        """
+        messages.stream with the same limits; yields text deltas.
+        Failures before the first delta are retried; later ones are raised (a retry
+        would repeat text the caller has already consumed).
+        """
+        kwargs = self._prepare(kwargs, cache_system)
+        return stream_span("llm.stream", lambda call: self._stream(call, deadline, kwargs), model=kwargs["model"])
+
+    def _stream(self, call, deadline, kwargs):
+        call_started = time.monotonic()
+        deadline_at = call_started + (deadline or self.timeout)
+        attempt = 0
+        while True:
+            self._wait_for_capacity(kwargs, deadline_at)
+            started = False
+            try:
+                with self._slots:
+                    with self.client.messages.stream(timeout=self._remaining(deadline_at), **kwargs) as stream:
+                        for text in stream.text_stream:
+                            if not started:
+                                call.set(first_token_s=round(time.monotonic() - call_started, 4))
+                            started = True
+                            yield text
+                        final = stream.get_final_message() if hasattr(stream, "get_final_message") else None
+                self._record(getattr(final, "usage", None), kwargs["model"])
+                call.set(retries=attempt)
+                return
+            except Exception as e:
+                if started:
+                    raise
+                attempt = self._backoff_or_raise(e, attempt, deadline_at)
+
+    def _prepare(self, kwargs, cache_system):
+        system = kwargs.get("system")
+        if cache_system and isinstance(system, str) and estimate_tokens(system) >= self._min_cacheable(kwargs["model"]):
+            # Static system prompts are marked cacheable so repeat calls read them from the prompt cache
+            kwargs = dict(kwargs, system=[{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}])
+        return kwargs
+
+    def _min_cacheable(self, model):
+        return next((tokens for family, tokens in MIN_CACHEABLE_TOKENS.items() if family in model),
+                    DEFAULT_MIN_CACHEABLE_TOKENS)
+
+    def _wait_for_capacity(self, kwargs, deadline_at):
+        if not self.requests.acquire(1, deadline_at):
+            raise LLMDeadlineExceeded("Deadline exceeded waiting for request rate limit")
+        if not self.input_tokens.acquire(self._estimate_input(kwargs), deadline_at):
+            raise LLMDeadlineExceeded("Deadline exceeded waiting for token rate limit")
+
+    def _estimate_input(self, kwargs):
+        system = kwargs.get("system") or ""
+        if isinstance(system, list):
+            system = "".join(block.get("text", "") for block in system)
+        content = "".join(str(m.get("content", "")) for m in kwargs.get("messages", []))
+        return estimate_tokens(system) + estimate_tokens(content)
+
+    def _remaining(self, deadline_at):
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            raise LLMDeadlineExceeded("LLM call deadline exceeded")
+        return remaining
+
+    def _backoff_or_raise(self, error, attempt, deadline_at):
+        if isinstance(error, LLMDeadlineExceeded) or not self._is_retryable(error) or attempt >= self.max_retries:
+            raise error
+        # Full jitter: sleep a random time up to the exponential cap, unless the server said how long
+        delay = self._retry_after(error)
+        if delay is None:
+            delay = random.uniform(0, min(30.0, 0.5 * 2 ** attempt))
+        if time.monotonic() + delay > deadline_at:
+            raise error
+        with self._usage_lock:
+            self.usage["retries"] += 1
+        time.sleep(delay)
+        return attempt + 1
+
+    def _is_retryable(self, error):
+        if getattr(error, "status_code", None) in RETRYABLE_STATUS:
+            return True
+        return type(error).__name__ in RETRYABLE_ERRORS
+
+    def _retry_after(self, error):
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return None
+
+    def _record(self, usage, model):
+        record = {"model": model}
+        for field in ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens"):
+            record[field] = getattr(usage, field, None) or 0
+        with self._usage_lock:
+            self.usage["requests"] += 1
+            for field, value in record.items():
+                if field != "model":
+                    self.usage[field] += value
+        for callback in self._listeners:
+            callback(record)
+
+
+_GATEWAY = None
+_GATEWAY_LOCK = threading.Lock()
+
+
+def get_gateway():
+    """Returns the process-wide gateway shared by every NLPEngine."""
+    global _GATEWAY
+    if _GATEWAY is None:
+        with _GATEWAY_LOCK:
+            if _GATEWAY is None:
+                _GATEWAY = LLMGateway()
+    return _GATEWAY
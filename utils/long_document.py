@@ -0,0 +1,112 @@
+import json
+from utils.json_stream import repair_json
+
+RISK_RANK = {"low": 0, "medium": 1, "high": 2}
+
+
+def group_spans(spans, max_chars=15000, overlap=1000):
+    """
+    Packs consecutive clause spans (see clause_segmenter) into chunks of at most
+    `max_chars` characters, so chunks always end on a clause boundary.
+    Consecutive chunks repeat up to `overlap` characters of trailing clauses for context.
+    Returns a list of span lists.
+    """
+    groups = []
+    current = []
+    size = 0
+    for span in spans:
+        length = span.end - span.start
+        if current and size + length > max_chars:
+            groups.append(current)
+            # Carry trailing clauses over as context for the next chunk
+            carried = []
+            carried_size = 0
+            for prev in reversed(current):
+                if carried_size + (prev.end - prev.start) > overlap:
+                    break
+                carried.insert(0, prev)
+                carried_size += prev.end - prev.start
+            current, size = carried, carried_size
+        current.append(span)
+        size += length
+    if current:
+        groups.append(current)
+    return groups
+
+
+def parse_analysis_json(raw):
+    """Pulls the JSON object out of an LLM response (which sometimes wraps it in text)."""
+    if isinstance(raw, dict):
+        return raw
+    return json.loads(repair_json(raw))
+
+
+# Chunks may trim the same clause differently at its end, so free text is matched on its start
+_TEXT_KEY_CHARS = 80
+# The merged summary keeps the first few distinct chunk summaries instead of growing with the page count
+MAX_SUMMARIES = 3
+
+
+def _clause_key(clause):
+    # Clause IDs must match exactly
+    if clause.get("clause_id"):
+        return "#" + str(clause["clause_id"])
+    return " ".join(str(clause.get("text", "")).split()).lower()[:_TEXT_KEY_CHARS]
+
+
+def _text_length(clause):
+    return len(" ".join(str(clause.get("text", "")).split()))
+
+
+def merge_analyses(results):
+    """
+    Reduces per-chunk analyses into a single result with the usual
+    summary / risk_score / clauses / missing_clauses schema.
+    """
+    merged_clauses = []
+    positions = {}
+    for result in results:
+        for clause in result.get("clauses", []):
+            key = _clause_key(clause)
+            if not key:
+                continue
+            # Overlapping chunks report the same clause twice (sometimes trimmed differently)
+            dup = positions.get(key)
+            if dup is None:
+                positions[key] = len(merged_clauses)
+                merged_clauses.append(clause)
+                continue
+            existing = merged_clauses[dup]
+            new_rank = RISK_RANK.get(str(clause.get("risk_level", "")).lower(), 0)
+            old_rank = RISK_RANK.get(str(existing.get("risk_level", "")).lower(), 0)
+            if new_rank > old_rank or (new_rank == old_rank and _text_length(clause) > _text_length(existing)):
+                merged_clauses[dup] = clause
+
+    # A type is only missing if no chunk found a clause of that type
+    present = {str(c.get("type", "")).lower() for c in merged_clauses}
+    missing = {}
+    for result in results:
+        for item in result.get("missing_clauses", []):
+            if str(item).lower() not in present:
+                missing.setdefault(str(item), item)
+
+    summaries = []
+    for result in results:
+        summary = str(result.get("summary", "")).strip()
+        if summary and summary not in summaries:
+            summaries.append(summary)
+            if len(summaries) == MAX_SUMMARIES:
+                break
+
+    scores = [r["risk_score"] for r in results if isinstance(r.get("risk_score"), (int, float))]
+
+    merged = {
+        "summary": " ".join(summaries),
+        # One risky section makes the whole contract risky
+        "risk_score": max(scores) if scores else 0,
+        "clauses": merged_clauses,
+        "missing_clauses": list(missing.values()),
+    }
+    if any(result.get("truncated") for result in results):
+        merged["truncated"] = True
+    return merged
@@ -1,63 +1,46 @@
 import os
 import json
-import anthropic
-import spacy
-import PyPDF2
-import docx
+import queue
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+from utils.clause_index import ClauseIndex
+from utils.clause_segmenter import segment_clauses, label_clauses
+from utils.contract_templates import TEMPLATE_VERSION, bespoke_sections, clean_params, load_skeleton, render
+from utils.entity_extractor import EntityExtractor
+from utils.extraction import iter_segments
+from utils.hindi_screening import SHRINK, SKIP, screen_document
+from utils.json_stream import ClauseStreamParser, hydrate_clause, parse_analysis, repair_json, validate_clause
+from utils.llm_gateway import get_gateway
+from utils.long_document import group_spans, merge_analyses
+from utils.prompt_compactor import compact_contract, compact_prompt, normalize_whitespace, strip_page_furniture
+from utils.result_cache import ResultCache, make_key, normalize_text
+from utils.revisions import clause_hash, diff_versions, order_clauses, plan_revision, reused_clauses
+from utils.tracing import propagate, span, stream_span
 
 # Load environment variables
 load_dotenv()
-                
-class NLPEngine:
-    def __init__(self):
-        self.api_key = os.getenv("ANTHROPIC_API_KEY")
-        if self.api_key:
-            self.client = anthropic.Anthropic(api_key=self.api_key)
-        else:
-            self.client = None
-            
-        # Specific model requested for cost efficiency
-        self.model = "claude-3-haiku-20240307" 
-        
-        # Load small spacy model for fast entity extraction without LLM tokens
-        # Note: Model must be installed via requirements.txt for cloud deployment
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            # On cloud, if requirements failed, we can't download at runtime due to permissions.
-            # Use a blank model as fallback to prevent crash, but entity extraction will be limited.
-            self.nlp = spacy.blank("en")
 
-    def extract_text(self, uploaded_file):
-        """Extracts text from PDF, DOCX, or TXT files."""
-        text = ""
-        try:
-            if uploaded_file.name.endswith('.pdf'):
-                pdf_reader = PyPDF2.PdfReader(uploaded_file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-            elif uploaded_file.name.endswith('.docx'):
-                doc = docx.Document(uploaded_file)
-                for para in doc.paragraphs:
-                    text += para.text + "\n"
-            else:
-                # Assume text file
-                text = uploaded_file.read().decode("utf-8")
-        except Exception as e:
-            return f"Error reading file: {str(e)}"
-        
-        return text
+# Output of NLPEngine._prepare_clauses: the compacted text's clauses and how they will be sent
+# known: {clause_id: verdict} for clauses matched in the clause index (not sent)
+PreparedContract = namedtuple("PreparedContract", ["compaction", "spans", "clause_texts", "groups", "screening", "known"])
 
-    def analyze_clause_risks(self, contract_text):
-        """
-        Uses Claude 3 Haiku to analyze risks in the contract.
-        Returns a JSON structure with risk assessment.
-        """
-        if not self.client:
-            return {"error": "API Key missing"}
+TEMPLATE_SYSTEM_PROMPT = ("You are an expert legal drafter for Indian contracts. Your goal is to draft a 'Low Risk', "
+                          "'Fair', and 'Balanced' agreement that protects both parties equally.")
+
+# Bump whenever ANALYSIS_SYSTEM_PROMPT changes so cached analyses are not reused
+ANALYSIS_PROMPT_VERSION = "5"
+
+# Static grading rubric, type guide, glossary and worked example shared by every analysis call.
+# With it the system prompt is past Haiku's 2048-token minimum, so it is read from the prompt
+# cache on repeat calls instead of being billed in full each time.
+_PROMPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "prompts")
+with open(os.path.join(_PROMPTS_DIR, "analysis_reference.md"), encoding="utf-8") as _f:
+    ANALYSIS_REFERENCE = _f.read()
 
-        system_prompt = """You are a high-end legal assistant for Indian SMEs. 
+# Indentation is stripped by compact_prompt so it is not billed as input tokens
+ANALYSIS_SYSTEM_PROMPT = compact_prompt("""You are a high-end legal assistant for Indian SMEs. 
         Analyze the contract text for risks (Employment, Vendor, Lease, etc.).
         
         CRITICAL INSTRUCTIONS FOR MULTILINGUAL INPUTS:
@@ -73,6 +56,8 @@ class NLPEngine:
            If a clause in Hindi is "Kiraya", map it to "Payment/Rent".
         3. Even if the contract is safe, list the key clauses with "Low" risk. DO NOT return an empty list.
         4. For Employment Agreements, specifically look for "Bond/Training Cost", "Notice Period", and "Non-Compete".
+        5. The contract is pre-split into clauses labelled [C1], [C2], ... Refer to each clause by its "clause_id".
+           Do NOT repeat the clause text in your answer.
         
         RISK SCORING RULES:
         - Indemnity/Unlimited Liability: HIGH RISK (Score > 80)
@@ -86,55 +71,564 @@ class NLPEngine:
             "summary": "Brief summary...",
             "risk_score": 0-100 (Standard contracts should be 20-40. High Risk starts at 75),
             "clauses": [
-                {"text": "original clause text...", "explanation": "simple explanation", "risk_level": "High/Medium/Low", "type": "Standard Type (e.g. Termination)"}
+                {"clause_id": "C3", "explanation": "simple explanation", "risk_level": "High/Medium/Low", "type": "Standard Type (e.g. Termination)"}
             ],
             "missing_clauses": ["List of standard clauses missing..."]
         }
+        """) + "\n\n" + compact_prompt(ANALYSIS_REFERENCE)
+
+class NLPEngine:
+    def __init__(self, use_cache=True, cache=None, long_document=True, chunk_chars=15000,
+                 chunk_overlap=1000, max_workers=None, extract_max_pages=None,
+                 extract_max_bytes=None, extract_workers=None, token_budget=None, gateway=None,
+                 hindi_screening=None, clause_index=None):
+        # Every Claude call goes through the shared gateway (pooled client, rate limits,
+        # retries). The client and the spaCy model are both built lazily.
+        self.gateway = gateway or get_gateway()
+        # NER-only spaCy pipeline over paragraph chunks
+        self.entities = EntityExtractor()
+            
+        # Specific model requested for cost efficiency
+        self.model = "claude-3-haiku-20240307" 
+
+        # Persistent content-addressed cache for analyses (opt out with use_cache=False)
+        self.use_cache = use_cache
+        self.cache = cache or ResultCache(namespace="analysis", enabled=use_cache)
+        # Bespoke sections of library templates, per (type, params)
+        self.template_cache = ResultCache(namespace="template_sections", enabled=use_cache)
+        # Verdicts of near-identical clauses from earlier contracts are reused instead of re-sent
+        self.clause_index = clause_index or ClauseIndex(
+            namespace=f"{self.model}:{ANALYSIS_PROMPT_VERSION}", enabled=use_cache)
+
+        # Long-document mode: contracts above chunk_chars are analyzed as concurrent chunks
+        self.long_document = long_document
+        self.chunk_chars = chunk_chars
+        self.chunk_overlap = chunk_overlap
+        self.max_workers = max_workers or int(os.getenv("LEGISLENS_MAX_WORKERS", "4"))
+
+        # Optional input-token budget: above it, low-risk clauses are dropped before sending
+        if token_budget is None and os.getenv("LEGISLENS_TOKEN_BUDGET"):
+            token_budget = int(os.getenv("LEGISLENS_TOKEN_BUDGET"))
+        self.token_budget = token_budget
+
+        # Optional local keyword screen for Hindi contracts: skip or shrink the Claude call.
+        # Off by default, since the keyword list is only a heuristic
+        if hindi_screening is None:
+            hindi_screening = os.getenv("LEGISLENS_HINDI_SCREENING", "0") == "1"
+        self.hindi_screening = hindi_screening
+
+        # Extraction limits (early exit for huge uploads) and optional PDF process pool
+        self.extract_max_pages = extract_max_pages
+        self.extract_max_bytes = extract_max_bytes
+        if extract_workers is None:
+            extract_workers = int(os.getenv("LEGISLENS_EXTRACT_WORKERS", "0"))
+        self.extract_workers = extract_workers
+
+    @property
+    def client(self):
+        return self.gateway.client
+
+    @property
+    def nlp(self):
+        return self.entities.nlp
+
+    def extract_text(self, uploaded_file):
+        """Extracts text from PDF, DOCX, or TXT files (PDF page headers/footers removed)."""
+        name = getattr(uploaded_file, "name", "")
+        with span("extract", file_type=name.rsplit(".", 1)[-1].lower(), doc_bytes=getattr(uploaded_file, "size", None)) as stage:
+            try:
+                text = "".join(segment.text for segment in self.iter_text(uploaded_file))
+                # Page-aware step that needs the PAGE_BREAK markers; the returned text has none
+                text, removed_lines = strip_page_furniture(text)
+                stage.set(doc_chars=len(text), removed_lines=removed_lines)
+                return text
+            except Exception as e:
+                stage.error = str(e)
+                return f"Error reading file: {str(e)}"
+
+    def iter_text(self, uploaded_file):
+        """Streams (index, offset, text) segments - pages for PDF, paragraphs for DOCX."""
+        return iter_segments(
+            uploaded_file,
+            max_pages=self.extract_max_pages,
+            max_bytes=self.extract_max_bytes,
+            workers=self.extract_workers,
+        )
+
+    def analyze_clause_risks(self, contract_text, previous=None):
+        """
+        Uses Claude 3 Haiku to analyze risks in the contract.
+        Returns the validated analysis as a JSON string, or {"error": ...}.
+        Contracts longer than `chunk_chars` are split into overlapping chunks that are
+        analyzed concurrently and merged back into a single result.
+        `previous` is the analysis of an earlier version of the same contract: only
+        added/changed clauses are sent, and the result carries a clause-level diff.
         """
+        with span("analysis", doc_chars=len(contract_text), revision=previous is not None) as stage:
+            result = self._analyze_clause_risks(contract_text, stage, previous)
+            if isinstance(result, dict):
+                stage.error = result.get("error")
+            return result
 
+    def _analyze_clause_risks(self, contract_text, stage, previous):
+        if not self.client:
+            return {"error": "API Key missing"}
+
+        cache_key = self._analysis_cache_key(contract_text)
+        cached = self.cache.get(cache_key)
+        stage.set(cache_hit=cached is not None)
+        if cached is not None:
+            if previous is None:
+                return cached
+            analysis = json.loads(cached)
+            self._attach_diff(analysis, previous, self._prepare_clauses(contract_text).clause_texts)
+            return json.dumps(analysis, ensure_ascii=False)
+
+        prepared = self._prepare_clauses(contract_text)
+        clause_texts = prepared.clause_texts
+        plan = self._plan_revision(prepared, previous)
+
+        if plan is not None:
+            analysis = self._analyze_revision(plan, clause_texts)
+            if "error" in analysis:
+                return analysis
+        elif not prepared.groups:
+            analysis = self._screened_analysis()
+        elif len(prepared.groups) == 1:
+            raw = self._request_analysis(label_clauses(prepared.groups[0]), self._analysis_preface(prepared))
+            if isinstance(raw, dict):
+                return raw
+            try:
+                analysis = self._finalize_analysis(raw, clause_texts)
+            except ValueError as e:
+                return {"error": f"Could not parse analysis: {e}"}
+        else:
+            analysis = self._analyze_long_document(prepared.groups, clause_texts,
+                                                   preface=self._analysis_preface(prepared))
+            if "error" in analysis:
+                return analysis
+
+        self._remember_verdicts(analysis, prepared, plan)
+        self._add_reports(analysis, prepared)
+        result = json.dumps(analysis, ensure_ascii=False)
+        self.cache.put(cache_key, result)
+        if previous is not None:
+            self._attach_diff(analysis, previous, clause_texts, plan)
+            result = json.dumps(analysis, ensure_ascii=False)
+        return result
+
+    def stream_clause_risks(self, contract_text, previous=None):
+        """
+        Streaming variant of analyze_clause_risks. Yields events as they happen:
+          ("clause", clause)   - each clause as soon as it has fully arrived
+          ("result", analysis) - the final validated analysis (always last on success)
+          ("error", message)   - analysis failed; nothing else follows
+        """
+        def events(stage):
+            for event, payload in self._stream_clause_risks(contract_text, stage, previous):
+                if event == "error":
+                    stage.error = payload
+                yield event, payload
+
+        return stream_span("analysis", events, doc_chars=len(contract_text), streamed=True,
+                           revision=previous is not None)
+
+    def _stream_clause_risks(self, contract_text, stage, previous):
+        if not self.client:
+            yield ("error", "API Key missing")
+            return
+
+        cache_key = self._analysis_cache_key(contract_text)
+        cached = self.cache.get(cache_key)
+        stage.set(cache_hit=cached is not None)
+        if cached is not None:
+            analysis = json.loads(cached)
+            if previous is not None:
+                self._attach_diff(analysis, previous, self._prepare_clauses(contract_text).clause_texts)
+            for clause in analysis["clauses"]:
+                yield ("clause", clause)
+            yield ("result", analysis)
+            return
+
+        prepared = self._prepare_clauses(contract_text)
+        clause_texts = prepared.clause_texts
+        groups = prepared.groups
+        plan = self._plan_revision(prepared, previous)
+
+        emitted = set()
         try:
-            message = self.client.messages.create(
+            if plan is not None:
+                # Small redline: one request for the changed clauses only, not worth streaming
+                analysis = self._analyze_revision(plan, clause_texts)
+                if "error" in analysis:
+                    yield ("error", analysis["error"])
+                    return
+            elif not groups:
+                analysis = self._screened_analysis()
+            elif len(groups) == 1:
+                parser = ClauseStreamParser()
+                for chunk in self._stream_analysis(label_clauses(groups[0]), self._analysis_preface(prepared)):
+                    for clause in parser.feed(chunk):
+                        clause, _ = validate_clause(hydrate_clause(clause, clause_texts))
+                        if clause is not None and clause["text"] not in emitted:
+                            emitted.add(clause["text"])
+                            yield ("clause", clause)
+                analysis = self._finalize_analysis(parser.buffer, clause_texts)
+            else:
+                # Chunks finish in any order; surface each chunk's clauses as it completes
+                events = queue.Queue()
+                outcome = {}
+
+                def run():
+                    outcome["analysis"] = self._analyze_long_document(groups, clause_texts, on_result=events.put,
+                                                                      preface=self._analysis_preface(prepared))
+                    events.put(None)
+
+                threading.Thread(target=propagate(run), daemon=True).start()
+                for partial in iter(events.get, None):
+                    for clause in partial["clauses"]:
+                        if clause["text"] not in emitted:
+                            emitted.add(clause["text"])
+                            yield ("clause", clause)
+                analysis = outcome["analysis"]
+                if "error" in analysis:
+                    yield ("error", analysis["error"])
+                    return
+        except Exception as e:
+            yield ("error", str(e))
+            return
+
+        self._remember_verdicts(analysis, prepared, plan)
+        # Clauses that only became valid after an individual retry (or reused from the clause index)
+        for clause in analysis["clauses"]:
+            if clause["text"] not in emitted:
+                yield ("clause", clause)
+        self._add_reports(analysis, prepared)
+        self.cache.put(cache_key, json.dumps(analysis, ensure_ascii=False))
+        if previous is not None:
+            self._attach_diff(analysis, previous, clause_texts, plan)
+        yield ("result", analysis)
+
+    def _analysis_cache_key(self, contract_text):
+        return make_key(normalize_text(contract_text), self.model, ANALYSIS_PROMPT_VERSION,
+                        self.token_budget, self.hindi_screening)
+
+    def _prepare_clauses(self, contract_text):
+        """
+        Compacts the text, segments it into labelled clauses and groups them into request-sized chunks.
+        Hindi contracts are screened locally first: clearly low-risk ones get no groups (no Claude
+        call) or only the clauses that contain risk keywords.
+        """
+        with span("prepare") as stage:
+            compaction = compact_contract(contract_text, self.token_budget)
+            spans = segment_clauses(compaction.text)
+            clause_texts = {clause.id: clause.text for clause in spans}
+            screening = screen_document(compaction.text, spans) if self.hindi_screening else None
+            known = {}
+            if screening is not None and screening.decision == SKIP:
+                groups = []
+            else:
+                if screening is not None and screening.decision == SHRINK:
+                    spans_to_send = [clause for clause in spans if clause.id in screening.hit_clauses]
+                else:
+                    spans_to_send = spans
+                known = self.clause_index.lookup({clause.id: clause.text for clause in spans_to_send})
+                # Everything known still gets one short request for the summary and score
+                groups = self._group_clauses([clause for clause in spans_to_send if clause.id not in known])
+            stage.set(tokens_before=compaction.tokens_before, tokens_after=compaction.tokens_after,
+                      clauses=len(spans), chunks=len(groups), known_clauses=len(known),
+                      screening=screening.decision if screening else None)
+        return PreparedContract(compaction, spans, clause_texts, groups, screening, known)
+
+    def _analysis_preface(self, prepared):
+        """User-prompt preface; lists the clauses whose verdicts come from the clause index."""
+        if not prepared.known:
+            return "Analyze this contract:"
+        flagged = [f"[{clause_id}] {verdict.get('type', 'Standard')}: {verdict['risk_level']} risk"
+                   for clause_id, verdict in prepared.known.items() if verdict]
+        return compact_prompt(f"""Clauses {", ".join(prepared.known)} of this contract match clauses analyzed
+            before and are not included below. Their verdicts: {"; ".join(flagged) or "none flagged"}.
+            Analyze the remaining clauses below (do not repeat the ones listed), and give summary,
+            risk_score and missing_clauses for the whole contract:""")
+
+    def _remember_verdicts(self, analysis, prepared, plan=None):
+        """
+        Adds the clauses Claude gave an explicit verdict for to the clause index and merges the
+        reused verdicts of known clauses into `analysis` in document order. A clause missing from
+        the answer was not necessarily judged (the prompt asks for "at least 5"), and a truncated
+        answer may have lost verdicts, so neither is ever stored as "not flagged".
+        """
+        clause_texts = prepared.clause_texts
+        if plan is not None:
+            sent = set(plan.changed)
+        else:
+            sent = {clause.id for group in prepared.groups for clause in group}
+        if not analysis.get("truncated"):
+            self.clause_index.add({
+                clause_texts[c["clause_id"]]: {k: v for k, v in c.items() if k not in ("text", "clause_id")}
+                for c in analysis["clauses"] if c.get("clause_id") in sent
+            })
+        if prepared.known and plan is None:
+            reused = [dict(verdict, clause_id=clause_id, text=clause_texts[clause_id])
+                      for clause_id, verdict in prepared.known.items() if verdict]
+            fresh = [c for c in analysis["clauses"] if c.get("clause_id") not in prepared.known]
+            analysis["clauses"] = order_clauses(reused + fresh, clause_texts)
+
+    def _plan_revision(self, prepared, previous):
+        """
+        A RevisionPlan when `previous` is an earlier version of this contract and the
+        changed clauses fit in one request; None means analyze the whole document.
+        """
+        if previous is None or not prepared.groups:
+            return None
+        plan = plan_revision(prepared.clause_texts, previous)
+        if plan is None:
+            return None
+        if sum(len(prepared.clause_texts[clause_id]) for clause_id in plan.changed) > self.chunk_chars:
+            # Not a small redline any more
+            return None
+        return plan
+
+    def _analyze_revision(self, plan, clause_texts):
+        """
+        Re-analyzes only the added/changed clauses of a revised contract, with the
+        previous verdicts of unchanged clauses as context. Returns the full analysis.
+        """
+        previous = plan.previous
+        reused = reused_clauses(plan, clause_texts)
+        with span("revision", changed=len(plan.changed), reused=len(plan.reused)):
+            if not plan.changed:
+                analysis = {
+                    "summary": previous.get("summary", ""),
+                    "risk_score": previous.get("risk_score", 0),
+                    "clauses": reused,
+                    "missing_clauses": previous.get("missing_clauses", []),
+                }
+                return analysis
+
+            flagged = [f"[{c['clause_id']}] {c.get('type', 'Standard')}: {c['risk_level']} risk" for c in reused]
+            preface = compact_prompt(f"""This is a revised version of a contract analyzed before.
+            Previous overall risk score: {previous.get("risk_score")}.
+            Unchanged clauses already flagged (do not repeat them): {"; ".join(flagged) or "none"}.
+            {len(plan.reused) - len(reused)} other unchanged clauses were not flagged.
+            Analyze only the new or changed clauses below, and give summary, risk_score and
+            missing_clauses for the whole revised contract:""")
+            changed = set(plan.changed)
+            labelled = "\n\n".join(f"[{clause_id}] {text}" for clause_id, text in clause_texts.items() if clause_id in changed)
+            raw = self._request_analysis(labelled, preface=preface)
+            if isinstance(raw, dict):
+                return raw
+            try:
+                analysis = self._finalize_analysis(raw, clause_texts)
+            except ValueError as e:
+                return {"error": f"Could not parse analysis: {e}"}
+            # The model may only judge the clauses it was sent
+            fresh = [c for c in analysis["clauses"] if c.get("clause_id") in changed]
+            analysis["clauses"] = order_clauses(reused + fresh, clause_texts)
+            return analysis
+
+    def _attach_diff(self, analysis, previous, clause_texts, plan=None):
+        """
+        Adds analysis["revision"]: version number and clause-level diff against `previous`.
+        Nothing is added when `previous` is a different contract. `plan` is set when the
+        analysis was done incrementally.
+        """
+        related = plan or plan_revision(clause_texts, previous)
+        if related is None:
+            return
+        analysis["revision"] = {
+            "version": previous.get("revision", {}).get("version", 1) + 1,
+            "incremental": plan is not None,
+            "clauses_sent": len(plan.changed) if plan else None,
+            "clauses_reused": len(plan.reused) if plan else None,
+            "diff": diff_versions(previous, analysis, clause_texts, related.hashes),
+        }
+
+    def _screened_analysis(self):
+        """
+        Result for a Hindi contract the local screen found no risk keywords in. It was never
+        reviewed, so it has no risk score (like a failed analysis, nothing is made up).
+        """
+        return {
+            "summary": "Local keyword screening found no risk indicators in this Hindi contract, "
+                       "so it was not sent for AI review. It has not been analyzed.",
+            "risk_score": None,
+            "analyzed": False,
+            "clauses": [],
+            "missing_clauses": [],
+        }
+
+    def _add_reports(self, analysis, prepared):
+        compaction, screening = prepared.compaction, prepared.screening
+        analysis["compaction"] = {
+            "tokens_before": compaction.tokens_before,
+            "tokens_after": compaction.tokens_after,
+            "dropped_clauses": compaction.dropped_clauses,
+        }
+        if screening is not None and screening.decision == SHRINK:
+            analysis["summary"] += (f" (Note: only the {len(screening.hit_clauses)} of {len(prepared.spans)} "
+                                    f"clauses with risk keywords were reviewed.)")
+        if screening is not None:
+            analysis["screening"] = {
+                "decision": screening.decision,
+                "keyword_hits": screening.hits,
+                "hits_per_1k_chars": screening.density,
+                "clauses_sent": len(screening.hit_clauses) if screening.decision == SHRINK else None,
+            }
+        if prepared.known:
+            analysis["clause_index"] = {
+                "matched_clauses": len(prepared.known),
+                "flagged": sum(1 for verdict in prepared.known.values() if verdict),
+            }
+        # Fingerprints of every clause, so the next version can be diffed against this one
+        analysis["clause_hashes"] = [clause_hash(text) for text in prepared.clause_texts.values()]
+
+    def _group_clauses(self, spans):
+        """One group for normal contracts; clause-aligned chunks in long-document mode."""
+        groups = group_spans(spans, self.chunk_chars, self.chunk_overlap) or [[]]
+        if not self.long_document:
+            # Truncate for safety/cost
+            return groups[:1]
+        return groups
+
+    def _request_analysis(self, contract_text, preface="Analyze this contract:"):
+        """Single Claude call over (a chunk of) the labelled contract. Returns the raw response text."""
+        try:
+            message = self.gateway.create(
                 max_tokens=4000,
                 temperature=0,
-                system=system_prompt,
+                system=ANALYSIS_SYSTEM_PROMPT,
                 messages=[
-                    {"role": "user", "content": f"Analyze this contract:\n\n{contract_text[:15000]}"} # Truncate for safety/cost
+                    {"role": "user", "content": f"{preface}\n\n{contract_text}"}
                 ],
                 model=self.model,
             )
-            # Simplistic parsing - in production we'd use robust JSON extraction
             return message.content[0].text
         except Exception as e:
             return {"error": str(e)}
 
+    def _stream_analysis(self, contract_text, preface="Analyze this contract:"):
+        """Streaming Claude call over (a chunk of) the labelled contract. Yields raw text deltas."""
+        for text in self.gateway.stream(
+            max_tokens=4000,
+            temperature=0,
+            system=ANALYSIS_SYSTEM_PROMPT,
+            messages=[
+                {"role": "user", "content": f"{preface}\n\n{contract_text}"}
+            ],
+            model=self.model,
+        ):
+            yield text
+
+    def _finalize_analysis(self, raw, clause_texts=None):
+        """
+        Repairs and validates a raw response. Clauses that fail validation are
+        retried one by one instead of re-running the whole document.
+        Raises AnalysisValidationError if the response is unusable.
+        """
+        with span("parse") as stage:
+            analysis, invalid = parse_analysis(raw, clause_texts)
+            stage.set(clauses=len(analysis["clauses"]), invalid=len(invalid))
+        for clause, reason in invalid:
+            fixed = self._retry_clause(clause, reason, clause_texts)
+            if fixed is not None:
+                analysis["clauses"].append(fixed)
+        return analysis
+
+    def _retry_clause(self, clause, reason, clause_texts=None):
+        """
+        Asks the model to re-emit a single malformed clause by its clause_id; the text is
+        filled in locally, as in the main response. Returns it validated, or None.
+        """
+        prompt = compact_prompt(f"""This clause entry from a contract risk analysis is invalid ({reason}):
+        {json.dumps(clause, ensure_ascii=False)}
+
+        Return ONLY a JSON object with keys "clause_id" (e.g. "C3"), "explanation" (simple explanation),
+        "risk_level" ("High", "Medium" or "Low") and "type" (standard clause type, e.g. Termination).
+        Do NOT repeat the clause text.""")
+        try:
+            message = self.gateway.create(
+                max_tokens=600,
+                temperature=0,
+                system=ANALYSIS_SYSTEM_PROMPT,
+                messages=[{"role": "user", "content": prompt}],
+                model=self.model,
+            )
+            fixed = json.loads(repair_json(message.content[0].text))
+            if isinstance(fixed, dict) and clause.get("clause_id") and clause.get("text"):
+                # Keep the link to the local clause segment
+                fixed.update(clause_id=clause["clause_id"])
+            fixed, _ = validate_clause(hydrate_clause(fixed, clause_texts))
+            return fixed
+        except Exception:
+            return None
+
+    def _analyze_long_document(self, groups, clause_texts, on_result=None, preface="Analyze this contract:"):
+        """
+        Map-reduce over groups of clauses with a bounded worker pool.
+        `on_result` is called with each chunk's analysis as soon as it finishes.
+        Returns the merged analysis dict, or {"error": ...}.
+        """
+        results = []
+        errors = []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(groups))) as pool:
+            futures = {pool.submit(propagate(self._request_analysis), label_clauses(group), preface): index
+                       for index, group in enumerate(groups)}
+            for future in as_completed(futures):
+                raw = future.result()
+                if isinstance(raw, dict) and "error" in raw:
+                    errors.append(raw["error"])
+                    continue
+                try:
+                    analysis = self._finalize_analysis(raw, clause_texts)
+                except ValueError as e:
+                    errors.append(str(e))
+                    continue
+                results.append((futures[future], analysis))
+                if on_result:
+                    on_result(analysis)
+
+        if not results:
+            return {"error": errors[0] if errors else "No analysis returned"}
+
+        # Merge in document order, whatever order the chunks finished in
+        merged = merge_analyses([analysis for _, analysis in sorted(results, key=lambda r: r[0])])
+        if errors:
+            merged["summary"] += f" (Note: {len(errors)} of {len(groups)} sections could not be analyzed.)"
+            merged["failed_chunks"] = len(errors)
+        return merged
+
     def extract_entities(self, text):
         """Extracts parties and dates using spaCy to save LLM tokens."""
-        doc = self.nlp(text)
-        entities = {
-            "ORG": [],
-            "PERSON": [],
-            "DATE": [],
-            "GPE": []
-        }
-        for ent in doc.ents:
-            if ent.label_ in entities:
-                if ent.text not in entities[ent.label_]:
-                    entities[ent.label_].append(ent.text)
-        return entities
+        with span("entities", doc_chars=len(text)):
+            return self.entities.extract(text)
+
+    def extract_entity_spans(self, text):
+        """Entities with character offsets: [Entity(label, text, start, end), ...]."""
+        with span("entities", doc_chars=len(text), offsets=True):
+            return self.entities.entity_spans(text)
+
+    def extract_entities_batch(self, texts):
+        """extract_entities for many contracts in one batched spaCy pass."""
+        with span("entities", doc_chars=sum(len(t) for t in texts), documents=len(texts)):
+            return self.entities.extract_batch(texts)
+
+    def _negotiation_prompt(self, clause_text, issue_description):
+        return compact_prompt(f"""Draft a professional email for an SME owner to send to a vendor/landlord.
+        Context: The contract clause says: "{clause_text}"
+        Issue: {issue_description}
+        Goal: Request a modification to make it fairer.
+        Tone: Professional, firm but polite.
+        """)
 
     def draft_negotiation_email(self, clause_text, issue_description):
         """Drafts a polite negotiation email for a specific clause."""
         if not self.client:
             return "Error: No API Key."
             
-        prompt = f"""Draft a professional email for an SME owner to send to a vendor/landlord.
-        Context: The contract clause says: "{clause_text}"
-        Issue: {issue_description}
-        Goal: Request a modification to make it fairer.
-        Tone: Professional, firm but polite.
-        """
+        prompt = self._negotiation_prompt(clause_text, issue_description)
         
-        message = self.client.messages.create(
+        message = self.gateway.create(
             max_tokens=1000,
             temperature=0.7,
             messages=[{"role": "user", "content": prompt}],
@@ -142,15 +636,88 @@ class NLPEngine:
         )
         return message.content[0].text
 
+    def stream_negotiation_email(self, clause_text, issue_description):
+        """Same as draft_negotiation_email, but yields the draft piece by piece as it is generated."""
+        if not self.client:
+            yield "Error: No API Key."
+            return
+
+        prompt = self._negotiation_prompt(clause_text, issue_description)
+
+        for text in self.gateway.stream(
+            max_tokens=1000,
+            temperature=0.7,
+            messages=[{"role": "user", "content": prompt}],
+            model=self.model,
+        ):
+            yield text
+
     def generate_contract_template(self, template_type, params):
-        """Generates a legal contract template based on user inputs."""
+        """
+        Drafts a contract from the local template library: party and amount fields are filled
+        in from `params`, and Claude only writes the short bespoke sections (cached per type and
+        params). Types without a skeleton are drafted by Claude from scratch.
+        """
+        details = clean_params(params)
+        skeleton = load_skeleton(template_type)
+        if skeleton is None:
+            return self._draft_contract(template_type, details)
+
+        with span("template", template_type=template_type, source="library") as stage:
+            sections = bespoke_sections(skeleton)
+            written = self._write_sections(template_type, sections, details, stage) if sections else {}
+            stage.set(bespoke_sections=len(sections))
+            return render(skeleton, details, written)
+
+    def _write_sections(self, template_type, sections, details, stage):
+        """{section name: text} for the bespoke sections, written concurrently. Failed ones are left out."""
+        key = make_key(template_type, json.dumps(details, sort_keys=True, ensure_ascii=False),
+                       self.model, TEMPLATE_VERSION)
+        cached = self.template_cache.get(key)
+        stage.set(cache_hit=cached is not None)
+        if cached is not None:
+            return json.loads(cached)
+        if not self.client:
+            # Offline: the draft keeps [bracketed] placeholders for these sections
+            return {}
+
+        written = {}
+        with ThreadPoolExecutor(max_workers=len(sections)) as pool:
+            futures = {pool.submit(propagate(self._write_section), template_type, section, details): section
+                       for section in sections}
+            for future in as_completed(futures):
+                try:
+                    written[futures[future].name] = future.result()
+                except Exception as e:
+                    stage.error = str(e)
+        if len(written) == len(sections):
+            self.template_cache.put(key, json.dumps(written, ensure_ascii=False))
+        return written
+
+    def _write_section(self, template_type, section, details):
+        title = section.name.replace("_", " ").title()
+        prompt = compact_prompt(f"""Write the "{title}" section of a {template_type} for these details:
+        {json.dumps(details, ensure_ascii=False, separators=(",", ":"))}
+
+        Task: {section.instruction}.
+        Keep it fair, balanced and low risk for both parties. Reply with at most 150 words of
+        plain Markdown for this section only, without a heading.""")
+        message = self.gateway.create(
+            max_tokens=400,
+            temperature=0.3,
+            system=TEMPLATE_SYSTEM_PROMPT,
+            messages=[{"role": "user", "content": prompt}],
+            model=self.model,
+        )
+        return message.content[0].text.strip()
+
+    def _draft_contract(self, template_type, details):
+        """Full Claude draft, for contract types that have no skeleton in the library."""
         if not self.client:
             return "Error: No API Key."
-            
-        system_prompt = "You are an expert legal drafter for Indian contracts. Your goal is to draft a 'Low Risk', 'Fair', and 'Balanced' agreement that protects both parties equally."
-        
+
         user_prompt = f"""Draft a {template_type} based on these details:
-        {json.dumps(params, indent=2, default=str)}
+        {json.dumps(details, ensure_ascii=False, separators=(",", ":"), default=str)}
         
         CRITICAL INSTRUCTIONS FOR LOW RISK SCORING:
         1. TERMINATION: Must be MUTUAL. Both parties must have the same right to terminate without cause (e.g., 30 days notice). DO NOT allow unilateral termination by the Company/Landlord immediately without cause.
@@ -163,15 +730,18 @@ class NLPEngine:
         1. Use clear Markdown headers.
         2. Leave [Brackets] for unspecified details.
         """
+        user_prompt = compact_prompt(user_prompt)
         
-        try:
-            message = self.client.messages.create(
-                max_tokens=2000,
-                temperature=0.3,
-                system=system_prompt,
-                messages=[{"role": "user", "content": user_prompt}],
-                model=self.model,
-            )
-            return message.content[0].text
-        except Exception as e:
-            return f"Error generating template: {str(e)}"
+        with span("template", template_type=template_type, source="llm") as stage:
+            try:
+                message = self.gateway.create(
+                    max_tokens=2000,
+                    temperature=0.3,
+                    system=TEMPLATE_SYSTEM_PROMPT,
+                    messages=[{"role": "user", "content": user_prompt}],
+                    model=self.model,
+                )
+                return message.content[0].text
+            except Exception as e:
+                stage.error = str(e)
+                return f"Error generating template: {str(e)}"
@@ -0,0 +1,120 @@
+import json
+import numpy as np
+import pandas as pd
+
+CATEGORIES = ("Financial", "Legal", "Operational", "Compliance", "Termination")
+# Overall or category score from which a contract counts as high risk
+HIGH_RISK = 75
+# The heatmap never draws more rows than this, whatever the portfolio size
+MAX_HEATMAP_ROWS = 150
+
+
+class Portfolio:
+    """
+    Category scores of many contracts as one matrix (rows = contracts, columns = categories).
+    Aggregates, percentiles, rankings and chart data are computed with vectorized NumPy/pandas
+    operations; heatmap rows are averaged into rank bands so charts stay light at 10k+ contracts.
+    """
+
+    def __init__(self, names, scores, risk_scores=None, high_clauses=None, categories=CATEGORIES):
+        self.names = np.asarray(names, dtype=object)
+        self.categories = list(categories)
+        n = len(self.names)
+        # Missing categories count as 0 so rows stay comparable
+        self.scores = np.nan_to_num(np.asarray(scores, dtype=np.float32).reshape(n, len(self.categories)))
+        risk = np.full(n, np.nan, dtype=np.float32) if risk_scores is None else np.asarray(risk_scores, dtype=np.float32)
+        # Overall risk: the LLM's score where there is one, else the highest category score
+        self.overall = np.where(np.isnan(risk), self.scores.max(axis=1, initial=0), risk)
+        self.high_clauses = np.zeros(n, dtype=np.int32) if high_clauses is None else np.asarray(high_clauses, dtype=np.int32)
+
+    @classmethod
+    def from_records(cls, records, categories=CATEGORIES):
+        """Records are dicts with "name", "category_scores" ({category: score}), "risk_score" and "high_clauses"."""
+        names = [r["name"] for r in records]
+        scores = [[r.get("category_scores", {}).get(c, 0) for c in categories] for r in records]
+        risk = [np.nan if r.get("risk_score") is None else r["risk_score"] for r in records]
+        high = [r.get("high_clauses", 0) for r in records]
+        return cls(names, scores, risk, high, categories)
+
+    def __len__(self):
+        return len(self.names)
+
+    def summary(self):
+        """Headline numbers for the whole portfolio."""
+        if not len(self):
+            return {"contracts": 0, "median": 0.0, "p90": 0.0, "high_risk": 0, "high_clauses": 0}
+        median, p90 = np.percentile(self.overall, [50, 90])
+        return {
+            "contracts": len(self),
+            "median": round(float(median), 1),
+            "p90": round(float(p90), 1),
+            "high_risk": int((self.overall >= HIGH_RISK).sum()),
+            "high_clauses": int(self.high_clauses.sum()),
+        }
+
+    def category_stats(self):
+        """Mean, median, p90, max and share of high-risk contracts per category."""
+        if not len(self):
+            return pd.DataFrame(columns=["mean", "p50", "p90", "max", "high_risk_share"])
+        p50, p90 = np.percentile(self.scores, [50, 90], axis=0)
+        return pd.DataFrame({
+            "mean": self.scores.mean(axis=0),
+            "p50": p50,
+            "p90": p90,
+            "max": self.scores.max(axis=0),
+            "high_risk_share": (self.scores >= HIGH_RISK).mean(axis=0),
+        }, index=self.categories).astype(float).round(2)
+
+    def top(self, n=10, category=None):
+        """The `n` riskiest contracts, overall or in one category (argpartition, no full sort)."""
+        values = self.overall if category is None else self.scores[:, self.categories.index(category)]
+        n = min(n, len(self))
+        if n == 0:
+            return pd.DataFrame(columns=["contract", "overall", *self.categories, "high_clauses"])
+        index = np.argpartition(-values, n - 1)[:n]
+        index = index[np.argsort(-values[index], kind="stable")]
+        frame = pd.DataFrame(self.scores[index], columns=self.categories)
+        frame.insert(0, "overall", self.overall[index])
+        frame.insert(0, "contract", self.names[index])
+        frame["high_clauses"] = self.high_clauses[index]
+        return frame
+
+    def heatmap(self, max_rows=MAX_HEATMAP_ROWS):
+        """
+        Category scores ordered from riskiest to safest. Above `max_rows` contracts, rows are
+        averaged into equal rank bands ("#1-67", ...). Returns (DataFrame, contracts per row).
+        """
+        order = np.argsort(-self.overall, kind="stable")
+        matrix = self.scores[order]
+        if len(self) <= max_rows:
+            return pd.DataFrame(matrix, index=self.names[order], columns=self.categories), 1
+        edges = np.linspace(0, len(self), max_rows + 1).astype(int)
+        sums = np.add.reduceat(matrix, edges[:-1], axis=0)
+        bands = sums / np.diff(edges)[:, None]
+        labels = [f"#{start + 1}-{end}" for start, end in zip(edges[:-1], edges[1:])]
+        return pd.DataFrame(bands, index=labels, columns=self.categories), len(self) / max_rows
+
+    def histogram(self, bins=20):
+        """Overall-score distribution as (bin start, count) rows; the chart never sees raw points."""
+        counts, edges = np.histogram(self.overall, bins=bins, range=(0, 100))
+        return pd.DataFrame({"risk_score": edges[:-1], "contracts": counts})
+
+
+def load_batch_results(lines):
+    """Portfolio records from a batch_analyze.py JSONL output (failed documents are skipped)."""
+    records = []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if record.get("status") != "ok":
+            continue
+        records.append({
+            "name": record["path"],
+            "risk_score": record.get("risk_score"),
+            "category_scores": record.get("category_scores", {}),
+            "high_clauses": sum(1 for c in record.get("clauses", [])
+                                if str(c.get("risk_level", "")).lower() == "high"),
+        })
+    return records
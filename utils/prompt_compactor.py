@@ -0,0 +1,139 @@
+import re
+from collections import Counter, namedtuple
+from utils.clause_segmenter import segment_clauses, is_heading
+from utils.extraction import PAGE_BREAK
+from utils.keyword_scanner import get_scanner, group_matches_by_clause
+from utils.tokens import estimate_tokens
+
+CompactionResult = namedtuple(
+    "CompactionResult",
+    ["text", "tokens_before", "tokens_after", "removed_lines", "removed_paragraphs", "dropped_clauses"],
+)
+
+# Lines found at the top or bottom of this many pages are treated as page
+# headers/footers (PDF extraction artefacts)
+_REPEAT_THRESHOLD = 3
+_MAX_HEADER_LEN = 80
+# How many non-empty lines at each end of a page can be header/footer
+_EDGE_LINES = 2
+
+_DIGITS_RE = re.compile(r"[0-9०-९]+")
+_INLINE_SPACE_RE = re.compile(r"[ \t ]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+# "Page 3 of 10", "- 3 -", "3"
+_PAGE_NUMBER_RE = re.compile(r"^[-–—\s]*(?:page\s*)?#(?:\s*(?:of|/)\s*#)?[-–—\s]*$", re.IGNORECASE)
+# Signature/form filler: "__________", "Signature: ________", "Date: ......"
+_FILLER_RE = re.compile(r"^(?:[^:：]{0,25}[:：])?\s*(?:[_.\-–—]\s*){3,}$")
+
+
+def normalize_whitespace(text):
+    """Collapses runs of spaces/tabs, strips line ends and limits blank lines to one."""
+    lines = [_INLINE_SPACE_RE.sub(" ", line).strip() for line in text.splitlines()]
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+def compact_prompt(prompt):
+    """Strips the source-code indentation from a prompt literal (it is all billed as input tokens)."""
+    return normalize_whitespace(prompt)
+
+
+def strip_page_furniture(text):
+    """
+    Drops page headers/footers: short lines at the top or bottom of many PDF pages (digits
+    ignored so "Page 1 of 9" and "Page 2 of 9" count as the same line), then the PAGE_BREAK
+    markers themselves. Repeated lines inside a page (payment schedules, recurring
+    obligations) are contract text. Returns (text, removed_lines).
+    """
+    if PAGE_BREAK not in text:
+        return text, 0
+    pages = []
+    counts = Counter()
+    for page in text.split(PAGE_BREAK):
+        page_lines = page.splitlines()
+        shapes = [_DIGITS_RE.sub("#", _INLINE_SPACE_RE.sub(" ", line).strip()) for line in page_lines]
+        filled = [i for i, shape in enumerate(shapes) if shape]
+        edges = set(filled[:_EDGE_LINES] + filled[-_EDGE_LINES:])
+        pages.append((page_lines, shapes, edges))
+        # Once per page
+        counts.update({shapes[i] for i in edges if len(shapes[i]) <= _MAX_HEADER_LEN})
+    kept = []
+    removed_lines = 0
+    for page_lines, shapes, edges in pages:
+        for i, line in enumerate(page_lines):
+            # Clause headings are never page furniture, however often they repeat
+            if i in edges and counts[shapes[i]] >= _REPEAT_THRESHOLD and not is_heading(line.strip()):
+                removed_lines += 1
+                continue
+            kept.append(line)
+    return "\n".join(kept), removed_lines
+
+
+def compact_contract(text, token_budget=None, risk_indicators=None):
+    """
+    Shrinks contract text before it is sent to the LLM:
+    1. drops page headers/footers repeated at page edges, page numbers and signature filler lines
+    2. normalizes whitespace
+    3. collapses duplicate paragraphs
+    4. if still above `token_budget`, keeps the clauses with the highest density of
+       risk keywords (in document order) until the budget is met
+    """
+    tokens_before = estimate_tokens(text)
+
+    # 1. Headers/footers (already gone from extract_text output), page numbers and filler
+    text, removed_lines = strip_page_furniture(text)
+    kept = []
+    for line in text.splitlines():
+        line = _INLINE_SPACE_RE.sub(" ", line).strip()
+        if line and (_PAGE_NUMBER_RE.match(_DIGITS_RE.sub("#", line)) or _FILLER_RE.match(line)):
+            removed_lines += 1
+            continue
+        kept.append(line)
+
+    # 2. Whitespace
+    compacted = _BLANK_LINES_RE.sub("\n\n", "\n".join(kept)).strip()
+
+    # 3. Duplicate paragraphs (repeated boilerplate, duplicated signature blocks)
+    seen = set()
+    paragraphs = []
+    removed_paragraphs = 0
+    for para in compacted.split("\n\n"):
+        key = " ".join(para.lower().split())
+        if len(key) > 3 and key in seen:
+            removed_paragraphs += 1
+            continue
+        seen.add(key)
+        paragraphs.append(para)
+    compacted = "\n\n".join(paragraphs)
+
+    # 4. Token budget: rank clauses by local risk-keyword density
+    dropped = 0
+    if token_budget and estimate_tokens(compacted) > token_budget:
+        compacted, dropped = _fit_budget(compacted, token_budget, risk_indicators)
+
+    return CompactionResult(compacted, tokens_before, estimate_tokens(compacted),
+                            removed_lines, removed_paragraphs, dropped)
+
+
+def _fit_budget(text, token_budget, risk_indicators):
+    if risk_indicators is None:
+        # Late import: risk_calculator pulls in pandas
+        from utils.risk_calculator import RiskCalculator
+        risk_indicators = RiskCalculator().risk_indicators
+    spans = segment_clauses(text)
+    hits = group_matches_by_clause(get_scanner(risk_indicators).scan(text).matches, spans)
+
+    def density(span):
+        return sum(hits.get(span.id, {}).values()) / max(1, span.end - span.start)
+
+    ranked = sorted(spans, key=density, reverse=True)
+    keep = set()
+    used = 0
+    for span in ranked:
+        cost = estimate_tokens(span.text)
+        if used + cost > token_budget:
+            continue
+        keep.add(span.id)
+        used += cost
+
+    kept = [span.text for span in spans if span.id in keep]
+    return "\n\n".join(kept), len(spans) - len(kept)
@@ -0,0 +1,155 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Default location for the on-disk cache (shared by every session on this server)
+DEFAULT_CACHE_PATH = os.path.join(".cache", "legislens_cache.sqlite3")
+
+
+def normalize_text(text):
+    """Collapses whitespace and case so trivially different uploads share a cache entry."""
+    return " ".join(text.split()).lower()
+
+
+def make_key(*parts):
+    """Builds a content-addressed cache key from the given parts."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Small SQLite-backed key/value cache with LRU eviction.
+    Entries are evicted when they are older than `max_age` seconds, or when the
+    cache grows beyond `max_entries` / `max_bytes` (least recently used go first).
+    """
+
+    def __init__(self, path=None, namespace="analysis", max_entries=5000,
+                 max_bytes=200 * 1024 * 1024, max_age=30 * 24 * 3600, enabled=True):
+        self.path = path or os.getenv("LEGISLENS_CACHE_PATH", DEFAULT_CACHE_PATH)
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        # Opt-out: constructor flag or LEGISLENS_DISABLE_CACHE=1
+        self.enabled = enabled and os.getenv("LEGISLENS_DISABLE_CACHE", "0") != "1"
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # One connection per cache object, guarded by our own lock
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache(namespace, accessed_at)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key):
+        """Returns the cached value or None. Updates hit/miss counters."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, created_at FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None or (self.max_age and now - row[1] > self.max_age):
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key),
+            )
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, value):
+        """Stores a string value and evicts old entries if the cache is over budget."""
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.namespace, key, value, len(value.encode("utf-8")), now, now),
+            )
+            self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn, now):
+        if self.max_age:
+            conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND created_at < ?",
+                (self.namespace, now - self.max_age),
+            )
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache WHERE namespace = ?",
+            (self.namespace,),
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Walk entries from least recently used and drop until we are back under budget
+        rows = conn.execute(
+            "SELECT key, size FROM cache WHERE namespace = ? ORDER BY accessed_at ASC",
+            (self.namespace,),
+        ).fetchall()
+        stale = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            stale.append((self.namespace, key))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM cache WHERE namespace = ? AND key = ?", stale)
+
+    def clear(self):
+        """Removes every entry in this namespace."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+            conn.commit()
+
+    def stats(self):
+        """Returns hit/miss counters and current size for display/monitoring."""
+        entries, size = 0, 0
+        if self.enabled:
+            with self._lock:
+                entries, size = self._connect().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache WHERE namespace = ?",
+                    (self.namespace,),
+                ).fetchone()
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
@@ -0,0 +1,95 @@
+import difflib
+from collections import namedtuple
+from utils.long_document import RISK_RANK
+from utils.result_cache import make_key, normalize_text
+
+# A revision needs at least this share of unchanged clauses; below it the upload is
+# treated as a different contract and analyzed from scratch
+MIN_OVERLAP = 0.5
+
+# changed: ids of new/edited clauses to send; reused: {clause_id: previous verdict or None}
+RevisionPlan = namedtuple("RevisionPlan", ["hashes", "changed", "reused", "previous"])
+
+
+def clause_hash(text):
+    """Whitespace/case-insensitive fingerprint of one clause."""
+    return make_key(normalize_text(text))[:16]
+
+
+def plan_revision(clause_texts, previous, min_overlap=MIN_OVERLAP):
+    """
+    Compares the clauses of a new upload with a previously analyzed version.
+    Returns a RevisionPlan, or None when there is no usable previous version.
+    """
+    if not previous or not previous.get("clause_hashes"):
+        return None
+    previous_hashes = set(previous["clause_hashes"])
+    hashes = {clause_id: clause_hash(text) for clause_id, text in clause_texts.items()}
+    unchanged = [clause_id for clause_id, h in hashes.items() if h in previous_hashes]
+    if not hashes or len(unchanged) < min_overlap * len(hashes):
+        return None
+    verdicts = {clause_hash(c["text"]): c for c in previous.get("clauses", [])}
+    reused = {clause_id: verdicts.get(hashes[clause_id]) for clause_id in unchanged}
+    changed = [clause_id for clause_id in hashes if clause_id not in reused]
+    return RevisionPlan(hashes, changed, reused, previous)
+
+
+def reused_clauses(plan, clause_texts):
+    """Previous verdicts re-attached to the clause ids and text of the new version."""
+    clauses = []
+    for clause_id, verdict in plan.reused.items():
+        if verdict is not None:
+            clauses.append(dict(verdict, clause_id=clause_id, text=clause_texts[clause_id]))
+    return clauses
+
+
+def order_clauses(clauses, clause_texts):
+    """Sorts clauses into document order (clauses without a known id go last)."""
+    position = {clause_id: i for i, clause_id in enumerate(clause_texts)}
+    return sorted(clauses, key=lambda c: position.get(c.get("clause_id"), len(position)))
+
+
+def _rank(risk_level):
+    return RISK_RANK.get(str(risk_level or "").lower(), 0)
+
+
+def diff_versions(previous, analysis, clause_texts, hashes):
+    """
+    Clause-level diff between two analyzed versions, aligned on clause fingerprints.
+    Returns entries for added, removed and modified clauses with their old/new risk level.
+    """
+    old_hashes = previous.get("clause_hashes", [])
+    old_verdicts = {clause_hash(c["text"]): c for c in previous.get("clauses", [])}
+    new_ids = list(clause_texts)
+    new_hashes = [hashes[clause_id] for clause_id in new_ids]
+    new_verdicts = {c.get("clause_id"): c for c in analysis.get("clauses", [])}
+
+    def old_entry(h):
+        verdict = old_verdicts.get(h)
+        return (verdict or {}).get("risk_level"), (verdict or {}).get("text", "")
+
+    diff = []
+    matcher = difflib.SequenceMatcher(a=old_hashes, b=new_hashes, autojunk=False)
+    for op, a1, a2, b1, b2 in matcher.get_opcodes():
+        if op == "equal":
+            continue
+        old = [old_entry(h) for h in old_hashes[a1:a2]]
+        new = new_ids[b1:b2]
+        for i in range(max(len(old), len(new))):
+            old_risk, old_text = old[i] if i < len(old) else (None, "")
+            clause_id = new[i] if i < len(new) else None
+            new_risk = (new_verdicts.get(clause_id) or {}).get("risk_level") if clause_id else None
+            if i < len(old) and i < len(new):
+                status = "modified"
+            else:
+                status = "added" if clause_id else "removed"
+            diff.append({
+                "status": status,
+                "clause_id": clause_id,
+                "old_risk": old_risk,
+                "new_risk": new_risk,
+                "risk_change": _rank(new_risk) - _rank(old_risk),
+                "text": clause_texts[clause_id] if clause_id else old_text,
+                "old_text": old_text if status == "modified" else "",
+            })
+    return diff
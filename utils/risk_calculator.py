@@ -1,18 +1,47 @@
+import os
+import hashlib
 import pandas as pd
-import random
+from utils.clause_segmenter import segment_clauses
+from utils.keyword_scanner import get_scanner, group_matches_by_clause
 
 class RiskCalculator:
-    def __init__(self):
+    def __init__(self, transliterate=None):
         # Keywords that suggest high risk in specific categories
+        # (English, romanized Hindi and Devanagari; Devanagari spelling variants are folded by the scanner)
         self.risk_indicators = {
-            "Financial": ["penalty", "indemnify", "liquidated damages", "reimburse", "fine", "cost", "jurmana", "harjana", "shulk", "vool"],
-            "Legal": ["jurisdiction", "arbitration", "litigation", "court", "lawsuit", "dispute", "nyayalaya", "vivad", "madhyasthata", "kanooni"],
-            "Operational": ["exclusive", "non-compete", "restrict", "prohibit", "consent required", "pratibandh", "anumati", "rok"],
-            "Compliance": ["audit", "regulation", "gdpr", "statutory", "license", "niyam", "vidhan", "anupalan"],
-            "Termination": ["terminate", "cause", "notice period", "immediate effect", "samapt", "notis"]
+            "Financial": ["penalty", "indemnify", "liquidated damages", "reimburse", "fine", "cost", "jurmana", "harjana", "shulk", "vool",
+                          "जुर्माना", "हर्जाना", "दंड", "क्षतिपूर्ति", "शुल्क", "वसूली", "ब्याज", "प्रतिपूर्ति", "परिनिर्धारित नुकसानी"],
+            "Legal": ["jurisdiction", "arbitration", "litigation", "court", "lawsuit", "dispute", "nyayalaya", "vivad", "madhyasthata", "kanooni",
+                      "क्षेत्राधिकार", "मध्यस्थता", "न्यायालय", "अदालत", "विवाद", "मुकदमा", "कानूनी कार्यवाही"],
+            "Operational": ["exclusive", "non-compete", "restrict", "prohibit", "consent required", "pratibandh", "anumati", "rok",
+                            "अनन्य", "प्रतिबंध", "निषेध", "प्रतिस्पर्धा", "रोक", "अनुमति", "सहमति आवश्यक"],
+            "Compliance": ["audit", "regulation", "gdpr", "statutory", "license", "niyam", "vidhan", "anupalan",
+                           "लेखा परीक्षा", "अंकेक्षण", "विनियम", "नियम", "वैधानिक", "अनुज्ञप्ति", "लाइसेंस", "अनुपालन", "विधान"],
+            "Termination": ["terminate", "cause", "notice period", "immediate effect", "samapt", "notis",
+                            "समाप्त", "समाप्ति", "नोटिस", "सूचना अवधि", "तत्काल प्रभाव"]
         }
+        # Optionally match Devanagari keywords in romanized (Hinglish) documents too
+        if transliterate is None:
+            transliterate = os.getenv("LEGISLENS_TRANSLITERATE", "0") == "1"
+        # Compiled once per keyword set and shared by every calculator
+        self.scanner = get_scanner(self.risk_indicators, transliterate)
 
-    def calculate_risk_scores(self, text, llm_response=None):
+    def scan(self, text):
+        """Single pass over the text: per-category counts plus match offsets for highlighting."""
+        return self.scanner.scan(text)
+
+    def scan_clauses(self, text, spans=None):
+        """Keyword hits per clause: {clause_id: {category: count}} (clauses without hits are omitted)."""
+        if spans is None:
+            spans = segment_clauses(text)
+        return group_matches_by_clause(self.scanner.scan(text).matches, spans)
+
+    def _baseline(self, text, category):
+        """Deterministic low baseline (5-20) so identical documents always score the same."""
+        digest = hashlib.blake2b(f"{category}\x00{text}".encode("utf-8"), digest_size=4).digest()
+        return 5 + int.from_bytes(digest, "big") % 16
+
+    def calculate_risk_scores(self, text, llm_response=None, counts=None):
         """
         Generates scores for the radar chart.
         Hybrid Approach: 
@@ -20,17 +49,18 @@ class RiskCalculator:
         2. Semantic Boost: If LLM identifies specific risks in clauses, boost those categories.
            This ensures the Graph matches the Text Analysis, even for Hindi documents.
         """
-        text_lower = text.lower()
+        if counts is None:
+            counts = self.scanner.count(text)
         scores = {}
         
         # 1. Keyword Baseline
-        for category, keywords in self.risk_indicators.items():
-            count = sum(text_lower.count(kw) for kw in keywords)
+        for category in self.risk_indicators:
+            count = counts.get(category, 0)
             # Normalize: Reduce multiplier to 5 to avoid false positives in long docs
             # CAP at 50 (Medium) so that only LLM can push it to High Risk (Red)
             score = min(count * 5, 50) 
             if score == 0:
-                score = random.randint(5, 20) # Lower baseline noise
+                score = self._baseline(text, category) # Lower baseline noise
             scores[category] = score
             
         # 2. LLM Semantic Override (The "Smart" Layer)
@@ -65,7 +95,7 @@ class RiskCalculator:
         # 3. GLOBAL SYNC (The "Silver Bullet" for Consistency)
         # If the LLM gives a Global Risk Score (e.g., 85), the Graph MUST reflect that overall intensity.
         # We scale the category scores so their weighted impact matches the LLM's verdict.
-        if llm_response and "risk_score" in llm_response:
+        if llm_response and llm_response.get("risk_score") is not None:
             target_global = llm_response["risk_score"]
             current_max = max(scores.values()) if scores.values() else 1
             
@@ -83,6 +113,12 @@ class RiskCalculator:
         
         return scores
 
+    def calculate_batch(self, texts, llm_responses=None):
+        """Scores many documents with the shared scanner. Returns one scores dict per text."""
+        if llm_responses is None:
+            llm_responses = [None] * len(texts)
+        return [self.calculate_risk_scores(text, resp) for text, resp in zip(texts, llm_responses)]
+
     def get_radar_data(self, scores):
         """Returns a DataFrame suitable for Plotly Radar Chart."""
         df = pd.DataFrame(dict(
@@ -0,0 +1,45 @@
+import sys
+import time
+import threading
+import importlib
+from contextlib import contextmanager
+
+# (name, seconds) for every import / model load, in the order they happened
+_EVENTS = []
+_LOCK = threading.Lock()
+_PROCESS_START = time.perf_counter()
+
+
+def record(name, seconds):
+    with _LOCK:
+        _EVENTS.append({"step": name, "seconds": round(seconds, 4)})
+
+
+@contextmanager
+def timed(name):
+    """Times a block and adds it to the startup report."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+def lazy_import(module_name):
+    """Imports a module on first use, recording how long the first import took."""
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    with timed(f"import {module_name}"):
+        return importlib.import_module(module_name)
+
+
+def report():
+    """Startup events so far, plus time since this process first imported LegisLens."""
+    with _LOCK:
+        events = list(_EVENTS)
+    return {
+        "events": events,
+        "total_seconds": round(sum(e["seconds"] for e in events), 4),
+        "uptime_seconds": round(time.perf_counter() - _PROCESS_START, 1),
+    }
@@ -0,0 +1,9 @@
+# Claude tokenizes English at roughly 4 characters per token (rough, but good enough for budgets)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Cheap local token estimate used for budgeting and reporting (no API call)."""
+    if not text:
+        return 0
+    return max(1, len(text) // CHARS_PER_TOKEN)
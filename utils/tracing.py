@@ -0,0 +1,327 @@
+"""
+Lightweight per-stage tracing for LegisLens.
+
+    with tracing.span("extract", doc_bytes=size) as s:
+        ...
+        s.set(chars=len(text))
+
+Spans nest through a contextvar, so child spans and LLM usage are attributed to the
+stage that is running. Token counts and estimated cost roll up from children to their
+parents. Thread pools do not inherit contextvars: submit `propagate(fn)` instead of `fn`.
+Generators use `stream_span`, which is current only while the generator itself runs.
+
+Finished traces are kept in memory for the sidebar "Performance" panel and can be exported as
+JSONL (LEGISLENS_TRACE_PATH, appended as traces finish) and Prometheus text format
+(LEGISLENS_METRICS_PATH, rewritten after each trace, e.g. for node_exporter's textfile collector).
+"""
+import os
+import json
+import math
+import time
+import uuid
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+# USD per million tokens: (input, output, cache write, cache read)
+MODEL_PRICES = {
+    "claude-3-haiku-20240307": (0.25, 1.25, 0.30, 0.03),
+}
+DEFAULT_PRICES = MODEL_PRICES["claude-3-haiku-20240307"]
+
+# Attributes summed from children into their parent span
+ROLLUP_FIELDS = ("llm_calls", "input_tokens", "output_tokens",
+                 "cache_creation_input_tokens", "cache_read_input_tokens", "cost_usd")
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_current = contextvars.ContextVar("legislens_span", default=None)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile (values need not be sorted)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def estimate_cost(usage):
+    """Estimated USD cost of one response, from its usage record."""
+    price_in, price_out, price_write, price_read = MODEL_PRICES.get(usage.get("model"), DEFAULT_PRICES)
+    return (usage.get("input_tokens", 0) * price_in
+            + usage.get("output_tokens", 0) * price_out
+            + usage.get("cache_creation_input_tokens", 0) * price_write
+            + usage.get("cache_read_input_tokens", 0) * price_read) / 1e6
+
+
+class Span:
+    """One timed stage. `attrs` holds tokens, cost, cache hits, document size and anything else set on it."""
+
+    def __init__(self, name, parent=None, attrs=None):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:8]
+        self.depth = parent.depth + 1 if parent else 0
+        self.attrs = dict(attrs or {})
+        self.started_at = time.time()
+        self.duration = None
+        self.error = None
+        # Finished spans of the whole trace, shared with the root
+        self.finished = parent.finished if parent else []
+        self._lock = threading.Lock()
+
+    def set(self, **attrs):
+        with self._lock:
+            self.attrs.update(attrs)
+
+    def add(self, **amounts):
+        with self._lock:
+            for key, value in amounts.items():
+                self.attrs[key] = self.attrs.get(key, 0) + value
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "depth": self.depth,
+            "started_at": round(self.started_at, 3),
+            "duration_s": round(self.duration or 0.0, 6),
+            "error": self.error,
+            **self.attrs,
+        }
+
+
+class Tracer:
+    """Collects finished traces and aggregate metrics for export."""
+
+    def __init__(self, max_traces=50, trace_path=None, metrics_path=None):
+        self.traces = deque(maxlen=max_traces)
+        self.trace_path = trace_path if trace_path is not None else os.getenv("LEGISLENS_TRACE_PATH")
+        self.metrics_path = metrics_path if metrics_path is not None else os.getenv("LEGISLENS_METRICS_PATH")
+        self._lock = threading.Lock()
+        # stage -> {"count", "sum", "buckets": [...], "errors"}
+        self.durations = {}
+        # stage -> {"hit": n, "miss": n}
+        self.cache_lookups = {}
+        self.totals = {field: 0 for field in ROLLUP_FIELDS}
+        self.totals["traces"] = 0
+
+    def finish(self, span):
+        with self._lock:
+            stats = self.durations.setdefault(span.name, {"count": 0, "sum": 0.0, "errors": 0,
+                                                          "buckets": [0] * len(DURATION_BUCKETS)})
+            stats["count"] += 1
+            stats["sum"] += span.duration
+            stats["errors"] += span.error is not None
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if span.duration <= bound:
+                    stats["buckets"][i] += 1
+            if "cache_hit" in span.attrs:
+                lookups = self.cache_lookups.setdefault(span.name, {"hit": 0, "miss": 0})
+                lookups["hit" if span.attrs["cache_hit"] else "miss"] += 1
+            if span.parent is None:
+                # Usage rolls up, so root spans carry the totals for the whole trace
+                for field in ROLLUP_FIELDS:
+                    self.totals[field] += span.attrs.get(field, 0)
+                self.totals["traces"] += 1
+                self.traces.append([s.to_dict() for s in span.finished])
+        if span.parent is None:
+            self._export(span)
+
+    def _export(self, root):
+        if self.trace_path:
+            with open(self.trace_path, "a", encoding="utf-8") as f:
+                for record in root.finished:
+                    f.write(json.dumps(record.to_dict(), ensure_ascii=False) + "\n")
+        if self.metrics_path:
+            tmp = f"{self.metrics_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(self.prometheus())
+            os.replace(tmp, self.metrics_path)
+
+    def recent_spans(self):
+        """Every span of the retained traces, oldest first."""
+        with self._lock:
+            return [record for trace in self.traces for record in trace]
+
+    def last_trace(self, root_name=None):
+        """Spans of the most recent trace (optionally the most recent one whose root is `root_name`)."""
+        with self._lock:
+            for trace in reversed(self.traces):
+                if root_name is None or trace[-1]["name"] == root_name:
+                    # Spans finish children-first; show them in start order
+                    return sorted(trace, key=lambda record: (record["started_at"], record["depth"]))
+        return []
+
+    def stage_summary(self):
+        """Per-stage count, p50/p95 latency, tokens and cost over the retained traces."""
+        stages = {}
+        for record in self.recent_spans():
+            stages.setdefault(record["name"], []).append(record)
+        rows = []
+        for name, records in sorted(stages.items()):
+            durations = [r["duration_s"] for r in records]
+            rows.append({
+                "stage": name,
+                "count": len(records),
+                "p50_ms": round(percentile(durations, 50) * 1000, 1),
+                "p95_ms": round(percentile(durations, 95) * 1000, 1),
+                "tokens": sum(r.get("input_tokens", 0) + r.get("output_tokens", 0) for r in records),
+                "cost_usd": round(sum(r.get("cost_usd", 0) for r in records), 5),
+            })
+        return rows
+
+    def jsonl(self):
+        return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in self.recent_spans())
+
+    def prometheus(self):
+        """Metrics in the Prometheus text exposition format."""
+        with self._lock:
+            durations = {name: dict(stats, buckets=list(stats["buckets"])) for name, stats in self.durations.items()}
+            lookups = {name: dict(counts) for name, counts in self.cache_lookups.items()}
+            totals = dict(self.totals)
+        lines = [
+            "# HELP legislens_stage_duration_seconds Duration of each traced stage.",
+            "# TYPE legislens_stage_duration_seconds histogram",
+        ]
+        for name, stats in sorted(durations.items()):
+            for bound, count in zip(DURATION_BUCKETS, stats["buckets"]):
+                lines.append(f'legislens_stage_duration_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+            lines.append(f'legislens_stage_duration_seconds_bucket{{stage="{name}",le="+Inf"}} {stats["count"]}')
+            lines.append(f'legislens_stage_duration_seconds_sum{{stage="{name}"}} {stats["sum"]:.6f}')
+            lines.append(f'legislens_stage_duration_seconds_count{{stage="{name}"}} {stats["count"]}')
+        lines += ["# HELP legislens_stage_errors_total Traced stages that raised.",
+                  "# TYPE legislens_stage_errors_total counter"]
+        for name, stats in sorted(durations.items()):
+            lines.append(f'legislens_stage_errors_total{{stage="{name}"}} {stats["errors"]}')
+        lines += ["# HELP legislens_cache_lookups_total Cache lookups by stage and result.",
+                  "# TYPE legislens_cache_lookups_total counter"]
+        for name, counts in sorted(lookups.items()):
+            for result, count in sorted(counts.items()):
+                lines.append(f'legislens_cache_lookups_total{{stage="{name}",result="{result}"}} {count}')
+        lines += ["# HELP legislens_llm_tokens_total Claude tokens by kind.",
+                  "# TYPE legislens_llm_tokens_total counter"]
+        for field in ROLLUP_FIELDS[1:5]:
+            kind = field.replace("_input_tokens", "").replace("_tokens", "")
+            lines.append(f'legislens_llm_tokens_total{{kind="{kind}"}} {totals[field]}')
+        lines += ["# HELP legislens_llm_requests_total Claude calls.",
+                  "# TYPE legislens_llm_requests_total counter",
+                  f"legislens_llm_requests_total {totals['llm_calls']}",
+                  "# HELP legislens_llm_cost_usd_total Estimated Claude cost in USD.",
+                  "# TYPE legislens_llm_cost_usd_total counter",
+                  f"legislens_llm_cost_usd_total {totals['cost_usd']:.6f}",
+                  "# HELP legislens_traces_total Finished root traces (e.g. analyzed contracts).",
+                  "# TYPE legislens_traces_total counter",
+                  f"legislens_traces_total {totals['traces']}"]
+        return "\n".join(lines) + "\n"
+
+
+_TRACER = Tracer()
+
+
+def get_tracer():
+    return _TRACER
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Times a stage as a child of the current span (or as a new trace).
+    Do not hold it across `yield` in a generator; use stream_span there.
+    """
+    parent = _current.get()
+    current = Span(name, parent, attrs)
+    token = _current.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        _finish(current, started)
+
+
+def stream_span(name, make_generator, **attrs):
+    """
+    Generator counterpart of span(): yields what make_generator(span) yields, timing the whole
+    stream as one stage. The span is the current span only while the wrapped generator runs,
+    never while it is suspended, so the consumer's own spans are not nested under it and
+    closing the stream from another context is safe.
+    """
+    parent = _current.get()
+    current = Span(name, parent, attrs)
+    started = time.perf_counter()
+    generator = make_generator(current)
+    try:
+        while True:
+            token = _current.set(current)
+            try:
+                item = next(generator)
+            except StopIteration:
+                return
+            finally:
+                _current.reset(token)
+            yield item
+    except GeneratorExit:
+        # A streaming consumer stopped early; not a failure of the stage
+        token = _current.set(current)
+        try:
+            generator.close()
+        finally:
+            _current.reset(token)
+        raise
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _finish(current, started)
+
+
+def _finish(current, started):
+    current.duration = time.perf_counter() - started
+    if current.parent is not None:
+        current.parent.add(**{field: current.attrs[field] for field in ROLLUP_FIELDS if field in current.attrs})
+    current.finished.append(current)
+    _TRACER.finish(current)
+
+
+def current_span():
+    return _current.get()
+
+
+def set_attributes(**attrs):
+    """Sets attributes on the current span, if any."""
+    current = _current.get()
+    if current is not None:
+        current.set(**attrs)
+
+
+def record_usage(usage):
+    """LLMGateway usage listener: charges one response's tokens and cost to the current span."""
+    current = _current.get()
+    if current is None:
+        return
+    current.add(
+        llm_calls=1,
+        input_tokens=usage.get("input_tokens", 0),
+        output_tokens=usage.get("output_tokens", 0),
+        cache_creation_input_tokens=usage.get("cache_creation_input_tokens", 0),
+        cache_read_input_tokens=usage.get("cache_read_input_tokens", 0),
+        cost_usd=estimate_cost(usage),
+    )
+
+
+def propagate(fn):
+    """Wraps `fn` to run in a copy of the caller's context (use one wrapper per submit)."""
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.run(fn, *args, **kwargs)
+    return run
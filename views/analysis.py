@@ -1,12 +1,24 @@
 import streamlit as st
 import json
-from utils.nlp_engine import NLPEngine
+from utils.engine_registry import get_draft_manager, get_document_store
 
-def show(analysis_result):
+# How often a draft that is still being generated is redrawn (seconds)
+DRAFT_POLL_SECONDS = 0.25
+
+def show_clause_preview(number, clause):
+    """Read-only clause card used while an analysis is still streaming in."""
+    risk = clause.get("risk_level", "Low")
+    with st.expander(f"Clause {number}: {clause.get('type', 'Standard')} ({risk} Risk)", expanded=risk.lower() == "high"):
+        st.markdown(f"**Original Text:**\n> {clause.get('text')}")
+        st.markdown(f"**Plain Language:**\n{clause.get('explanation')}")
+
+def show(analysis_id):
     st.header("Detailed Clause Analysis")
-    
-    nlp = NLPEngine()
-    
+
+    analysis_result = get_document_store().json(analysis_id)
+
+    drafts = get_draft_manager()
+
     if not analysis_result or "clauses" not in analysis_result:
         st.warning("No clause analysis available yet. Go to Dashboard to process.")
         return
@@ -20,11 +32,11 @@ def show(analysis_result):
     for idx, clause in enumerate(analysis_result["clauses"]):
         risk = clause.get("risk_level", "Low")
         color = get_risk_color(risk)
-        
+
         with st.expander(f"Clause {idx+1}: {clause.get('type', 'Standard')} ({risk} Risk)"):
             st.markdown(f"**Original Text:**\n> {clause.get('text')}")
             st.markdown(f"**Plain Language:**\n{clause.get('explanation')}")
-            
+
             if risk.lower() in ["high", "medium"]:
                 col_a, col_b = st.columns([1, 3])
                 with col_a:
@@ -32,11 +44,33 @@ def show(analysis_result):
                 with col_b:
                     if st.button(f"Negotiate Clause {idx+1}", key=f"btn_{idx}"):
                         st.session_state[f"negotiate_{idx}"] = True
-                
+
                 if st.session_state.get(f"negotiate_{idx}"):
-                    with st.form(key=f"form_{idx}"):
-                        st.write("Generating draft email...")
-                        issue_context = f"The user considers this {clause.get('type')} clause too risky."
-                        draft = nlp.draft_negotiation_email(clause.get("text"), issue_context)
-                        st.text_area("Draft Email", value=draft, height=200)
-                        st.form_submit_button("Copy to Clipboard")
+                    issue_context = f"The user considers this {clause.get('type')} clause too risky."
+                    # Drafts are memoized per (clause, issue, model); only "Regenerate" re-bills
+                    job = drafts.get_or_start(clause.get("text"), issue_context)
+                    # Drafts generate concurrently in the background; a pending one is polled
+                    # by its own fragment so the rest of the page stays responsive
+                    st.fragment(run_every=None if job.done else DRAFT_POLL_SECONDS)(_draft_panel)(
+                        drafts, idx, clause.get("text"), issue_context, not job.done)
+
+
+def _draft_panel(drafts, idx, clause_text, issue_context, was_pending):
+    job = drafts.get_or_start(clause_text, issue_context)
+    if not job.done:
+        st.write("Generating draft email...")
+        st.text(job.snapshot() + " ▌")
+        return
+    if was_pending:
+        # Refresh the whole page so the finished draft (and the stopped poll) show up
+        st.rerun()
+    if st.button("🔄 Regenerate", key=f"regen_{idx}"):
+        drafts.regenerate(clause_text, issue_context)
+        st.rerun()
+
+    if job.error:
+        st.error(f"Could not draft email: {job.error}")
+    else:
+        with st.form(key=f"form_{idx}"):
+            st.text_area("Draft Email", value=job.text, height=200)
+            st.form_submit_button("Copy to Clipboard")
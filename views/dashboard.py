@@ -2,38 +2,18 @@ import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 from utils.risk_calculator import RiskCalculator
+from utils.artifacts import contract_artifacts
+from utils.engine_registry import get_document_store
 
-def show(contract_text, analysis_result):
-    st.header("Contract Health Dashboard")
-    
-    # 1. Top Level Metrics
-    col1, col2 = st.columns(2)
-    
-    risk_score = 0
-    if analysis_result and isinstance(analysis_result, dict):
-        risk_score = analysis_result.get("risk_score", 50)
-    
-    with col1:
-        # Strict Threshold: > 60 is considered High Risk for SMEs
-        st.metric("Overall Risk Score", f"{risk_score}/100", delta="-High Risk" if risk_score > 75 else "Safe")
-    with col2:
-        st.metric("Total Clauses (Approx)", len(contract_text.split('.')) // 2)
-        
-    st.divider()
-    
-    # 2. Risk Radar
-    st.subheader("Risk Dimensions")
-    calculator = RiskCalculator()
-    scores = calculator.calculate_risk_scores(contract_text, analysis_result)
-    
-    # Create Radar Chart
-    categories = list(scores.keys())
-    values = list(scores.values())
-    
+# Shared across reruns (the keyword scanner is compiled once)
+calculator = RiskCalculator()
+
+
+def _radar_figure(scores):
     fig = go.Figure()
     fig.add_trace(go.Scatterpolar(
-        r=values,
-        theta=categories,
+        r=list(scores.values()),
+        theta=list(scores.keys()),
         fill='toself',
         name='Contract Risk',
         line_color='#FF4B4B'
@@ -47,9 +27,96 @@ def show(contract_text, analysis_result):
             )),
         showlegend=False
     )
+    return fig
+
+
+# Everything the dashboard derives from a contract, memoized by content across reruns and sessions:
+# a rerun with the same document (page switch, language toggle) recomputes nothing
+artifacts = contract_artifacts(get_document_store(), calculator)
+artifacts.node("radar_figure", ["scores"], _radar_figure)
+
+
+def show(doc_id, analysis_id):
+    st.header("Contract Health Dashboard")
+
+    # Read from the shared DocumentStore on each draw instead of being copied into the session
+    sources = {"text": doc_id, "analysis": analysis_id}
+    if artifacts.get("text", **sources) is None:
+        st.warning("This contract is no longer stored on the server. Please upload it again.")
+        return
+    analysis_result = artifacts.get("analysis", **sources)
+    
+    # 1. Top Level Metrics
+    col1, col2, col3 = st.columns(3)
+    clauses = artifacts.get("segments", **sources)
+    
+    risk_score = 0
+    if analysis_result and isinstance(analysis_result, dict):
+        risk_score = analysis_result.get("risk_score", 50)
     
-    st.plotly_chart(fig, use_container_width=True)
+    with col1:
+        if risk_score is None:
+            # Skipped by the Hindi keyword screen: no score rather than a made-up one
+            st.metric("Overall Risk Score", "Not analyzed")
+        else:
+            # Strict Threshold: > 60 is considered High Risk for SMEs
+            st.metric("Overall Risk Score", f"{risk_score}/100", delta="-High Risk" if risk_score > 75 else "Safe")
+    with col2:
+        st.metric("Total Clauses", len(clauses))
+    with col3:
+        st.metric("Clauses with Risk Keywords", len(artifacts.get("keyword_hits", **sources)))
+        
+    if analysis_result and analysis_result.get("compaction"):
+        comp = analysis_result["compaction"]
+        saved = 100 - round(100 * comp["tokens_after"] / max(1, comp["tokens_before"]))
+        st.caption(f"Prompt compaction: ~{comp['tokens_before']} → ~{comp['tokens_after']} input tokens ({saved}% saved)")
+    if analysis_result and analysis_result.get("screening"):
+        screen = analysis_result["screening"]
+        notes = {
+            "skip": "no risk keywords found, AI review skipped",
+            "shrink": f"only {screen['clauses_sent']} clauses with risk keywords were sent for AI review",
+            "full": "full AI review",
+        }
+        st.caption(f"Hindi keyword screen: {screen['keyword_hits']} hits ({screen['hits_per_1k_chars']}/1k chars), "
+                   f"{notes[screen['decision']]}")
+    if analysis_result and analysis_result.get("clause_index"):
+        matched = analysis_result["clause_index"]
+        st.caption(f"Clause library: {matched['matched_clauses']} clauses matched previously analyzed clauses "
+                   f"and reused their verdicts ({matched['flagged']} flagged)")
+    if analysis_result and analysis_result.get("revision"):
+        show_revision(analysis_result["revision"])
+        
+    st.divider()
+    
+    # 2. Risk Radar
+    st.subheader("Risk Dimensions")
+    st.plotly_chart(artifacts.get("radar_figure", **sources), use_container_width=True)
     
     # 3. High Level Summary
     if analysis_result and "summary" in analysis_result:
         st.info(f"**Executive Summary**: {analysis_result['summary']}")
+
+
+def show_revision(revision):
+    """Clause-level changes since the previously analyzed version of this contract."""
+    st.subheader(f"Changes since previous version (v{revision['version']})")
+    diff = revision["diff"]
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Added", sum(d["status"] == "added" for d in diff))
+    col2.metric("Modified", sum(d["status"] == "modified" for d in diff))
+    col3.metric("Removed", sum(d["status"] == "removed" for d in diff))
+    col4.metric("Riskier", sum(d["risk_change"] > 0 for d in diff))
+    if revision["incremental"]:
+        st.caption(f"Only {revision['clauses_sent']} changed clauses were re-analyzed; "
+                   f"{revision['clauses_reused']} unchanged clauses kept their previous verdicts.")
+    if diff:
+        rows = [{
+            "Status": d["status"],
+            "Clause": d["clause_id"] or "-",
+            "Old Risk": d["old_risk"] or "-",
+            "New Risk": d["new_risk"] or "-",
+            "Text": d["text"][:120],
+        } for d in diff]
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+    else:
+        st.caption("No clause changes.")
@@ -0,0 +1,103 @@
+import streamlit as st
+from utils.job_queue import QUEUED, RUNNING, DONE, ERROR, STAGES
+from utils.engine_registry import get_document_store
+from views import analysis
+
+# How often running jobs are polled (seconds)
+POLL_SECONDS = 1.0
+
+STAGE_LABELS = {
+    "queued": "Waiting in queue",
+    "extracting": "Extracting text",
+    "analyzing": "Analyzing with Claude 3 Haiku",
+    "scoring": "Scoring risks",
+    "done": "Done",
+}
+
+
+def is_active(job):
+    return job is not None and job["status"] in (QUEUED, RUNNING)
+
+
+def _progress(job):
+    return STAGES.index(job["stage"]) / (len(STAGES) - 1)
+
+
+def load(job_queue, job_id):
+    """
+    Shows a finished job's result on the Dashboard / Detailed Analysis pages. The session keeps
+    only document ids; the text and analysis are read from the shared DocumentStore when drawn.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        # Unknown job id (e.g. from another server's database): keep showing the current contract
+        st.toast("That analysis is no longer available.")
+        return
+    st.session_state["job_id"] = job_id
+    st.session_state["loaded_job"] = job_id
+    if job["status"] == DONE:
+        result = job["result"]
+        st.session_state["doc_id"] = result["doc_id"]
+        st.session_state["analysis_id"] = result["analysis_id"]
+        # Pin them so they are not evicted while this session shows them
+        get_document_store().hold(st.session_state["session_id"], [result["doc_id"], result["analysis_id"]])
+    else:
+        # No made-up fallback: a failed analysis shows the error and no score
+        st.session_state["analysis_id"] = None
+
+
+def sync(job_queue):
+    """Loads the selected job once it has finished. Returns the selected job (or None)."""
+    job_id = st.session_state.get("job_id")
+    if not job_id:
+        return None
+    job = job_queue.get(job_id)
+    if job is not None and not is_active(job) and st.session_state.get("loaded_job") != job_id:
+        load(job_queue, job_id)
+        if job["status"] == DONE:
+            st.toast(f"Analysis of {job['file_name']} complete!")
+    return job
+
+
+def show(job_queue, session_id):
+    """Sidebar list of this session's jobs; polls while any of them is still running."""
+    jobs = job_queue.list(session_id)
+    if not jobs:
+        return
+    st.subheader("Analyses")
+    active = any(is_active(job) for job in jobs)
+    st.fragment(run_every=POLL_SECONDS if active else None)(_job_list)(job_queue, session_id, active)
+
+
+def _job_list(job_queue, session_id, was_active):
+    jobs = job_queue.list(session_id)
+    for job in jobs:
+        if is_active(job):
+            label = STAGE_LABELS[job["stage"]]
+            if job["clauses_done"]:
+                label += f" · {job['clauses_done']} clauses"
+            st.progress(_progress(job), text=f"{job['file_name']}: {label}")
+        elif job["status"] == ERROR:
+            st.caption(f"⚠️ {job['file_name']}: {job['error']}")
+        else:
+            selected = job["id"] == st.session_state.get("job_id")
+            st.button(f"{'👉' if selected else '📄'} {job['file_name']}", key=f"job_{job['id']}",
+                      on_click=load, args=(job_queue, job["id"]), use_container_width=True)
+    if was_active and not any(is_active(job) for job in jobs):
+        # Refresh the whole page so the finished result (and the stopped poll) show up
+        st.rerun()
+
+
+def show_progress(job_queue, job_id):
+    """Main-area view of a running job: stage progress and each clause as soon as it is found."""
+    st.fragment(run_every=POLL_SECONDS)(_progress_panel)(job_queue, job_id)
+
+
+def _progress_panel(job_queue, job_id):
+    job = job_queue.get(job_id)
+    if not is_active(job):
+        st.rerun()
+    st.subheader(f"🔍 Detailed Analysis (live): {job['file_name']}")
+    st.progress(_progress(job), text=STAGE_LABELS[job["stage"]])
+    for number, clause in enumerate(job["clauses"], 1):
+        analysis.show_clause_preview(number, clause)
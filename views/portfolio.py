@@ -0,0 +1,66 @@
+import streamlit as st
+import plotly.express as px
+from utils.portfolio import Portfolio, load_batch_results
+from utils.tracing import span
+
+
+def _portfolio(job_queue, session_id, everyone, batch_file):
+    """Builds the score matrix only when the set of finished contracts changed."""
+    session = None if everyone else session_id
+    signature = (session, job_queue.finished_version(session), batch_file.file_id if batch_file else None)
+    cached = st.session_state.get("portfolio")
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    with span("portfolio", everyone=everyone):
+        records = job_queue.finished(session)
+        if batch_file is not None:
+            records += load_batch_results(batch_file.getvalue().decode("utf-8").splitlines())
+        portfolio = Portfolio.from_records(records)
+    st.session_state["portfolio"] = (signature, portfolio)
+    return portfolio
+
+
+def show(job_queue, session_id):
+    st.header("🗂️ Contract Portfolio")
+    st.markdown("Risk across all your analyzed contracts. Upload several contracts at once in the sidebar.")
+
+    col1, col2 = st.columns([1, 2])
+    everyone = col1.toggle("All contracts on this server", help="Include contracts analyzed in other sessions")
+    batch_file = col2.file_uploader("Add batch results (JSONL from batch_analyze.py)", type=["jsonl"])
+    portfolio = _portfolio(job_queue, session_id, everyone, batch_file)
+
+    if not len(portfolio):
+        st.info("No analyzed contracts yet. Upload contracts in the sidebar and click **Analyze Contract**.")
+        return
+
+    # 1. Headline numbers
+    summary = portfolio.summary()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Contracts", summary["contracts"])
+    c2.metric("Median Risk", f"{summary['median']}/100")
+    c3.metric("90th Percentile", f"{summary['p90']}/100")
+    c4.metric("High-Risk Contracts", summary["high_risk"])
+
+    # 2. Per-category aggregates
+    st.subheader("Risk by Category")
+    st.dataframe(portfolio.category_stats(), use_container_width=True,
+                 column_config={"high_risk_share": st.column_config.ProgressColumn("High-risk share", min_value=0, max_value=1)})
+
+    # 3. Riskiest contracts
+    st.subheader("Riskiest Contracts")
+    c1, c2 = st.columns([1, 3])
+    rank_by = c1.selectbox("Rank by", ["Overall"] + portfolio.categories)
+    n = c2.slider("Show", 5, 100, 10)
+    st.dataframe(portfolio.top(n, None if rank_by == "Overall" else rank_by), hide_index=True, use_container_width=True)
+
+    # 4. Heatmap (rank bands above MAX_HEATMAP_ROWS contracts) and score distribution
+    st.subheader("Category Heatmap")
+    heatmap, per_row = portfolio.heatmap()
+    if per_row > 1:
+        st.caption(f"Ordered from riskiest to safest; each row averages ~{per_row:.0f} contracts.")
+    fig = px.imshow(heatmap, color_continuous_scale="RdYlGn_r", zmin=0, zmax=100, aspect="auto")
+    fig.update_layout(height=min(800, 200 + 12 * len(heatmap)))
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.subheader("Risk Distribution")
+    st.plotly_chart(px.bar(portfolio.histogram(), x="risk_score", y="contracts"), use_container_width=True)
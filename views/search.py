@@ -0,0 +1,45 @@
+import time
+import streamlit as st
+from utils.engine_registry import get_clause_search
+from utils.tracing import span
+from views import jobs
+
+RISK_ICONS = {"High": "🔴", "Medium": "🟠", "Low": "🟢"}
+
+
+def show(job_queue, session_id):
+    st.header("🔎 Clause Search")
+    st.markdown('Search every analyzed clause at once, e.g. `uncapped indemnity` or `"exclusive jurisdiction" OR arbitration`.')
+
+    search = get_clause_search()
+    stats = search.stats()
+    if not stats["clauses"]:
+        st.info("No analyzed clauses yet. Upload contracts in the sidebar and click **Analyze Contract**.")
+        return
+
+    query = st.text_input("Search clauses", placeholder="indemnif* without limit")
+    facets = search.facets()
+    col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
+    types = col1.multiselect("Clause type", facets["types"])
+    risk_levels = col2.multiselect("Risk level", facets["risk_levels"])
+    entity = col3.text_input("Mentions (party, place, date)", placeholder="e.g. Singapore")
+    everyone = col4.toggle("All sessions", help="Include contracts analyzed in other sessions")
+
+    started = time.perf_counter()
+    with span("clause_search", query_chars=len(query)):
+        results = search.search(query, types=types, risk_levels=risk_levels, entity=entity.strip() or None,
+                                session=None if everyone else session_id)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    st.caption(f"{len(results)} results from {stats['clauses']} clauses in {stats['contracts']} contracts "
+               f"({elapsed_ms:.1f} ms)")
+
+    for number, result in enumerate(results):
+        risk = result["risk_level"]
+        with st.container(border=True):
+            st.markdown(f"{RISK_ICONS.get(risk, '⚪')} **{result['contract']}** · Clause {result['clause']} · "
+                        f"{result['type']} ({risk} Risk)")
+            st.markdown(f"> {result['snippet']}")
+            if result["explanation"]:
+                st.caption(result["explanation"])
+            st.button("Open contract", key=f"search_open_{number}", on_click=jobs.load,
+                      args=(job_queue, result["contract_id"]), help="Shows it on the Dashboard and Detailed Analysis pages")
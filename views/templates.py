@@ -1,20 +1,16 @@
 import streamlit as st
-from utils.nlp_engine import NLPEngine
+from utils.contract_templates import TEMPLATE_FILES
+from utils.engine_registry import get_engine
 
 def show(nlp_engine=None):
     st.header("📝 Standardized Contract Templates")
-    st.markdown("Generate professional legal agreements in seconds using AI.")
+    st.markdown("Generate professional legal agreements in seconds from vetted low-risk templates, with AI-written sections tailored to your details.")
     
     if nlp_engine is None:
-        nlp_engine = NLPEngine()
+        nlp_engine = get_engine()
         
-    contract_types = [
-        "Employment Agreement",
-        "Non-Disclosure Agreement (NDA)",
-        "Rental Agreement",
-        "Vendor Service Agreement",
-        "Freelance Contract"
-    ]
+    # One pre-vetted skeleton per type; Claude only writes the bespoke sections
+    contract_types = list(TEMPLATE_FILES)
     
     selected_type = st.selectbox("Select Contract Type", contract_types)
     